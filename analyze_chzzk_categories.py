@@ -1,32 +1,28 @@
 # analyze_chzzk_categories.py
-import re
-import pandas as pd
 from pathlib import Path
 
+import latest_csv
+
 WIDE_FILE = Path("data/chzzk/categories_matrix.csv")
 OUT_DIR   = Path("data/chzzk/categories")
 OUT_FILE  = OUT_DIR / "top_latest.csv"
 
-TIME_COL_PAT = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:00:00Z$")
+KEY_COLS = ["categoryType", "categoryId", "categoryValue"]
 
 def analyze():
-    if not WIDE_FILE.exists():
+    if not WIDE_FILE.exists() and not latest_csv.latest_path(WIDE_FILE).exists():
         print("categories_matrix.csv가 없습니다."); return
 
-    wide = pd.read_csv(WIDE_FILE, dtype=str, encoding="utf-8-sig")
-
-    time_cols = [c for c in wide.columns if TIME_COL_PAT.match(str(c))]
-    if not time_cols:
+    # 최신 시각 열만 읽기 (사이드카 *.latest.csv 우선, 없으면 매트릭스에서 키 열 + 최신 열만, pandas 없이)
+    cols, rows, latest_col = latest_csv.read_latest_rows(WIDE_FILE, KEY_COLS)
+    if latest_col is None:
         print("시간 컬럼이 없습니다."); return
-    latest_col = sorted(time_cols, key=lambda s: pd.to_datetime(s, utc=True))[-1]
 
-    wide[latest_col] = pd.to_numeric(wide[latest_col], errors="coerce").fillna(0).astype("Int64")
-    out = (wide[["categoryType","categoryId","categoryValue", latest_col]]
-           .sort_values(latest_col, ascending=False)
-           .reset_index(drop=True))
+    counts = latest_csv.int_column(rows)
+    out = (rows[i][:-1] + [counts[i]] for i in latest_csv.rank_desc(counts))
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
-    out.to_csv(OUT_FILE, index=False, encoding="utf-8-sig")
+    latest_csv.write_rows(OUT_FILE, cols, out)
     print(f"Saved {OUT_FILE} (latest={latest_col})")
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+# api_records.py
+# -*- coding: utf-8 -*-
+"""
+API 응답 파싱 계층 (페이지 JSON → 필요한 필드만 담은 __slots__ 레코드)
+- 페이지 본문(bytes)을 orjson으로 디코드 (설치돼 있지 않으면 표준 json)
+- 항목 dict에서 수집기가 쓰는 필드만 레코드로 옮기고 dict는 페이지 단위로 바로 버림
+  → 전체 페이지를 모으는 동안 cate_img, 썸네일/채널 이미지 URL, 기타 쓰지 않는 필드를 들고 있지 않음
+  (pd.DataFrame(rows) / pd.json_normalize(rows)로 전 필드를 만든 뒤 잘라내던 단계 없음)
+- 레코드 목록 → DataFrame은 필드별 열 리스트로 한 번에 (to_frame)
+  · 응답에 한 번도 나오지 않은 필드는 열을 만들지 않음 (기존 '있는 열만 유지'와 같은 모양)
+  · 일부 항목에만 없는 필드는 결측(None)
+
+레코드:
+  SoopCategory  categoryList 항목         category_no, category_name, view_cnt, fixed_tags
+  SoopBroad     categoryContentsList 항목 broad_no, broad_title, user_id, user_nick, view_cnt, broad_start, hash_tags
+  ChzzkLive     /open/v1/lives 항목       liveId, liveTitle, concurrentUserCount, openDate, categoryType,
+                                          liveCategory, liveCategoryValue, channelId, channelName, tags
+"""
+
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성 (없으면 표준 json)
+    orjson = None
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING: Any = _Missing()  # 응답 항목에 없던 필드 (None = 응답의 null)
+
+
+def loads(body: Union[bytes, str]) -> Any:
+    """응답 본문 → JSON 값 (orjson 우선)"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+# ======================
+# 레코드
+# ======================
+class Record:
+    """__slots__ = 필드 이름. 항목 dict에서 그 필드만 복사 (없으면 MISSING)"""
+    __slots__ = ()
+
+    def __init__(self, item: Dict[str, Any]):
+        get = item.get
+        for name in self.__slots__:
+            setattr(self, name, get(name, MISSING))
+
+    def __repr__(self) -> str:
+        body = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({body})"
+
+
+class SoopCategory(Record):
+    __slots__ = ("category_no", "category_name", "view_cnt", "fixed_tags")
+    category_no: str
+    category_name: str
+    view_cnt: Union[int, str]
+    fixed_tags: List[str]
+
+
+class SoopBroad(Record):
+    __slots__ = ("broad_no", "broad_title", "user_id", "user_nick", "view_cnt", "broad_start", "hash_tags")
+    broad_no: Union[int, str]
+    broad_title: str
+    user_id: str
+    user_nick: str
+    view_cnt: Union[int, str]
+    broad_start: str
+    hash_tags: List[str]
+
+
+class ChzzkLive(Record):
+    __slots__ = ("liveId", "liveTitle", "concurrentUserCount", "openDate", "categoryType",
+                 "liveCategory", "liveCategoryValue", "channelId", "channelName", "tags")
+    liveId: int
+    liveTitle: str
+    concurrentUserCount: int
+    openDate: str
+    categoryType: Optional[str]
+    liveCategory: Optional[str]
+    liveCategoryValue: Optional[str]
+    channelId: str
+    channelName: str
+    tags: List[str]
+
+
+# ======================
+# 페이지 파싱
+# ======================
+def soop_page(body: bytes, record: Type[Record]) -> Tuple[List[Record], bool]:
+    """sch.sooplive.co.kr/api.php 응답 → (data.list 레코드, data.is_more)"""
+    js = loads(body)
+    data = js.get("data", {}) or {}
+    items = data.get("list", []) or []
+    return [record(it) for it in items], bool(data.get("is_more", False))
+
+
+def chzzk_page(body: bytes) -> Tuple[List[ChzzkLive], Optional[str]]:
+    """/open/v1/lives 응답 → (content.data 레코드, content.page.next 커서)"""
+    js = loads(body) or {}
+    content = js.get("content") or {}
+    data = content.get("data") or []
+    page = content.get("page") or {}
+    return [ChzzkLive(it) for it in data], page.get("next")
+
+
+def to_frame(records: Sequence[Record], record: Type[Record]) -> pd.DataFrame:
+    """레코드 목록 → DataFrame (필드 순서대로, 한 번도 없던 필드는 열 생략)"""
+    cols: Dict[str, List[Any]] = {}
+    for name in record.__slots__:
+        values = [getattr(r, name) for r in records]
+        present = [v is not MISSING for v in values]
+        if not any(present):
+            continue
+        cols[name] = values if all(present) else [v if p else None for v, p in zip(values, present)]
+    return pd.DataFrame(cols)
@@ -0,0 +1,154 @@
+# atomic_io.py
+# -*- coding: utf-8 -*-
+"""
+원자적(crash-safe) 파일 쓰기 + 폴더별 advisory lock
+- 쓰기: 같은 폴더의 임시 파일에 기록 → flush + fsync → os.replace로 최종 경로에 교체
+  → 도중에 프로세스가 죽어도 최종 파일은 '이전 내용' 또는 '새 내용' 둘 중 하나 (잘린 파일 없음)
+  → 교체 파일의 권한은 기존 파일과 같게 (새 파일이면 umask 기본값, mkstemp의 0600이 남지 않음)
+- 잠금: 출력 파일이 있는 폴더의 '.lock' 하나에 fcntl.flock(배타) → 같은 호스트의 여러 수집 프로세스가
+  같은 파일을 동시에 쓰지 않음 (출력 파일마다 잠금 파일이 생기지 않음, fcntl이 없는 플랫폼에서는 잠금 없이 동작)
+  · 같은 스레드가 이미 잡은 폴더 잠금은 다시 잡지 않음 (잠금 안에서 같은 폴더의 다른 파일 기록 가능)
+- append(details_master.csv 등): 잠금 안에서 한 번의 write + fsync
+
+사용 예:
+  atomic_io.write_csv(df, path, index=False, encoding="utf-8-sig")
+  with atomic_io.atomic_open(path, "wb") as f: np.save(f, arr)
+"""
+
+from __future__ import annotations
+import contextlib
+import os
+import pathlib
+import stat
+import tempfile
+import threading
+from typing import IO, TYPE_CHECKING, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+if TYPE_CHECKING:  # 타입 표기용 (import 시 pandas를 올리지 않음 → pandas 없는 경로도 atomic_io 사용)
+    import pandas as pd
+
+
+_UMASK = os.umask(0)  # 현재 umask 읽기 (설정 API뿐이라 바로 되돌림)
+os.umask(_UMASK)
+
+_held = threading.local()  # 스레드가 잡고 있는 잠금 파일 경로
+
+
+def lock_path(path: pathlib.Path) -> pathlib.Path:
+    """path를 보호하는 잠금 파일 (폴더당 하나)"""
+    return pathlib.Path(os.path.abspath(path)).parent / ".lock"
+
+
+@contextlib.contextmanager
+def file_lock(path: pathlib.Path) -> Iterator[None]:
+    """
+    path가 있는 폴더의 배타 잠금 (같은 프로세스 안의 스레드끼리도 배타: 잠글 때마다 새 파일 핸들)
+    같은 스레드 안에서 겹쳐 잡으면 바깥 잠금을 그대로 사용.
+    """
+    if fcntl is None:
+        yield
+        return
+    lp = lock_path(path)
+    held = _held.__dict__.setdefault("paths", set())
+    if lp in held:
+        yield
+        return
+    lp.parent.mkdir(parents=True, exist_ok=True)
+    with open(lp, "a") as lf:
+        fcntl.flock(lf.fileno(), fcntl.LOCK_EX)
+        held.add(lp)
+        try:
+            yield
+        finally:
+            held.discard(lp)
+            fcntl.flock(lf.fileno(), fcntl.LOCK_UN)
+
+
+def _replace_mode(path: pathlib.Path) -> int:
+    """교체 파일 권한: 기존 파일과 같게, 없으면 umask 기본값"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _fsync_dir(directory: pathlib.Path) -> None:
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def atomic_open(path: pathlib.Path, mode: str = "w", lock: bool = True, **kw) -> Iterator[IO]:
+    """
+    임시 파일 핸들을 넘겨주고, 블록이 정상 종료되면 fsync 후 path로 교체.
+    예외가 나면 임시 파일만 지우고 기존 path는 그대로.
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path) if lock else contextlib.nullcontext():
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+        try:
+            os.chmod(tmp, _replace_mode(path))
+            with os.fdopen(fd, mode, **kw) as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        _fsync_dir(path.parent)
+
+
+def write_csv(df: pd.DataFrame, path: pathlib.Path, encoding: str = "utf-8-sig", **to_csv_kw) -> pathlib.Path:
+    """df.to_csv(path, ...)의 원자적 버전"""
+    with atomic_open(path, "w", newline="", encoding=encoding) as f:
+        df.to_csv(f, **to_csv_kw)
+    return pathlib.Path(path)
+
+
+def write_text(path: pathlib.Path, text: str, encoding: str = "utf-8") -> pathlib.Path:
+    with atomic_open(path, "w", encoding=encoding) as f:
+        f.write(text)
+    return pathlib.Path(path)
+
+
+def append_bytes(path: pathlib.Path, data: bytes) -> pathlib.Path:
+    """잠금 안에서 끝에 덧붙이고 fsync (write 한 번 → 다른 프로세스의 append와 섞이지 않음)"""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path):
+        with open(path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    return path
+
+
+def append_csv(df: pd.DataFrame, path: pathlib.Path, encoding: str = "utf-8-sig", **to_csv_kw) -> pathlib.Path:
+    """
+    df.to_csv(path, mode="a", ...)의 잠금 버전. 헤더는 파일이 없거나 비었을 때만
+    (잠금 안에서 판단하므로 두 프로세스가 동시에 헤더를 쓰지 않음). BOM도 첫 기록에만.
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path):
+        first = not path.exists() or path.stat().st_size == 0
+        text = df.to_csv(header=first, **to_csv_kw)
+        data = text.encode(encoding if first else encoding.replace("-sig", ""))
+        with open(path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    return path
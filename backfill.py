@@ -0,0 +1,195 @@
+# backfill.py
+# -*- coding: utf-8 -*-
+"""
+스냅샷 → 매트릭스 전체 재생성 (병렬 backfill)
+- 대상
+  · data/soop/categories_store/YYYY/MM/DD.csv.gz  (카테고리 스냅샷 → long 스토어 일 파일)
+  · data/soop/categories_matrix.csv                (스토어에서 재생성)
+  · data/soop/details/<cat>/details_matrix*.csv|npz (디테일 스냅샷, collect_details 설정 그대로)
+  · data/soop/details/<cat>/bj_master.sqlite (+ bj_master.csv, bj_nick_history.csv export)
+- 스냅샷 트리(YYYY/MM/DD/HH.csv), 월 아카이브(snapshot_archive), 델타 트리(snapshot_delta)를 '일' 단위 샤드로 나눠
+  프로세스 풀에서 파싱/축약 → 샤드 결과를 날짜 순서대로 이어붙여 병합
+  (완료 순서와 무관하게 결과가 같음)
+- 병합 규칙은 수집기와 같음: 같은 시간/같은 키는 마지막 값
+  · 카테고리: (captured_hour, category_no, category_name) 마지막 값 (upsert_wide_csv)
+             스냅샷이 있는 날짜의 스토어 일 파일만 교체, 스냅샷이 없는 날짜(와이드 이관분 등)는 유지
+  · 디테일  : 시간 정렬(stable) 후 (captured_hour, user_id) 마지막 값 (update_matrix_for_category)
+  · bj_master: user_id별 최신 닉네임, first_seen=처음 본 시각, last_seen=마지막 본 시각
+- 같은 시간이 여러 곳에 있으면 아카이브 → 델타 트리 → 시간별 CSV 순서로 나중(우선)
+- 디테일 매트릭스 워터마크는 details_master.csv 현재 끝으로 맞춤 (다음 증분 실행이 다시 읽지 않도록)
+
+사용:
+  python backfill.py                    # 전부, 코어 수만큼 프로세스
+  python backfill.py --only details -j 4
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+import atomic_io
+import bj_store
+import category_store
+import collect_categories
+import collect_details
+import snapshot_archive
+import snapshot_delta
+import sparse_matrix
+import streamer_registry
+
+CATEGORY_COLS = ["captured_at_utc", "category_no", "category_name", "view_cnt"]
+DETAIL_COLS = ["captured_at_utc", "user_id", "user_nick", "view_cnt"]
+
+Shard = Tuple[str, str, str]  # (kind, 스냅샷 루트, 'YYYY-MM-DD')
+
+
+# ======================
+# 샤드
+# ======================
+def list_days(snap_root: pathlib.Path) -> List[str]:
+    days = set()
+    for d in snap_root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]"):
+        if any(d.glob("[0-9][0-9].csv")):
+            days.add(f"{d.parent.parent.name}-{d.parent.name}-{d.name}")
+    for _, index_path in snapshot_archive.iter_months(snap_root):
+        days.update(k[:10] for k in snapshot_archive.load_index(index_path))
+    days.update(k[:10] for k, _, _ in snapshot_delta.list_hours(snap_root))
+    return sorted(days)
+
+
+def _read_day(snap_root: pathlib.Path, day: str, usecols: List[str]) -> List[pd.DataFrame]:
+    frames = []
+    _, index_path = snapshot_archive.month_paths(snap_root, day)
+    for key in sorted(k for k in snapshot_archive.load_index(index_path) if k.startswith(day)):
+        df = snapshot_archive.read_hour(snap_root, key)
+        if df is not None and set(usecols).issubset(df.columns):
+            frames.append(df[usecols])
+    for _, df in snapshot_delta.iter_hours(snap_root, day, day):
+        if set(usecols).issubset(df.columns):
+            frames.append(df[usecols])
+    for p in sorted((snap_root / day[0:4] / day[5:7] / day[8:10]).glob("[0-9][0-9].csv")):
+        df = pd.read_csv(p, encoding="utf-8-sig", dtype=str)
+        if set(usecols).issubset(df.columns):
+            frames.append(df[usecols])
+    return frames
+
+
+def reduce_shard(shard: Shard) -> pd.DataFrame:
+    """하루치 스냅샷 → 키별 마지막 값만 남긴 long 행 (워커 프로세스에서 실행)"""
+    kind, root, day = shard
+    usecols = CATEGORY_COLS if kind == "categories" else DETAIL_COLS
+    frames = _read_day(pathlib.Path(root), day, usecols)
+    if not frames:
+        return pd.DataFrame(columns=usecols + ["captured_hour"])
+    df = pd.concat(frames, ignore_index=True)
+    df["captured_hour"] = collect_details.to_hour_utc_iso(df["captured_at_utc"])
+    df["view_cnt"] = pd.to_numeric(df["view_cnt"], errors="coerce").fillna(0).astype("int64")
+    if kind == "categories":
+        df["category_no"] = df["category_no"].astype(str).str.zfill(8)
+        df["category_name"] = df["category_name"].astype(str)
+        return df.drop_duplicates(subset=["captured_hour", "category_no", "category_name"], keep="last")
+    df["user_id"] = df["user_id"].astype(str)
+    df["user_nick"] = df["user_nick"].astype(str)
+    df = df.sort_values("captured_hour", kind="stable")
+    return df.drop_duplicates(subset=["captured_hour", "user_id"], keep="last")
+
+
+def run_shards(pool: ProcessPoolExecutor, kind: str, snap_root: pathlib.Path) -> pd.DataFrame:
+    shards = [(kind, str(snap_root), day) for day in list_days(snap_root)]
+    if not shards:
+        return pd.DataFrame()
+    parts = list(pool.map(reduce_shard, shards))
+    return pd.concat(parts, ignore_index=True)  # 날짜 순서 그대로 (pool.map은 입력 순서 유지)
+
+
+# ======================
+# 재생성
+# ======================
+def rebuild_categories(pool: ProcessPoolExecutor) -> Optional[pathlib.Path]:
+    """스냅샷 → category_store 일 파일 교체 → 스토어에서 categories_matrix.csv 재생성"""
+    df = run_shards(pool, "categories", collect_categories.OUT_ROOT)
+    if df.empty:
+        return None
+    df = df.drop_duplicates(subset=["captured_hour", "category_no", "category_name"], keep="last")
+    category_store.replace_days(df)
+    return category_store.write_wide(collect_categories.WIDE_CSV)
+
+
+def rebuild_details(pool: ProcessPoolExecutor, cate_no: str, cate_name: str) -> Optional[pathlib.Path]:
+    cdir = collect_details.category_dir(cate_no, cate_name)
+    df = run_shards(pool, "details", cdir / "snapshots")
+    if df.empty:
+        return None
+    df = df.sort_values("captured_hour", kind="stable")
+    df = df.drop_duplicates(subset=["captured_hour", "user_id"], keep="last")
+
+    # bj_master(.sqlite/.csv): 최신 닉네임 + 처음/마지막 시각, 닉네임 이력
+    seen = df.groupby("user_id")["captured_hour"].agg(["min", "max"])
+    bj = (
+        df.drop_duplicates(subset=["user_id"], keep="last")[["user_id", "user_nick"]]
+        .set_index("user_id")
+        .join(seen)
+        .rename(columns={"min": "first_seen", "max": "last_seen"})
+        .sort_index()
+        .reset_index()
+    )
+    history = (
+        df.groupby(["user_id", "user_nick"])["captured_hour"].agg(["min", "max"])
+        .rename(columns={"min": "first_seen", "max": "last_seen"})
+        .reset_index()
+    )
+    bj_store.replace_all(cdir, bj, history)
+    bj_store.export(cdir)
+
+    # 매트릭스
+    matrix = collect_details.matrix_path(cate_no, cate_name)
+    if collect_details.DETAILS_MATRIX_IDS:
+        registry = streamer_registry.get_registry(collect_details.REGISTRY_ROOT)
+        df["col_label"] = registry.encode(df["user_id"], df["user_nick"], df["captured_hour"])
+        registry.save()
+    else:
+        df["col_label"] = df["user_id"] + "|" + df["user_nick"]
+    wide = (
+        df.pivot_table(index="captured_hour", columns="col_label", values="view_cnt", aggfunc="last")
+        .astype("Int64")
+        .sort_index(axis=0)
+        .sort_index(axis=1)
+    )
+    wide.columns.name = None
+    if matrix.suffix == ".npz":
+        sparse_matrix.SparseMatrix.from_frame(wide).save(matrix)
+    else:
+        atomic_io.write_csv(wide.reset_index(), matrix, index=False)
+
+    master_csv = cdir / "details_master.csv"
+    if master_csv.exists():
+        state = collect_details.master_end_state(master_csv, df["captured_at_utc"].max())
+        collect_details.save_matrix_state(matrix, state)
+    return matrix
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="스냅샷에서 매트릭스/BJ 마스터 전체 재생성")
+    ap.add_argument("--only", choices=["categories", "details"], help="한쪽만 재생성")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="프로세스 수")
+    args = ap.parse_args(argv)
+
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        if args.only in (None, "categories"):
+            out = rebuild_categories(pool)
+            print(f"categories -> {out or 'no snapshots'} ({time.time() - t0:.1f}s)")
+        if args.only in (None, "details"):
+            for cate_no, cate_name in collect_details.CATEGORY_MAP.items():
+                out = rebuild_details(pool, cate_no, cate_name)
+                print(f"[{cate_no}] details -> {out or 'no snapshots'} ({time.time() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
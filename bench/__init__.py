@@ -0,0 +1,16 @@
+# bench/__init__.py
+# -*- coding: utf-8 -*-
+"""
+수집기 벤치마크
+- synthetic.py : 시간·카디널리티를 조절할 수 있는 가상 카테고리/스트리머 이력 (시드 고정)
+- stubs.py     : 네트워크 대신 가상 이력으로 SOOP/CHZZK API 응답을 돌려주는 http_client.get 대체
+- storage.py   : 이력이 쌓여가는 동안 upsert 경로별 소요 시간/처리량/최대 RSS를 JSON으로 기록
+- mock_api.py  : 로컬 SOOP/CHZZK API 대역 HTTP 서버 (페이지네이션, 지연/오류/429 조절, 기록 재생)
+- fetch.py     : mock_api 서버를 상대로 수집기 fetch_* 처리량을 동시성/속도 설정별로 JSON 기록
+- startup.py   : 엔트리 모듈별 import 시간(-X importtime)과 pandas/numpy/requests 로드 여부를 JSON 기록
+
+저장소 루트에서 실행:
+  python -m bench.storage --hours 168 --checkpoints 24,72,168 --out bench_storage.json
+  python -m bench.fetch --latency-ms 80 --concurrency 1,4,8 --rate 5,0 --out bench_fetch.json
+  python -m bench.startup --check --budget-ms 50 --out bench_startup.json
+"""
@@ -0,0 +1,169 @@
+# bench/fetch.py
+# -*- coding: utf-8 -*-
+"""
+수집기 fetch 처리량 벤치마크 (mock_api 서버 대상, 네트워크 없음)
+- 대상
+    soop.categories  collect_categories.fetch_all_categories
+    soop.details     collect_details.fetch_all_for_category (CATEGORY_MAP 전체, run_concurrent)
+    chzzk.lives      collect_chzzk.fetch_all_lives
+- 설정 격자(FETCH_CONCURRENCY × FETCH_RATE)마다 환경변수를 바꾼 새 프로세스에서
+  수집기의 BASE/OPENAPI를 서버 주소로 돌리고 --repeat 회 실행
+  (재시도/백오프: --retries, --backoff-base, --backoff-max → HTTP_RETRIES 등)
+- 결과: 중앙값 초, 항목/초, 페이지(요청)/초, 서버가 본 상태 코드 분포 → JSON
+
+사용 (저장소 루트에서):
+  python -m bench.fetch --latency-ms 80 --jitter-ms 30 --concurrency 1,2,4,8 --rate 5,20,0
+  python -m bench.fetch --error-rate 0.05 --rate-limit 10 --targets soop.categories --out bench_fetch.json
+  python -m bench.fetch --url http://127.0.0.1:8765   # 따로 띄운 mock_api 서버 사용
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Dict, List
+
+from bench import mock_api
+from bench.storage import ROOT, git_revision
+
+TARGETS = ["soop.categories", "soop.details", "chzzk.lives"]
+
+
+# ======================
+# 실행 (자식 프로세스)
+# ======================
+def run_target(url: str, target: str, repeat: int, workdir: str) -> Dict[str, Any]:
+    os.chdir(workdir)  # 수집기 import 시점 mkdir이 저장소 data/를 건드리지 않게
+    sys.path.insert(0, str(ROOT))
+    import collect_categories
+    import collect_chzzk
+    import collect_details
+    import fetch_engine
+
+    collect_categories.BASE = collect_details.BASE = f"{url}/api.php"
+    collect_chzzk.OPENAPI = url
+    collect_chzzk.HEADERS["Client-Id"] = collect_chzzk.HEADERS["Client-Id"] or "bench"
+    collect_chzzk.HEADERS["Client-Secret"] = collect_chzzk.HEADERS["Client-Secret"] or "bench"
+
+    def once() -> int:
+        if target == "soop.categories":
+            return len(collect_categories.fetch_all_categories())
+        if target == "soop.details":
+            parts = fetch_engine.run_concurrent(collect_details.fetch_all_for_category,
+                                                collect_details.CATEGORY_MAP.keys())
+            return sum(len(p) for p in parts)
+        return len(collect_chzzk.fetch_all_lives())
+
+    seconds: List[float] = []
+    items = 0
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            items = once()
+            seconds.append(time.perf_counter() - t0)
+    except Exception as e:  # 재시도 소진 등 → 결과에 기록하고 다음 설정으로
+        return {"seconds": seconds, "items": items, "error": repr(e)}
+    return {"seconds": seconds, "items": items, "error": None}
+
+
+def _call(url: str, path: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(f"{url}{path}", timeout=10) as r:
+        return json.loads(r.read())
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="수집기 fetch 처리량 벤치마크 (로컬 mock API)")
+    ap.add_argument("--url", help="이미 떠 있는 mock_api 서버 주소 (없으면 이 프로세스에서 띄움)")
+    ap.add_argument("--targets", default=",".join(TARGETS), help="쉼표 구분")
+    ap.add_argument("--concurrency", default="1,4,8", help="FETCH_CONCURRENCY 후보, 쉼표 구분")
+    ap.add_argument("--rate", default="5,0", help="FETCH_RATE 후보(0=제한 없음), 쉼표 구분")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--retries", type=int, default=5, help="HTTP_RETRIES")
+    ap.add_argument("--backoff-base", type=float, default=1.0, help="HTTP_BACKOFF_BASE")
+    ap.add_argument("--backoff-max", type=float, default=10.0, help="HTTP_BACKOFF_MAX")
+    ap.add_argument("--out", type=pathlib.Path, help="결과 JSON 경로 (없으면 stdout)")
+    mock_api.add_server_args(ap)
+    args = ap.parse_args(argv)
+
+    targets = [t for t in args.targets.split(",") if t]
+    unknown = sorted(set(targets) - set(TARGETS))
+    if unknown:
+        ap.error(f"unknown targets: {', '.join(unknown)}")
+
+    server = None
+    url = args.url
+    if not url:
+        opts = mock_api.server_options(args)
+        server = mock_api.start(opts.pop("source"), **opts)
+        url = server.url
+
+    results: List[Dict[str, Any]] = []
+    saved_env = dict(os.environ)
+    workdir = tempfile.mkdtemp(prefix="bench_fetch_")
+    try:
+        for conc in [int(c) for c in args.concurrency.split(",") if c]:
+            for rate in [float(r) for r in args.rate.split(",") if r]:
+                os.environ.update({
+                    "FETCH_CONCURRENCY": str(conc), "FETCH_RATE": str(rate), "HTTP_RETRIES": str(args.retries),
+                    "HTTP_BACKOFF_BASE": str(args.backoff_base), "HTTP_BACKOFF_MAX": str(args.backoff_max),
+                })
+                for target in targets:
+                    _call(url, "/__reset")
+                    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                        out = pool.submit(run_target, url, target, args.repeat, workdir).result()
+                    stats = _call(url, "/__stats")
+                    secs = statistics.median(out["seconds"]) if out["seconds"] else None
+                    runs = max(1, len(out["seconds"]))
+                    results.append({
+                        "target": target,
+                        "concurrency": conc,
+                        "rate": rate,
+                        "seconds": round(secs, 4) if secs else None,
+                        "items": out["items"],
+                        "items_per_s": round(out["items"] / secs, 1) if secs else None,
+                        "requests": stats["requests"],
+                        "requests_per_s": round(stats["requests"] / runs / secs, 1) if secs else None,
+                        "bytes": stats["bytes"],
+                        "status": stats["status"],
+                        "error": out["error"],
+                    })
+                    r = results[-1]
+                    print(f"{target} c={conc} rate={rate:g}: {r['seconds']}s, {r['items_per_s']} items/s, "
+                          f"status={r['status']}" + (f", error={r['error']}" if r["error"] else ""), file=sys.stderr)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+        shutil.rmtree(workdir, ignore_errors=True)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    report = {
+        "created_at_utc": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {**vars(args), "out": str(args.out) if args.out else None,
+                   "replay": str(args.replay) if args.replay else None, "url": url},
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+        print("written ->", args.out, file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# bench/mock_api.py
+# -*- coding: utf-8 -*-
+"""
+로컬 SOOP/CHZZK API 대역 서버 (표준 라이브러리 http.server)
+- GET /api.php?m=categoryList&nPageNo=&nListCnt=            → data.list + data.is_more
+- GET /api.php?m=categoryContentsList&szCateNo=&nPageNo=&nListCnt=
+- GET /open/v1/lives?size=&next=                             → content.data + content.page.next
+  (Client-Id / Client-Secret 헤더가 없으면 401)
+- 응답 목록: 가상 이력(synthetic.SyntheticWorld) 또는 기록 파일(--replay, Recording)
+- 동작 조절
+    --latency-ms / --jitter-ms   응답 지연 (평균 ± 균등 잡음)
+    --error-rate                 이 확률로 503
+    --throttle-rate              이 확률로 429 (Retry-After: --retry-after)
+    --rate-limit                 초당 요청 수 상한 (넘으면 429), 0이면 없음
+- GET /__stats 요청/상태 코드/바이트 집계(JSON), GET /__reset 집계 초기화
+
+사용 (저장소 루트에서):
+  python -m bench.mock_api serve --port 8765 --latency-ms 80 --error-rate 0.02 --rate-limit 20
+  python -m bench.mock_api record --out bench/recording.json     # data/의 최근 스냅샷 → 기록 파일
+  python -m bench.mock_api serve --replay bench/recording.json
+수집기를 붙여서 재는 것은 bench/fetch.py
+"""
+
+from __future__ import annotations
+import argparse
+import functools
+import json
+import pathlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from bench.stubs import chzzk_payload, soop_payload
+from bench.synthetic import SyntheticWorld
+
+
+# ======================
+# 응답 목록
+# ======================
+class Recording:
+    """기록된 목록을 시간과 무관하게 그대로 돌려줌 (SyntheticWorld와 같은 메서드)"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "Recording":
+        return cls(json.loads(pathlib.Path(path).read_text(encoding="utf-8")))
+
+    def soop_categories(self, hour: int) -> List[Dict[str, Any]]:
+        return self.data.get("soop_categories", [])
+
+    def soop_details(self, cate_no: str, hour: int) -> List[Dict[str, Any]]:
+        return self.data.get("soop_details", {}).get(cate_no, [])
+
+    def chzzk_lives(self, hour: int) -> List[Dict[str, Any]]:
+        return self.data.get("chzzk_lives", [])
+
+
+class _Memo:
+    """시간별 목록 생성 결과 캐시 (페이지마다 다시 만들지 않음)"""
+
+    def __init__(self, source):
+        self.soop_categories = functools.lru_cache(maxsize=8)(source.soop_categories)
+        self.soop_details = functools.lru_cache(maxsize=64)(source.soop_details)
+        self.chzzk_lives = functools.lru_cache(maxsize=8)(source.chzzk_lives)
+
+
+def record_from_data(data_root: pathlib.Path = pathlib.Path("data")) -> Dict[str, Any]:
+    """data/ 아래 가장 최근 SOOP 카테고리/디테일 스냅샷(시간별 CSV)을 API 항목 모양으로"""
+    import pandas as pd
+
+    def latest(root: pathlib.Path) -> Optional[pd.DataFrame]:
+        files = sorted(root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]/[0-9][0-9].csv"))
+        return pd.read_csv(files[-1], encoding="utf-8-sig", dtype=str, keep_default_na=False) if files else None
+
+    def items(df, cols, numeric) -> List[Dict[str, Any]]:
+        if df is None:
+            return []
+        df = df[[c for c in cols if c in df.columns]].copy()
+        for c in numeric:
+            if c in df.columns:
+                df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(int)
+        return df.to_dict("records")
+
+    rec: Dict[str, Any] = {
+        "soop_categories": items(latest(data_root / "soop" / "categories"),
+                                 ["category_no", "category_name", "view_cnt", "fixed_tags", "cate_img"], ["view_cnt"]),
+        "soop_details": {},
+        "chzzk_lives": [],
+    }
+    for snap in sorted((data_root / "soop" / "details").glob("*/snapshots")):
+        cate_no = snap.parent.name.split("_", 1)[0]
+        rows = items(latest(snap), ["broad_no", "broad_title", "user_id", "user_nick", "view_cnt",
+                                    "broad_start", "hash_tags"], ["view_cnt"])
+        if rows:
+            rec["soop_details"][cate_no] = rows
+    lives = latest(data_root / "chzzk" / "lives")
+    if lives is not None:
+        rec["chzzk_lives"] = items(lives, list(lives.columns), ["concurrentUserCount"])
+    return rec
+
+
+# ======================
+# 서버
+# ======================
+class MockAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, source, hour: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, rate_limit: float = 0.0,
+                 retry_after: float = 1.0, seed: Optional[int] = None):
+        super().__init__(addr, _Handler)
+        self.source = _Memo(source)
+        self.hour = hour
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self._window: List[float] = []
+        self.reset_stats()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.stats: Dict[str, Any] = {"requests": 0, "bytes": 0, "status": {}}
+
+    def _count(self, status: int, nbytes: int) -> None:
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += nbytes
+            self.stats["status"][str(status)] = self.stats["status"].get(str(status), 0) + 1
+
+    def decide(self) -> Optional[int]:
+        """이번 요청에 돌려줄 오류 상태 코드 (없으면 None)"""
+        now = time.monotonic()
+        with self.lock:
+            if self.rate_limit > 0:
+                self._window = [t for t in self._window if now - t < 1.0]
+                if len(self._window) >= self.rate_limit:
+                    return 429
+                self._window.append(now)
+            r = self.rng.random()
+        if r < self.throttle_rate:
+            return 429
+        if r < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+    def delay(self) -> float:
+        with self.lock:
+            j = self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + j) / 1000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockAPIServer
+    protocol_version = "HTTP/1.1"  # keep-alive (수집기는 세션 커넥션 풀 사용)
+
+    def log_message(self, fmt, *args):  # 요청마다 stderr 출력하지 않음
+        pass
+
+    def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        if not self.path.startswith("/__"):
+            self.server._count(status, len(body))
+
+    def do_GET(self):
+        srv = self.server
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        if parts.path == "/__stats":
+            with srv.lock:
+                stats = json.loads(json.dumps(srv.stats))
+            return self._send(200, stats)
+        if parts.path == "/__reset":
+            srv.reset_stats()
+            return self._send(200, {"ok": True})
+
+        time.sleep(srv.delay())
+        status = srv.decide()
+        if status == 429:
+            return self._send(429, {"code": 429, "message": "Too Many Requests"},
+                              {"Retry-After": f"{srv.retry_after:g}"})
+        if status == 503:
+            return self._send(503, {"code": 503, "message": "Service Unavailable"})
+
+        if parts.path.endswith("/api.php"):
+            return self._send(200, soop_payload(srv.source, srv.hour, params))
+        if parts.path == "/open/v1/lives":
+            if not self.headers.get("Client-Id") or not self.headers.get("Client-Secret"):
+                return self._send(401, {"code": 401, "message": "Unauthorized"})
+            return self._send(200, chzzk_payload(srv.source, srv.hour, params))
+        return self._send(404, {"code": 404, "message": "Not Found"})
+
+
+def start(source=None, host: str = "127.0.0.1", port: int = 0, **options) -> MockAPIServer:
+    """백그라운드 스레드로 서버 시작 (port=0이면 빈 포트). 끝낼 때 server.shutdown()"""
+    srv = MockAPIServer((host, port), source or SyntheticWorld(), **options)
+    threading.Thread(target=srv.serve_forever, name="mock-api", daemon=True).start()
+    return srv
+
+
+def add_server_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--replay", type=pathlib.Path, help="기록 파일 (없으면 가상 이력)")
+    ap.add_argument("--seed", type=int, default=0, help="가상 이력 시드")
+    ap.add_argument("--hour", type=int, default=0, help="가상 이력 시간 번호")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="503 확률")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="429 확률")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="초당 요청 수 상한 (0=없음)")
+    ap.add_argument("--retry-after", type=float, default=1.0, help="429 Retry-After(초)")
+
+
+def server_options(args) -> Dict[str, Any]:
+    source = Recording.load(args.replay) if args.replay else SyntheticWorld(seed=args.seed)
+    return dict(source=source, hour=args.hour, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                error_rate=args.error_rate, throttle_rate=args.throttle_rate, rate_limit=args.rate_limit,
+                retry_after=args.retry_after, seed=args.seed)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="로컬 SOOP/CHZZK API 대역 서버")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="서버 실행")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8765)
+    add_server_args(s)
+    r = sub.add_parser("record", help="data/의 최근 스냅샷으로 기록 파일 생성")
+    r.add_argument("--data", type=pathlib.Path, default=pathlib.Path("data"))
+    r.add_argument("--out", type=pathlib.Path, required=True)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "record":
+        rec = record_from_data(args.data)
+        args.out.write_text(json.dumps(rec, ensure_ascii=False), encoding="utf-8")
+        print(f"written -> {args.out} (categories={len(rec['soop_categories'])}, "
+              f"details={ {k: len(v) for k, v in rec['soop_details'].items()} }, lives={len(rec['chzzk_lives'])})")
+        return
+
+    opts = server_options(args)
+    srv = MockAPIServer((args.host, args.port), opts.pop("source"), **opts)
+    print(f"serving on {srv.url}  (SOOP: {srv.url}/api.php, CHZZK: {srv.url}/open/v1/lives)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# bench/startup.py
+# -*- coding: utf-8 -*-
+"""
+시작 비용 벤치마크 (매시 cron에서 스크립트 하나를 띄울 때 import에 드는 시간)
+- 엔트리 모듈마다 새 인터프리터로 `python -X importtime -c "import <모듈>"`을 --repeat 회 실행
+  · import_ms: importtime 출력에서 엔트리 모듈의 누적(cumulative) 시간
+  · wall_ms  : 프로세스 시작~종료 벽시계 시간 (인터프리터 기동 포함)
+  · 둘 다 최솟값과 중앙값, 그리고 무거운 의존성(pandas/numpy/requests) 중 실제로 올라온 것
+- 가벼운 엔트리(analyze_*, latest_csv, atomic_io, run_metrics)는 pandas/numpy/requests를
+  import하면 안 됨 → --check면 위반하거나 --budget-ms(가벼운 엔트리의 import_ms 최솟값 상한)를
+  넘을 때 종료 코드 1 (CI에서 시작 시간 회귀 감시용)
+
+사용 (저장소 루트에서):
+  python -m bench.startup                                # 전체 엔트리, 5회
+  python -m bench.startup --entries analyze_categories,collect_chzzk --repeat 10 --out bench_startup.json
+  python -m bench.startup --check --budget-ms 50
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from bench.storage import ROOT, git_revision
+
+ENTRIES = [
+    "analyze_categories",
+    "analyze_chzzk_categories",
+    "analyze_chzzk_game_categories",
+    "latest_csv",
+    "atomic_io",
+    "run_metrics",
+    "collect_categories",
+    "collect_details",
+    "collect_chzzk",
+    "market_share",
+    "rolling_stats",
+    "collector",
+]
+LIGHT = {"analyze_categories", "analyze_chzzk_categories", "analyze_chzzk_game_categories",
+         "latest_csv", "atomic_io", "run_metrics"}
+HEAVY = ["pandas", "numpy", "requests"]
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """'import time: self | cumulative | name' 줄 → {모듈 이름: 누적 µs} (최상위 이름 기준, 들여쓰기 무시)"""
+    out: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # 헤더 줄
+        out[parts[2].strip()] = int(parts[1])
+    return out
+
+
+def run_entry(module: str, repeat: int) -> Dict[str, Any]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    import_ms: List[float] = []
+    wall_ms: List[float] = []
+    heavy: List[str] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=ROOT, env=env, capture_output=True, text=True)
+        wall_ms.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            tail = proc.stderr.strip().splitlines()[-1:] or [""]
+            return {"entry": module, "error": tail[0]}
+        times = parse_importtime(proc.stderr)
+        import_ms.append(times.get(module, 0) / 1000)
+        heavy = [m for m in HEAVY if m in times]
+    return {
+        "entry": module,
+        "light": module in LIGHT,
+        "import_ms_min": round(min(import_ms), 1),
+        "import_ms_median": round(statistics.median(import_ms), 1),
+        "wall_ms_min": round(min(wall_ms), 1),
+        "wall_ms_median": round(statistics.median(wall_ms), 1),
+        "heavy_imports": heavy,
+    }
+
+
+def violations(results: List[Dict[str, Any]], budget_ms: float) -> List[str]:
+    out = []
+    for r in results:
+        if "error" in r:
+            out.append(f"{r['entry']}: {r['error']}")
+        elif r["light"] and r["heavy_imports"]:
+            out.append(f"{r['entry']}: imports {', '.join(r['heavy_imports'])}")
+        elif r["light"] and budget_ms and r["import_ms_min"] > budget_ms:
+            out.append(f"{r['entry']}: {r['import_ms_min']} ms > {budget_ms} ms")
+    return out
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="엔트리 모듈 import 시간 벤치마크 (-X importtime)")
+    ap.add_argument("--entries", default=",".join(ENTRIES), help="측정할 모듈, 쉼표 구분")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--check", action="store_true", help="가벼운 엔트리 규칙 위반 시 종료 코드 1")
+    ap.add_argument("--budget-ms", type=float, default=0, help="가벼운 엔트리 import_ms 상한 (0=검사 안 함)")
+    ap.add_argument("--out", type=pathlib.Path, help="결과 JSON 경로 (없으면 stdout)")
+    args = ap.parse_args(argv)
+
+    results: List[Dict[str, Any]] = []
+    for module in [m for m in args.entries.split(",") if m]:
+        r = run_entry(module, args.repeat)
+        results.append(r)
+        if "error" in r:
+            print(f"{module}: error {r['error']}", file=sys.stderr)
+        else:
+            print(f"{module}: import {r['import_ms_min']} ms, wall {r['wall_ms_min']} ms"
+                  f"{' [' + ','.join(r['heavy_imports']) + ']' if r['heavy_imports'] else ''}", file=sys.stderr)
+
+    problems = violations(results, args.budget_ms)
+    report = {
+        "created_at_utc": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {**vars(args), "out": str(args.out) if args.out else None},
+        "results": results,
+        "violations": problems,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+        print("written ->", args.out, file=sys.stderr)
+    else:
+        print(text)
+    if args.check and problems:
+        for p in problems:
+            print("startup check failed:", p, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
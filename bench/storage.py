@@ -0,0 +1,285 @@
+# bench/storage.py
+# -*- coding: utf-8 -*-
+"""
+저장 경로 벤치마크 (이력이 쌓일수록 upsert가 얼마나 느려지는지)
+- 경로
+    soop.upsert_wide_csv                collect_categories.upsert_wide_csv
+    soop.update_bj_master               collect_details.update_bj_master
+    soop.update_matrix_for_category     collect_details.update_matrix_for_category
+    chzzk.upsert_category_matrix        collect_chzzk.upsert_category_matrix
+    chzzk.upsert_details_matrix_top100  collect_chzzk.upsert_details_matrix_top100
+- 경로마다 새 프로세스 + 빈 임시 작업 폴더에서 0시간부터 한 시간씩 진행
+  (입력은 stubs.StubAPI가 돌려준 가상 응답을 수집기의 fetch_* 로 받아 만든 DataFrame)
+- 매 시간 측정 직전에 matrix_cache에서 출력 파일을 내려서 '매시 새 프로세스' 실행처럼
+  디스크 로드 + 반영 + 기록을 모두 잼
+- 체크포인트 시간마다 기록
+    seconds / rows_per_s  직전 --samples 회(체크포인트 시간 제외, 추적 없이)의 중앙값 초, 처리량(행/초)
+    alloc_peak_mb         체크포인트 시간의 호출을 tracemalloc으로 감싸 잰 할당 최댓값 (호출 중 최대 - 시작 시점)
+                          → 경로별 메모리 증가분 (tracemalloc은 호출을 몇 배 느리게 하므로 이 호출은 시간에서 뺌)
+    peak_rss_mb           그때까지 프로세스 전체 최대 RSS (pandas import 등 포함, 참고용)
+    output_bytes          출력 파일 크기
+- 수집기 환경변수(DETAILS_MATRIX_IDS, DETAILS_MATRIX_FORMAT, ...)는 그대로 자식 프로세스에 전달
+  → 같은 명령을 설정/버전별로 돌려 JSON끼리 비교
+
+사용 (저장소 루트에서):
+  python -m bench.storage                                   # 168시간, 체크포인트 24,72,168
+  python -m bench.storage --hours 720 --checkpoints 24,168,720 --out bench_storage.json
+  python -m bench.storage --paths soop.upsert_wide_csv --categories 2000
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+PATHS = [
+    "soop.upsert_wide_csv",
+    "soop.update_bj_master",
+    "soop.update_matrix_for_category",
+    "chzzk.upsert_category_matrix",
+    "chzzk.upsert_details_matrix_top100",
+]
+DETAIL_CATE = ("00040070", "버추얼")
+ENV_KEYS = ["DETAILS_MATRIX_IDS", "DETAILS_MATRIX_FORMAT", "STORAGE_BACKEND", "SNAPSHOT_ARCHIVE",
+            "DETAILS_SNAPSHOT_DELTA", "WRITE_BJ_MASTER_CSV"]
+
+# (prepare(hour) -> 입력, timed(입력) -> 처리 행 수, 출력 파일 목록)
+Step = Tuple[Callable[[int], Any], Callable[[Any], int], List[pathlib.Path]]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """이 프로세스의 최대 RSS(MB), 측정 불가 플랫폼이면 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ======================
+# 경로별 준비/측정
+# ======================
+def _soop_wide_step() -> Step:
+    import collect_categories
+    from bench.synthetic import hour_ts
+
+    def prepare(hour: int):
+        df = collect_categories.fetch_all_categories()
+        df["captured_at_utc"] = hour_ts(hour).isoformat()
+        return df
+
+    def timed(df) -> int:
+        collect_categories.upsert_wide_csv(df)
+        return len(df)
+
+    return prepare, timed, [collect_categories.WIDE_CSV]
+
+
+def _details_frame():
+    import collect_details
+    return collect_details.details_frame(collect_details.fetch_all_for_category(DETAIL_CATE[0]))
+
+
+def _soop_bj_step() -> Step:
+    import bj_store
+    import collect_details
+    from bench.synthetic import hour_iso
+
+    def prepare(hour: int):
+        df = _details_frame()
+        df["captured_at_utc"] = hour_iso(hour)
+        return df
+
+    def timed(df) -> int:
+        collect_details.update_bj_master(df, *DETAIL_CATE)
+        return len(df)
+
+    return prepare, timed, [bj_store.db_path(collect_details.category_dir(*DETAIL_CATE))]
+
+
+def _soop_matrix_step() -> Step:
+    import collect_details
+    from bench.synthetic import hour_iso
+
+    def prepare(hour: int):
+        df = _details_frame()
+        collect_details.save_snapshot_and_append_master(df, *DETAIL_CATE, hour_iso(hour))
+        return df
+
+    def timed(df) -> int:
+        collect_details.update_matrix_for_category(*DETAIL_CATE)
+        return len(df)
+
+    return prepare, timed, [collect_details.matrix_path(*DETAIL_CATE)]
+
+
+def _chzzk_step(fn_name: str) -> Callable[[], Step]:
+    def make() -> Step:
+        import collect_chzzk
+        out = {
+            "upsert_category_matrix": [collect_chzzk.CAT_WIDE],
+            "upsert_details_matrix_top100": [
+                p.with_suffix(".npz") if collect_chzzk.DETAILS_MATRIX_FORMAT == "sparse" else p
+                for p in [collect_chzzk.DET_WIDE_IDS if collect_chzzk.DETAILS_MATRIX_IDS else collect_chzzk.DET_WIDE]
+            ],
+        }[fn_name]
+        fn = getattr(collect_chzzk, fn_name)
+
+        def prepare(hour: int):
+            return collect_chzzk.fetch_all_lives()
+
+        def timed(df) -> int:
+            fn(df)
+            return len(df)
+
+        return prepare, timed, out
+    return make
+
+
+STEPS: Dict[str, Callable[[], Step]] = {
+    "soop.upsert_wide_csv": _soop_wide_step,
+    "soop.update_bj_master": _soop_bj_step,
+    "soop.update_matrix_for_category": _soop_matrix_step,
+    "chzzk.upsert_category_matrix": _chzzk_step("upsert_category_matrix"),
+    "chzzk.upsert_details_matrix_top100": _chzzk_step("upsert_details_matrix_top100"),
+}
+
+
+# ======================
+# 실행 (자식 프로세스)
+# ======================
+def run_path(name: str, hours: int, checkpoints: List[int], samples: int,
+             world_kw: Dict[str, Any], workdir: str) -> List[Dict[str, Any]]:
+    os.chdir(workdir)  # 수집기는 상대 경로 data/... 에 기록 (import 시점 mkdir 포함)
+    sys.path.insert(0, str(ROOT))
+    sys.stdout = open(os.devnull, "w")  # 수집기 진행 출력은 버림 (결과는 반환값으로)
+    import collect_chzzk
+    import matrix_cache
+    from bench.stubs import StubAPI
+    from bench.synthetic import SyntheticWorld, hour_iso
+
+    api = StubAPI(SyntheticWorld(**world_kw))
+    collect_chzzk.HEADERS["Client-Id"] = collect_chzzk.HEADERS["Client-Id"] or "bench"
+    collect_chzzk.HEADERS["Client-Secret"] = collect_chzzk.HEADERS["Client-Secret"] or "bench"
+    collect_chzzk._utc_hour_iso = lambda dt=None: hour_iso(api.hour)  # 수집 시각 = 가상 시간
+
+    prepare, timed, outputs = STEPS[name]()
+    results: List[Dict[str, Any]] = []
+    recent: List[Tuple[float, int]] = []
+    for hour in range(hours):
+        api.hour = hour
+        with api.installed():
+            data = prepare(hour)
+        for p in outputs:
+            matrix_cache.CACHE.drop(p)
+        if hour + 1 not in checkpoints:
+            t0 = time.perf_counter()
+            rows = timed(data)
+            recent = (recent + [(time.perf_counter() - t0, rows)])[-samples:]
+        else:
+            tracemalloc.start()
+            base, _ = tracemalloc.get_traced_memory()
+            rows = timed(data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            seconds = statistics.median(s for s, _ in recent) if recent else None
+            n = int(statistics.median(r for _, r in recent)) if recent else rows
+            results.append({
+                "path": name,
+                "history_hours": hour + 1,
+                "seconds": round(seconds, 4) if seconds is not None else None,
+                "rows": n,
+                "rows_per_s": round(n / seconds, 1) if seconds else None,
+                "alloc_peak_mb": round((peak - base) / (1024 * 1024), 2),
+                "peak_rss_mb": peak_rss_mb(),
+                "output_bytes": sum(p.stat().st_size for p in outputs if p.exists()),
+            })
+    matrix_cache.CACHE.close()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="수집기 저장 경로 벤치마크 (가상 이력)")
+    ap.add_argument("--hours", type=int, default=168, help="진행할 시간 수")
+    ap.add_argument("--checkpoints", default="24,72,168", help="기록할 이력 길이(시간), 쉼표 구분")
+    ap.add_argument("--samples", type=int, default=3, help="체크포인트마다 중앙값을 낼 직전 측정 횟수")
+    ap.add_argument("--paths", default=",".join(PATHS), help="측정할 경로, 쉼표 구분")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--categories", type=int, default=450, help="SOOP 카테고리 수")
+    ap.add_argument("--streamers", type=int, default=3000, help="SOOP 디테일 스트리머 풀 크기")
+    ap.add_argument("--chzzk-channels", type=int, default=5000, help="CHZZK 채널 풀 크기")
+    ap.add_argument("--chzzk-categories", type=int, default=300, help="CHZZK 카테고리 수")
+    ap.add_argument("--live-ratio", type=float, default=0.05, help="시간마다 방송 중인 비율")
+    ap.add_argument("--out", type=pathlib.Path, help="결과 JSON 경로 (없으면 stdout)")
+    ap.add_argument("--keep", action="store_true", help="임시 작업 폴더를 지우지 않음")
+    args = ap.parse_args(argv)
+
+    paths = [p for p in args.paths.split(",") if p]
+    unknown = sorted(set(paths) - set(STEPS))
+    if unknown:
+        ap.error(f"unknown paths: {', '.join(unknown)}")
+    checkpoints = sorted({int(c) for c in args.checkpoints.split(",") if c and int(c) <= args.hours} | {args.hours})
+    world_kw = dict(seed=args.seed, n_categories=args.categories, n_streamers=args.streamers,
+                    live_ratio=args.live_ratio, n_chzzk_channels=args.chzzk_channels,
+                    n_chzzk_categories=args.chzzk_categories)
+
+    results: List[Dict[str, Any]] = []
+    for name in paths:
+        workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+        t0 = time.time()
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                rows = pool.submit(run_path, name, args.hours, checkpoints, args.samples, world_kw, workdir).result()
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+        results.extend(rows)
+        last = rows[-1]
+        print(f"{name}: {last['seconds']}s/run at {last['history_hours']}h, "
+              f"alloc peak {last['alloc_peak_mb']} MB, rss {last['peak_rss_mb']} MB ({time.time() - t0:.0f}s)",
+              file=sys.stderr)
+
+    report = {
+        "created_at_utc": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {**vars(args), "out": str(args.out) if args.out else None, "checkpoints": checkpoints,
+                   "env": {k: os.environ[k] for k in ENV_KEYS if k in os.environ}},
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+        print("written ->", args.out, file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# bench/stubs.py
+# -*- coding: utf-8 -*-
+"""
+가상 API 응답 (네트워크 없음)
+- soop_payload(source, hour, params)  : sch.sooplive.co.kr/api.php 응답 JSON
+    m=categoryList / m=categoryContentsList, nPageNo·nListCnt로 자르고 data.is_more
+- chzzk_payload(source, hour, params) : openapi.chzzk.naver.com/open/v1/lives 응답 JSON
+    size로 자르고 content.page.next 커서 (마지막 페이지는 next 없음)
+  source는 soop_categories(hour) / soop_details(cate_no, hour) / chzzk_lives(hour)를 가진 객체
+  (synthetic.SyntheticWorld, mock_api.Recording)
+- StubAPI.get(url, **kw)             : http_client.get과 같은 모양으로 위 응답을 돌려줌
+- StubAPI.get_parsed(url, parse, **kw): http_client.get_parsed 대체 (parse(위 응답))
+  `with StubAPI(world).installed():` 안에서는 수집기의 fetch_* 가 네트워크 대신 가상 응답 사용
+"""
+
+from __future__ import annotations
+import contextlib
+import json
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import http_client
+from bench.synthetic import SyntheticWorld
+
+
+def _page(items, page_no: int, per: int):
+    lo = (page_no - 1) * per
+    return items[lo:lo + per], lo + per < len(items)
+
+
+def soop_payload(source: SyntheticWorld, hour: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    m = params.get("m")
+    page_no, per = int(params.get("nPageNo", 1)), int(params.get("nListCnt", 60))
+    if m == "categoryList":
+        items = source.soop_categories(hour)
+    elif m == "categoryContentsList":
+        items = source.soop_details(str(params.get("szCateNo", "")), hour)
+    else:
+        return {"result": -1, "message": f"unknown m={m}"}
+    page, is_more = _page(items, page_no, per)
+    return {"result": 1, "data": {"list": page, "is_more": is_more}}
+
+
+def chzzk_payload(source: SyntheticWorld, hour: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    size = int(params.get("size", 20))
+    offset = int(str(params.get("next") or "0").rsplit(":", 1)[-1])
+    items = source.chzzk_lives(hour)
+    page = items[offset:offset + size]
+    nxt = f"{hour}:{offset + size}" if offset + size < len(items) else None
+    return {"code": 200, "message": None, "content": {"data": page, "page": {"next": nxt}}}
+
+
+class FakeResponse:
+    def __init__(self, payload: Dict[str, Any], url: str):
+        self.url = url
+        self.status_code = 200
+        self.headers: Dict[str, str] = {"Content-Type": "application/json"}
+        self.content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class StubAPI:
+    """hour 속성이 가리키는 시간의 가상 응답을 돌려주는 http_client.get 대체 (요청 수/바이트 집계)"""
+
+    def __init__(self, world: SyntheticWorld, hour: int = 0):
+        self.world = world
+        self.hour = hour
+        self.requests = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> FakeResponse:
+        params = dict(params or {})
+        if urlsplit(url).path.endswith("/open/v1/lives"):
+            payload = chzzk_payload(self.world, self.hour, params)
+        else:
+            payload = soop_payload(self.world, self.hour, params)
+        r = FakeResponse(payload, url)
+        with self._lock:
+            self.requests += 1
+            self.bytes += len(r.content)
+        return r
+
+    def get_parsed(self, url: str, parse: Callable[[FakeResponse], Any], **kwargs) -> Any:
+        return parse(self.get(url, **kwargs))
+
+    @contextlib.contextmanager
+    def installed(self) -> Iterator["StubAPI"]:
+        original = http_client.get, http_client.get_parsed
+        http_client.get, http_client.get_parsed = self.get, self.get_parsed
+        try:
+            yield self
+        finally:
+            http_client.get, http_client.get_parsed = original
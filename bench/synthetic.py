@@ -0,0 +1,118 @@
+# bench/synthetic.py
+# -*- coding: utf-8 -*-
+"""
+가상 이력 생성기
+- SyntheticWorld(seed, ...)가 '시간 번호(hour)'마다 API 목록 항목(dict 리스트, 시청자순)을 돌려줌
+  · soop_categories(hour)          : m=categoryList 항목
+  · soop_details(cate_no, hour)    : m=categoryContentsList 항목
+  · chzzk_lives(hour)              : /open/v1/lives content.data 항목
+- 같은 (seed, hour)면 항상 같은 결과 → 버전 간 비교 가능
+- 시청자 수는 인기도(Zipf 꼴) × 시간대 주기 × 잡음, 스트리머는 풀에서 시간마다 일부만 방송
+  (방송은 몇 시간 이어지고, 제목/닉네임은 가끔 바뀜 → 실제 스냅샷처럼 반복이 많음)
+"""
+
+from __future__ import annotations
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def hour_ts(hour: int) -> datetime:
+    """시간 번호 → UTC 정시"""
+    return EPOCH + timedelta(hours=hour)
+
+
+def hour_iso(hour: int) -> str:
+    return hour_ts(hour).strftime("%Y-%m-%dT%H:00:00Z")
+
+
+class SyntheticWorld:
+    def __init__(self, seed: int = 0, n_categories: int = 450, n_streamers: int = 3000,
+                 live_ratio: float = 0.05, n_chzzk_channels: int = 5000, n_chzzk_categories: int = 300):
+        self.seed = seed
+        self.n_categories = n_categories
+        self.n_streamers = n_streamers
+        self.live_ratio = live_ratio
+        self.n_chzzk_channels = n_chzzk_channels
+        self.n_chzzk_categories = n_chzzk_categories
+
+        rng = np.random.default_rng(seed)
+        self.cat_popularity = 1.0 / np.arange(1, n_categories + 1) ** 1.1 * rng.uniform(0.5, 1.5, n_categories)
+        self.streamer_popularity = 1.0 / np.arange(1, n_streamers + 1) ** 0.9
+        self.chzzk_popularity = 1.0 / np.arange(1, n_chzzk_channels + 1) ** 0.9
+        self.chzzk_channel_cat = rng.integers(0, n_chzzk_categories, n_chzzk_channels)
+
+    def _rng(self, hour: int, salt: str) -> np.random.Generator:
+        return np.random.default_rng([self.seed, hour, zlib.crc32(salt.encode())])
+
+    @staticmethod
+    def _daily(hour: int) -> float:
+        # KST 저녁(UTC 12~14시)에 최대인 하루 주기
+        return 0.6 + 0.4 * np.cos((hour % 24 - 13) / 24 * 2 * np.pi)
+
+    def _live(self, hour: int, n: int, salt: str) -> np.ndarray:
+        """hour에 방송 중인 인덱스: 4시간 블록마다 정해지는 집합 (→ 연속된 시간의 스냅샷이 대부분 겹침)"""
+        block = self._rng(hour // 4, salt + ":live")
+        k = max(1, int(n * self.live_ratio))
+        return np.sort(block.choice(n, size=k, replace=False))
+
+    # ---- SOOP ----
+    def soop_categories(self, hour: int) -> List[Dict[str, Any]]:
+        rng = self._rng(hour, "soop:cat")
+        views = (self.cat_popularity * 2_000_000 * self._daily(hour) * rng.lognormal(0, 0.2, self.n_categories))
+        items = [{
+            "category_no": f"{i * 10:08d}",
+            "category_name": f"카테고리{i}",
+            "view_cnt": int(v),
+            "fixed_tags": [f"tag{i % 17}", f"tag{i % 5}"],
+            "cate_img": f"https://example.invalid/cate/{i}.png",
+        } for i, v in enumerate(views)]
+        return sorted(items, key=lambda x: -x["view_cnt"])
+
+    def soop_details(self, cate_no: str, hour: int) -> List[Dict[str, Any]]:
+        salt = f"soop:det:{cate_no}"
+        live = self._live(hour, self.n_streamers, salt)
+        rng = self._rng(hour, salt)
+        views = self.streamer_popularity[live] * 30_000 * self._daily(hour) * rng.lognormal(0, 0.3, len(live))
+        start = hour_ts(hour // 4 * 4)
+        items = [{
+            "broad_no": str(280_000_000 + (hour // 4) * 10_000 + int(i) % 10_000),
+            "broad_title": f"방송 제목 {int(i)}-{hour // (8 + int(i) % 5)}",  # 몇 시간마다 바뀜
+            "user_id": f"bj{int(i):05d}",
+            "user_nick": f"닉{int(i)}" + ("_" * ((hour // 500 + int(i)) % 3 == 0)),  # 가끔 닉네임 변경
+            "view_cnt": int(v),
+            "broad_start": start.strftime("%Y-%m-%d %H:%M:%S.0"),
+            "hash_tags": [f"h{int(i) % 11}", f"h{int(i) % 7}"],
+        } for i, v in zip(live, views)]
+        return sorted(items, key=lambda x: -x["view_cnt"])
+
+    # ---- CHZZK ----
+    def chzzk_lives(self, hour: int) -> List[Dict[str, Any]]:
+        salt = "chzzk:lives"
+        live = self._live(hour, self.n_chzzk_channels, salt)
+        rng = self._rng(hour, salt)
+        views = self.chzzk_popularity[live] * 50_000 * self._daily(hour) * rng.lognormal(0, 0.3, len(live))
+        items = []
+        for i, v in zip(live, views):
+            i = int(i)
+            cat = int(self.chzzk_channel_cat[i])
+            items.append({
+                "liveId": 10_000_000 + (hour // 4) * 10_000 + i % 10_000,
+                "liveTitle": f"라이브 {i}",
+                "liveThumbnailImageUrl": f"https://example.invalid/live/{i}.jpg",
+                "concurrentUserCount": int(v),
+                "openDate": hour_ts(hour // 4 * 4).strftime("%Y-%m-%d %H:%M:%S"),
+                "adult": False,
+                "tags": [f"t{i % 9}"],
+                "categoryType": "GAME" if cat % 3 else "ETC",
+                "liveCategory": f"cat_{cat}",
+                "liveCategoryValue": f"카테고리 {cat}",
+                "channelId": f"{i:032x}",
+                "channelName": f"채널{i}",
+                "channelImageUrl": f"https://example.invalid/ch/{i}.png",
+            })
+        return sorted(items, key=lambda x: -x["concurrentUserCount"])
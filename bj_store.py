@@ -0,0 +1,241 @@
+# bj_store.py
+# -*- coding: utf-8 -*-
+"""
+카테고리별 BJ 마스터 키-값 스토어 (SQLite, user_id 기본키)
+- 파일: data/soop/details/<cat>/bj_master.sqlite
+    bj            user_id(PK), user_nick(최신), first_seen, last_seen
+    nick_history  (user_id, user_nick)(PK), first_seen, last_seen
+- upsert는 이번 스냅샷의 BJ 행만 건드림 (기존 행 전체를 읽거나 다시 쓰지 않음)
+  · first_seen = 기존/새 값 중 이른 시각, last_seen = 늦은 시각
+  · user_nick은 last_seen이 같거나 늦은 쪽 닉네임
+- bj_master.sqlite는 저장소에 올리지 않는 작업 사본 (.gitignore, 워크플로는 actions/cache로 실행 사이에 유지)
+  저장소에 남는 텍스트 원본:
+    bj_master.csv         bj 테이블 (마지막 압축 시점)
+    bj_nick_history.csv   nick_history 테이블 (마지막 압축 시점)
+    bj_master.log.csv     그 뒤 upsert한 행 (append-only, 실행마다 이번 스냅샷 행만 덧붙임, log=True)
+  · 열 때 텍스트 중 아직 반영하지 않은 부분만 반영 (meta 테이블에 반영한 파일 크기 기록)
+    - bj_master.csv 크기가 달라졌으면(처음 열었거나 다른 곳에서 압축됨) 두 CSV + 로그 전체
+    - 아니면 로그의 반영 안 한 꼬리만 → 캐시가 살아 있으면 비용 O(스냅샷)
+    (upsert는 MIN/MAX라 같은 행을 다시 반영해도 결과가 같음, bj_nick_history.csv가 없으면 bj_master.csv로 이력 시작)
+  · compact(): 로그가 bj_master.csv보다 커지면 두 CSV를 다시 쓰고 로그를 비움 (전체 재기록은 분할 상환 O(스냅샷))
+  · 전체 최신 내용은 load() (sqlite 기준)
+
+사용:
+  python bj_store.py export   # 모든 카테고리 bj_master.sqlite → bj_master.csv, bj_nick_history.csv (로그 비움)
+"""
+
+from __future__ import annotations
+import io
+import pathlib
+import sqlite3
+import sys
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+import atomic_io
+
+BJ_COLS = ["user_id", "user_nick", "first_seen", "last_seen"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bj (
+    user_id    TEXT PRIMARY KEY,
+    user_nick  TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nick_history (
+    user_id    TEXT NOT NULL,
+    user_nick  TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen  TEXT NOT NULL,
+    PRIMARY KEY (user_id, user_nick)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+UPSERT_BJ = """
+INSERT INTO bj (user_id, user_nick, first_seen, last_seen) VALUES (?, ?, ?, ?)
+ON CONFLICT(user_id) DO UPDATE SET
+    user_nick  = CASE WHEN excluded.last_seen >= bj.last_seen THEN excluded.user_nick ELSE bj.user_nick END,
+    first_seen = MIN(bj.first_seen, excluded.first_seen),
+    last_seen  = MAX(bj.last_seen, excluded.last_seen)
+"""
+
+UPSERT_HISTORY = """
+INSERT INTO nick_history (user_id, user_nick, first_seen, last_seen) VALUES (?, ?, ?, ?)
+ON CONFLICT(user_id, user_nick) DO UPDATE SET
+    first_seen = MIN(nick_history.first_seen, excluded.first_seen),
+    last_seen  = MAX(nick_history.last_seen, excluded.last_seen)
+"""
+
+
+def db_path(cdir: pathlib.Path) -> pathlib.Path:
+    return pathlib.Path(cdir) / "bj_master.sqlite"
+
+
+def master_csv_path(cdir: pathlib.Path) -> pathlib.Path:
+    return pathlib.Path(cdir) / "bj_master.csv"
+
+
+def history_csv_path(cdir: pathlib.Path) -> pathlib.Path:
+    return pathlib.Path(cdir) / "bj_nick_history.csv"
+
+
+def log_path(cdir: pathlib.Path) -> pathlib.Path:
+    return pathlib.Path(cdir) / "bj_master.log.csv"
+
+
+def _size(path: pathlib.Path) -> int:
+    return path.stat().st_size if path.exists() else 0
+
+
+def _read_rows(path: pathlib.Path, offset: int = 0) -> List[Tuple[str, str, str, str]]:
+    """
+    CSV(export/로그) → (user_id, user_nick, first_seen, last_seen) 행 (없거나 열이 다르면 빈 목록).
+    offset > 0이면 그 바이트부터 (헤더 없는 로그 꼬리)
+    """
+    if not path.exists():
+        return []
+    if offset:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+        m = pd.read_csv(io.BytesIO(tail), header=None, names=BJ_COLS, dtype=str, keep_default_na=False)
+    else:
+        m = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+        if not set(BJ_COLS).issubset(m.columns):
+            return []
+    return list(m[BJ_COLS].itertuples(index=False, name=None))
+
+
+def _set_meta(con: sqlite3.Connection, **values: int) -> None:
+    con.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [(k, str(v)) for k, v in values.items()])
+
+
+def _sync_text(con: sqlite3.Connection, cdir: pathlib.Path) -> None:
+    """텍스트 원본(두 CSV + 로그) 중 아직 반영하지 않은 부분을 반영"""
+    meta = dict(con.execute("SELECT key, value FROM meta"))
+    base_size, log_size = _size(master_csv_path(cdir)), _size(log_path(cdir))
+    seen_log = int(meta.get("log_size", 0))
+    if int(meta.get("base_size", -1)) != base_size or log_size < seen_log:
+        rows = _read_rows(master_csv_path(cdir))
+        history = _read_rows(history_csv_path(cdir)) or rows
+        seen_log = 0
+    else:
+        rows, history = [], []
+        if log_size == seen_log:
+            return
+    tail = _read_rows(log_path(cdir), seen_log)
+    with con:
+        con.executemany(UPSERT_BJ, rows + tail)
+        con.executemany(UPSERT_HISTORY, history + tail)
+        _set_meta(con, base_size=base_size, log_size=log_size)
+
+
+def connect(cdir: pathlib.Path) -> sqlite3.Connection:
+    """스토어 열기 (없으면 생성, 텍스트 원본에서 아직 반영하지 않은 부분 반영)"""
+    path = db_path(cdir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path)
+    con.executescript(SCHEMA)
+    _sync_text(con, cdir)
+    return con
+
+
+def upsert(cdir: pathlib.Path, rows: Iterable[Tuple[str, str, str, str]], log: bool = False) -> int:
+    """
+    (user_id, user_nick, first_seen, last_seen) 행 upsert, 한 트랜잭션.
+    log=True면 같은 행을 bj_master.log.csv 끝에 덧붙임 (텍스트 원본 유지).
+    반환: 반영한 행 수
+    """
+    rows = list(rows)
+    con = connect(cdir)
+    try:
+        with con:
+            con.executemany(UPSERT_BJ, rows)
+            con.executemany(UPSERT_HISTORY, rows)
+        if log and rows:
+            atomic_io.append_csv(pd.DataFrame(rows, columns=BJ_COLS), log_path(cdir), index=False)
+            with con:
+                _set_meta(con, log_size=_size(log_path(cdir)))
+    finally:
+        con.close()
+    return len(rows)
+
+
+def upsert_snapshot(cdir: pathlib.Path, users: pd.DataFrame, hour: str, log: bool = False) -> int:
+    """스냅샷의 user_id/user_nick(같은 user_id는 마지막 행)을 hour 시각으로 upsert"""
+    snap = users[["user_id", "user_nick"]].astype(str).drop_duplicates(subset=["user_id"], keep="last")
+    return upsert(cdir, ((uid, nick, hour, hour) for uid, nick in snap.itertuples(index=False)), log=log)
+
+
+def replace_all(cdir: pathlib.Path, bj: pd.DataFrame, history: pd.DataFrame) -> None:
+    """전체 재생성(backfill)용: 두 테이블을 주어진 내용으로 교체"""
+    con = connect(cdir)
+    try:
+        with con:
+            con.execute("DELETE FROM bj")
+            con.execute("DELETE FROM nick_history")
+            con.executemany(UPSERT_BJ, bj[BJ_COLS].astype(str).itertuples(index=False, name=None))
+            con.executemany(UPSERT_HISTORY, history[BJ_COLS].astype(str).itertuples(index=False, name=None))
+    finally:
+        con.close()
+
+
+def load(cdir: pathlib.Path) -> pd.DataFrame:
+    con = connect(cdir)
+    try:
+        return pd.read_sql_query("SELECT user_id, user_nick, first_seen, last_seen FROM bj ORDER BY user_id", con)
+    finally:
+        con.close()
+
+
+def nick_history(cdir: pathlib.Path, user_id: str) -> pd.DataFrame:
+    con = connect(cdir)
+    try:
+        return pd.read_sql_query(
+            "SELECT user_nick, first_seen, last_seen FROM nick_history WHERE user_id = ? ORDER BY first_seen",
+            con, params=(user_id,))
+    finally:
+        con.close()
+
+
+def export(cdir: pathlib.Path) -> pathlib.Path:
+    """
+    bj 테이블 → bj_master.csv (기존과 같은 열/정렬), nick_history → bj_nick_history.csv, 로그 비움
+    (두 CSV가 로그 내용까지 담으므로 로그는 삭제)
+    """
+    out = master_csv_path(cdir)
+    con = connect(cdir)
+    try:
+        bj = pd.read_sql_query("SELECT user_id, user_nick, first_seen, last_seen FROM bj ORDER BY user_id", con)
+        history = pd.read_sql_query(
+            "SELECT user_id, user_nick, first_seen, last_seen FROM nick_history ORDER BY user_id, first_seen, user_nick",
+            con)
+        atomic_io.write_csv(history, history_csv_path(cdir), index=False)
+        atomic_io.write_csv(bj, out, index=False)
+        log_path(cdir).unlink(missing_ok=True)
+        with con:
+            _set_meta(con, base_size=_size(out), log_size=0)
+    finally:
+        con.close()
+    return out
+
+
+def compact(cdir: pathlib.Path) -> Optional[pathlib.Path]:
+    """로그가 bj_master.csv보다 커졌으면 export()로 접어넣음 (전체 재기록 횟수를 로그 증가에 비례하게 제한)"""
+    if _size(log_path(cdir)) <= max(_size(master_csv_path(cdir)), 1):
+        return None
+    return export(cdir)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["export"]:
+        raise SystemExit("usage: python bj_store.py export")
+    for db in sorted(pathlib.Path("data/soop/details").glob("*/bj_master.sqlite")):
+        print("written ->", export(db.parent))
@@ -0,0 +1,318 @@
+# category_index.py
+# -*- coding: utf-8 -*-
+"""
+SOOP 카테고리 시계열 인덱스 + 조회 API
+- 원본: long 스토어(category_store, data/soop/categories_store/YYYY/MM/DD.csv.gz)
+- 인덱스: data/soop/categories_index/
+    meta.json         categories([category_no, category_name] 목록, 위치 = 행 번호),
+                      start_hour + n_hours(열 j = start_hour + j시간, 연속), through_day(마지막으로 반영한 일 파일)
+    by_category.npy   int64 (카테고리 × 시간), 결측 -1  → 한 카테고리의 기간 조회는 행 하나만 읽음
+    by_hour.npy       int64 (시간 × 카테고리), 결측 -1  → 한 시각의 top-N은 행 하나만 읽음
+  두 배열은 np.load(mmap_mode="r")로 열어서 필요한 구간만 디스크에서 읽음
+  배열은 메타보다 큰 여유 용량(HOUR_CHUNK 시간, CAT_CHUNK 카테고리 단위)을 가짐 → 유효 범위는 메타 기준
+- 갱신은 증분: through_day 이후(당일 포함) 일 파일만 다시 읽어 새 셀만 제자리 기록 (같은 셀은 나중 값 우선)
+  메타는 배열 다음에 기록, 읽을 때 배열 모양이 메타와 맞지 않으면 처음부터 다시 생성
+- collect_categories는 UPDATE_CATEGORY_INDEX="true"면 매 실행 뒤 인덱스 갱신
+
+사용:
+  python category_index.py build                                   # 인덱스 생성/증분 갱신
+  python category_index.py series 00040070 --start 2025-08-01 --end 2025-08-31
+  python category_index.py top -n 20                               # 최신 시각 top 20
+  python category_index.py top -n 20 --hour 2025-08-26T11
+  python category_index.py top -n 20 --start 2025-08-01 --end 2025-08-31 --how mean
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import pathlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import atomic_io
+import category_store
+
+INDEX_ROOT = pathlib.Path("data/soop/categories_index")
+MISSING = -1
+
+
+HOUR_CHUNK = 24 * 30  # 시간 축 여유 용량 단위 (이 만큼 찰 때마다 배열을 한 번 다시 씀)
+CAT_CHUNK = 256       # 카테고리 축 여유 용량 단위
+
+
+def _paths(root: pathlib.Path) -> Tuple[pathlib.Path, pathlib.Path, pathlib.Path]:
+    return root / "meta.json", root / "by_category.npy", root / "by_hour.npy"
+
+
+def _hour_key(s: str, upper: bool = False) -> str:
+    """'YYYY-MM-DD' / 'YYYY-MM-DDTHH' / 전체 시각 → 'YYYY-MM-DDTHH:00:00Z' (날짜만이면 upper=True일 때 그날 23시)"""
+    s = s.strip()
+    if len(s) <= 10:
+        return f"{s[:10]}T{'23' if upper else '00'}:00:00Z"
+    return f"{s[:13]}:00:00Z"
+
+
+def _hour_num(keys) -> np.ndarray:
+    """'YYYY-MM-DDTHH:00:00Z' 배열 → datetime64[h]"""
+    return np.asarray([k[:13] for k in keys], dtype="datetime64[h]")
+
+
+def hour_labels(start_hour: str, n_hours: int) -> np.ndarray:
+    """start_hour부터 n_hours개 연속 시간 키"""
+    hrs = np.datetime64(start_hour[:13], "h") + np.arange(n_hours)
+    return np.asarray([f"{h}:00:00Z" for h in hrs.astype(str)])
+
+
+def _round_up(n: int, chunk: int) -> int:
+    return max(chunk, -(-n // chunk) * chunk)
+
+
+def _array_shapes(cat_path: pathlib.Path, hour_path: pathlib.Path) -> Optional[Tuple[int, int]]:
+    """두 배열의 (카테고리 용량, 시간 용량). 없거나 서로 맞지 않으면 None"""
+    try:
+        a = np.load(cat_path, mmap_mode="r").shape
+        b = np.load(hour_path, mmap_mode="r").shape
+    except (OSError, ValueError):
+        return None
+    return a if len(a) == 2 and b == a[::-1] else None
+
+
+def _load_meta(root: pathlib.Path) -> Optional[dict]:
+    """
+    메타 + 배열 모양 확인. 증분 갱신할 수 없으면(없음/예전 형식/배열이 메타보다 작음) None.
+    배열은 메타보다 먼저 기록되므로 메타보다 큰 것은 정상 (용량 증설 뒤 메타 기록 전에 멈춘 경우).
+    """
+    meta_path, cat_path, hour_path = _paths(root)
+    if not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if "start_hour" not in meta:
+        return None  # 예전 형식(hours 목록) → 한 번 다시 생성
+    shape = _array_shapes(cat_path, hour_path)
+    if shape is None or shape[0] < len(meta["categories"]) or shape[1] < meta["n_hours"]:
+        print(f"[category_index] arrays do not match {meta_path}; rebuilding")
+        return None
+    return meta
+
+
+def _grow(cat_path: pathlib.Path, hour_path: pathlib.Path, n_cats: int, n_hours: int) -> None:
+    """배열 용량이 (n_cats, n_hours)보다 작으면 여유를 두고 키워서 다시 씀 (위치는 그대로)"""
+    shape = _array_shapes(cat_path, hour_path) or (0, 0)
+    if shape[0] >= n_cats and shape[1] >= n_hours:
+        return
+    cap = (max(shape[0], _round_up(n_cats, CAT_CHUNK)), max(shape[1], _round_up(n_hours, HOUR_CHUNK)))
+    grown = np.full(cap, MISSING, dtype=np.int64)
+    if shape[0] and shape[1]:
+        grown[: shape[0], : shape[1]] = np.load(cat_path, mmap_mode="r")
+    with atomic_io.atomic_open(cat_path, "wb") as f:
+        np.save(f, grown)
+    with atomic_io.atomic_open(hour_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(grown.T))
+
+
+# ======================
+# 생성 / 증분 갱신
+# ======================
+def build(root: pathlib.Path = INDEX_ROOT, full: bool = False) -> int:
+    """
+    스토어 → 인덱스 반영. full=True면 처음부터 다시 생성.
+    - 시간 축은 start_hour부터 연속(빈 시각은 -1), 배열은 HOUR_CHUNK/CAT_CHUNK 단위로 여유 용량
+      → 보통 실행은 새 셀만 memmap으로 제자리 기록 (이력 길이와 무관), 용량이 찰 때만 배열을 다시 씀
+    - 기록 순서: 배열(용량 증설 → 셀) → 메타. 셀 기록은 같은 값 덮어쓰기라 중간에 죽어도 다음 실행이 복구
+    반환: 반영한 long 행 수
+    """
+    root = pathlib.Path(root)
+    meta_path, cat_path, hour_path = _paths(root)
+    category_store.import_wide_csv()  # 스토어가 비어 있으면 기존 와이드 매트릭스 이관
+
+    meta = None if full else _load_meta(root)
+    if meta is None:
+        categories: List[List[str]] = []
+        start_hour, n_hours, since = None, 0, None
+        for p in (cat_path, hour_path):
+            p.unlink(missing_ok=True)
+    else:
+        categories, since = meta["categories"], meta["through_day"]
+        start_hour, n_hours = meta["start_hour"], meta["n_hours"]
+
+    files = list(category_store.iter_day_files(start=since))
+    if not files:
+        return 0
+    df = category_store.load_long(start=since)
+    if df.empty:
+        return 0
+
+    first = df["captured_hour"].min()
+    if start_hour is not None and first < start_hour:
+        return build(root, full=True)  # 시작 시각보다 과거 행(백필) → 처음부터
+    if start_hour is None:
+        start_hour = first
+
+    # 새 카테고리는 뒤에 추가, 이름은 최신 값으로
+    n_cats_before, n_hours_before = len(categories), n_hours
+    cat_pos: Dict[str, int] = {no: i for i, (no, _) in enumerate(categories)}
+    for no, name in df.drop_duplicates("category_no", keep="last")[["category_no", "category_name"]].itertuples(index=False):
+        if no in cat_pos:
+            categories[cat_pos[no]][1] = name
+        else:
+            cat_pos[no] = len(categories)
+            categories.append([no, name])
+
+    ri = df["category_no"].map(cat_pos).to_numpy()
+    ci = (_hour_num(df["captured_hour"].to_numpy()) - np.datetime64(start_hour[:13], "h")).astype(np.int64)
+    n_hours = max(n_hours, int(ci.max()) + 1)
+    vals = df["view_cnt"].to_numpy(dtype=np.int64)  # load_long이 이미 keep-last
+
+    root.mkdir(parents=True, exist_ok=True)
+    _grow(cat_path, hour_path, len(categories), n_hours)
+    for path, by_cat in ((cat_path, True), (hour_path, False)):
+        with atomic_io.file_lock(path):
+            arr = np.lib.format.open_memmap(path, mode="r+")
+            view = arr if by_cat else arr.T
+            # 메타에 없던 행/열은 먼저 비움 (메타 기록 전에 멈춘 실행이 남긴 셀 제거)
+            # (그보다 뒤의 여유 용량은 나중에 범위가 늘어날 때 같은 방식으로 비워짐)
+            view[n_cats_before:len(categories), :n_hours] = MISSING
+            view[:len(categories), n_hours_before:n_hours] = MISSING
+            view[ri, ci] = vals
+            arr.flush()
+            del arr, view
+
+    last = files[-1]
+    meta = {
+        "categories": categories,
+        "start_hour": start_hour,
+        "n_hours": n_hours,
+        "through_day": f"{last.parent.parent.name}-{last.parent.name}-{last.name[:2]}",
+    }
+    atomic_io.write_text(meta_path, json.dumps(meta, ensure_ascii=False))  # 배열 기록 후 메타
+    return len(df)
+
+
+# ======================
+# 조회
+# ======================
+class CategoryIndex:
+    """인덱스 읽기 전용 핸들. 대시보드처럼 조회가 많으면 하나를 만들어 재사용."""
+
+    def __init__(self, root: pathlib.Path = INDEX_ROOT):
+        meta_path, cat_path, hour_path = _paths(pathlib.Path(root))
+        if not meta_path.exists():
+            raise FileNotFoundError(f"{meta_path} 없음 (python category_index.py build 먼저 실행)")
+        meta = _load_meta(pathlib.Path(root))
+        if meta is None:
+            raise ValueError(f"{meta_path}와 배열이 맞지 않음 (python category_index.py build 다시 실행)")
+        n_cats, n_hours = len(meta["categories"]), meta["n_hours"]
+        self.category_no = [no for no, _ in meta["categories"]]
+        self.category_name = [name for _, name in meta["categories"]]
+        self.pos = {no: i for i, no in enumerate(self.category_no)}
+        self.hours = hour_labels(meta["start_hour"], n_hours)
+        # 여유 용량 부분은 잘라서 노출
+        self.by_category = np.load(cat_path, mmap_mode="r")[:n_cats, :n_hours]
+        self.by_hour = np.load(hour_path, mmap_mode="r")[:n_hours, :n_cats]
+
+    def _span(self, start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+        lo = np.searchsorted(self.hours, _hour_key(start), "left") if start else 0
+        hi = np.searchsorted(self.hours, _hour_key(end, upper=True), "right") if end else len(self.hours)
+        return int(lo), int(hi)
+
+    def resolve(self, category: str) -> int:
+        """category_no(앞자리 0 생략 가능) 또는 정확한 카테고리명 → 행 번호"""
+        key = str(category)
+        if key.isdigit() and key.zfill(8) in self.pos:
+            return self.pos[key.zfill(8)]
+        if key in self.category_name:
+            return len(self.category_name) - 1 - self.category_name[::-1].index(key)
+        raise KeyError(f"unknown category: {category}")
+
+    def series(self, category: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.Series:
+        """한 카테고리의 view_cnt 시계열 (index=captured_hour, 결측 시각 제외)"""
+        i = self.resolve(category)
+        lo, hi = self._span(start, end)
+        row = np.asarray(self.by_category[i, lo:hi])
+        keep = row != MISSING
+        return pd.Series(row[keep], index=pd.Index(self.hours[lo:hi][keep], name="captured_hour"),
+                         name=self.category_no[i], dtype="int64")
+
+    def top(self, n: int = 10, hour: Optional[str] = None) -> pd.DataFrame:
+        """한 시각(기본: 최신)의 view_cnt 상위 n개"""
+        if not len(self.hours):
+            return pd.DataFrame(columns=["captured_hour", "category_no", "category_name", "view_cnt"])
+        j = len(self.hours) - 1 if hour is None else int(np.searchsorted(self.hours, _hour_key(hour)))
+        if j >= len(self.hours) or (hour is not None and self.hours[j] != _hour_key(hour)):
+            raise KeyError(f"hour not indexed: {hour}")
+        row = np.asarray(self.by_hour[j])
+        if hour is not None and not (row != MISSING).any():
+            raise KeyError(f"hour not indexed: {hour}")
+        out = self._ranked(row, row != MISSING, n, "view_cnt").drop(columns="_pos")
+        out.insert(0, "captured_hour", self.hours[j])
+        return out
+
+    def top_range(self, n: int = 10, start: Optional[str] = None, end: Optional[str] = None,
+                  how: str = "mean") -> pd.DataFrame:
+        """기간 내 집계(mean/max/sum, 결측 시각 제외) 상위 n개"""
+        lo, hi = self._span(start, end)
+        block = np.asarray(self.by_hour[lo:hi])
+        present = block != MISSING
+        cnt = present.sum(axis=0)
+        filled = np.where(present, block, 0)
+        if how == "sum":
+            score = filled.sum(axis=0).astype("float64")
+        elif how == "max":
+            score = np.where(present, block, MISSING).max(axis=0, initial=MISSING).astype("float64")
+        elif how == "mean":
+            score = filled.sum(axis=0) / np.maximum(cnt, 1)
+        else:
+            raise ValueError(f"how must be mean/max/sum: {how}")
+        out = self._ranked(score, cnt > 0, n, f"view_cnt_{how}")
+        out["hours"] = cnt[out.pop("_pos").to_numpy(dtype=np.intp)]
+        return out
+
+    def _ranked(self, score: np.ndarray, valid: np.ndarray, n: int, col: str) -> pd.DataFrame:
+        idx = np.flatnonzero(valid)
+        # 값 내림차순, 같으면 category_no 오름차순(행 번호와 무관하게 결정적)
+        order = sorted(idx, key=lambda i: (-score[i], self.category_no[i]))[:n]
+        return pd.DataFrame({
+            "category_no": [self.category_no[i] for i in order],
+            "category_name": [self.category_name[i] for i in order],
+            col: [score[i] for i in order],
+            "_pos": order,
+        })
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="SOOP 카테고리 시계열 인덱스/조회")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="인덱스 생성/증분 갱신")
+    b.add_argument("--full", action="store_true", help="처음부터 다시 생성")
+    s = sub.add_parser("series", help="카테고리 기간 시계열")
+    s.add_argument("category", help="category_no 또는 카테고리명")
+    s.add_argument("--start")
+    s.add_argument("--end")
+    t = sub.add_parser("top", help="top-N (시각 하나 또는 기간 집계)")
+    t.add_argument("-n", type=int, default=10)
+    t.add_argument("--hour", help="YYYY-MM-DDTHH (기본: 최신)")
+    t.add_argument("--start")
+    t.add_argument("--end")
+    t.add_argument("--how", choices=["mean", "max", "sum"], default="mean")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        n = build(full=args.full)
+        print(f"indexed {n} rows -> {INDEX_ROOT}")
+        return
+    idx = CategoryIndex()
+    if args.cmd == "series":
+        print(idx.series(args.category, args.start, args.end).to_string())
+    elif args.start or args.end:
+        print(idx.top_range(args.n, args.start, args.end, args.how).to_string(index=False))
+    else:
+        print(idx.top(args.n, args.hour).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# category_store.py
+# -*- coding: utf-8 -*-
+"""
+SOOP 카테고리 long 스토어 (시간 파티션, append-only)
+- 일 단위 파일: data/soop/categories_store/YYYY/MM/DD.csv.gz
+  열: captured_hour, category_no, category_name, view_cnt
+- 매 실행은 새 스냅샷 행만 gzip 멤버 하나로 append → 작업량 O(스냅샷), 과거 이력은 다시 읽지 않음
+  (gzip은 멤버 이어붙이기를 허용하므로 기존 바이트는 건드리지 않음)
+- 와이드 매트릭스(categories_matrix.csv)는 수집기가 매 실행 이번 시각 열만 upsert
+  build_wide()/write_wide()는 스토어 전체에서 다시 만드는 용도 (백필/복구, 매시 실행에는 쓰지 않음)
+- 같은 시간/카테고리가 여러 번 기록되면 읽을 때 '마지막 값' 우선
+- 추가 도중 죽어서 끝에 잘린 멤버가 남으면: 읽기는 완결된 멤버만 사용, 다음 추가가 잘린 부분을 먼저 잘라냄
+
+사용:
+  python category_store.py   # 스토어 → data/soop/categories_matrix.csv 전체 재생성 (복구용)
+"""
+
+from __future__ import annotations
+import gzip
+import io
+import os
+import pathlib
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+import atomic_io
+
+STORE_ROOT = pathlib.Path("data/soop/categories_store")
+WIDE_CSV = pathlib.Path("data/soop/categories_matrix.csv")
+
+COLUMNS = ["captured_hour", "category_no", "category_name", "view_cnt"]
+KEY_COLS = ["category_no", "category_name"]
+HOUR_FMT = "%Y-%m-%dT%H:00:00Z"
+_GZIP_MAGIC = b"\x1f\x8b\x08"
+
+
+# ======================
+# 경로
+# ======================
+def day_path(hour_iso: str) -> pathlib.Path:
+    """'YYYY-MM-DDTHH:00:00Z' → STORE_ROOT/YYYY/MM/DD.csv.gz"""
+    return STORE_ROOT / hour_iso[0:4] / hour_iso[5:7] / f"{hour_iso[8:10]}.csv.gz"
+
+
+def iter_day_files(start: Optional[str] = None, end: Optional[str] = None) -> Iterator[pathlib.Path]:
+    """
+    일 파일을 날짜 오름차순으로 순회.
+    start/end는 'YYYY-MM-DD...' 형태 문자열(앞 10자리만 사용), 양끝 포함.
+    """
+    lo = start[:10] if start else None
+    hi = end[:10] if end else None
+    for path in sorted(STORE_ROOT.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9].csv.gz")):
+        day = f"{path.parent.parent.name}-{path.parent.name}-{path.name[:2]}"
+        if lo and day < lo:
+            continue
+        if hi and day > hi:
+            continue
+        yield path
+
+
+def is_empty() -> bool:
+    return next(iter_day_files(), None) is None
+
+
+def _scan_members(data: bytes) -> Tuple[List[bytes], int]:
+    """
+    이어붙인 gzip 멤버들 → (완결된 멤버의 압축 해제 내용 목록, 마지막 완결 멤버의 끝 위치)
+    - 끝이 잘린 멤버(추가 도중 프로세스 종료)는 버림
+    - 중간의 깨진 바이트는 다음 gzip 시그니처까지 건너뜀 (그 뒤의 정상 멤버는 살림)
+    """
+    chunks: List[bytes] = []
+    pos = good_end = 0
+    while pos < len(data):
+        d = zlib.decompressobj(wbits=31)
+        try:
+            out = d.decompress(data[pos:])
+        except zlib.error:
+            nxt = data.find(_GZIP_MAGIC, pos + 1)
+            if nxt < 0:
+                break
+            pos = nxt
+            continue
+        if not d.eof:
+            break
+        chunks.append(out)
+        pos = good_end = len(data) - len(d.unused_data)
+    return chunks, good_end
+
+
+def _read_day(path: pathlib.Path) -> pd.DataFrame:
+    """일 파일 → DataFrame (완결된 멤버만, 헤더 줄은 첫 멤버 유무와 관계없이 처리)"""
+    chunks, _ = _scan_members(path.read_bytes())
+    if not chunks:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.read_csv(io.BytesIO(b"".join(chunks)), header=None, names=COLUMNS, dtype=str,
+                     keep_default_na=False)
+    return df[df["captured_hour"] != "captured_hour"]
+
+
+def _append_member(path: pathlib.Path, part: pd.DataFrame) -> None:
+    """
+    part를 CSV로 직렬화해 gzip 멤버 하나로 path 끝에 덧붙임(헤더는 파일 첫 멤버에만)
+    - 잠금 안에서: 끝에 잘린 멤버가 있으면 마지막 완결 멤버 끝으로 잘라낸 뒤 헤더 여부를 정하고 기록
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_io.file_lock(path):
+        with open(path, "a+b") as f:
+            f.seek(0)
+            _, good_end = _scan_members(f.read())
+            if good_end < f.tell():
+                f.truncate(good_end)
+            text = part[COLUMNS].to_csv(index=False, header=good_end == 0)
+            f.seek(0, os.SEEK_END)
+            f.write(gzip.compress(text.encode("utf-8"), mtime=0))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# ======================
+# 쓰기
+# ======================
+def normalize_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """수집 스냅샷(captured_at_utc 포함) → 스토어 열 구성으로 정규화"""
+    out = pd.DataFrame({
+        "captured_hour": pd.to_datetime(df["captured_at_utc"], utc=True).dt.floor("h").dt.strftime(HOUR_FMT),
+        "category_no": df["category_no"].astype(str).str.zfill(8),
+        "category_name": df["category_name"].astype(str),
+        "view_cnt": pd.to_numeric(df["view_cnt"], errors="coerce").fillna(0).astype("int64"),
+    })
+    return out
+
+
+def append_snapshot(df: pd.DataFrame) -> List[pathlib.Path]:
+    """
+    스냅샷 행만 해당 일 파일에 append.
+    (스냅샷 하나는 보통 한 시간이지만, 혹시 여러 시간이 섞여 있어도 일 단위로 나눠 씀)
+    """
+    rows = normalize_snapshot(df)
+    written: List[pathlib.Path] = []
+    for hour, part in rows.groupby("captured_hour", sort=True):
+        path = day_path(hour)
+        _append_member(path, part)
+        if path not in written:
+            written.append(path)
+    return written
+
+
+def import_wide_csv(path: pathlib.Path = WIDE_CSV) -> int:
+    """
+    기존 와이드 매트릭스를 long 스토어로 1회 이관(스토어가 비어 있을 때만).
+    반환: 이관한 행 수
+    """
+    if not path.exists() or not is_empty():
+        return 0
+    wide = pd.read_csv(path, dtype={"category_no": str, "category_name": str})
+    if not set(KEY_COLS).issubset(wide.columns):
+        return 0
+    wide["category_no"] = wide["category_no"].astype(str).str.zfill(8)
+    wide["category_name"] = wide["category_name"].fillna("").astype(str)
+    long = wide.melt(id_vars=KEY_COLS, var_name="captured_hour", value_name="view_cnt")
+    long = long.dropna(subset=["view_cnt"])
+    long["view_cnt"] = pd.to_numeric(long["view_cnt"], errors="coerce").fillna(0).astype("int64")
+    long = long.sort_values(["captured_hour", "category_no"], kind="stable")
+    for hour_day, part in long.groupby(long["captured_hour"].str[:10], sort=True):
+        _append_member(day_path(f"{hour_day}T00:00:00Z"), part)
+    return len(long)
+
+
+def replace_days(rows: pd.DataFrame) -> List[pathlib.Path]:
+    """
+    rows(스토어 열)에 나오는 날짜의 일 파일을 rows 내용으로 통째로 교체 (백필용).
+    - 일 파일마다 gzip 멤버 하나로 새로 써서 원자적 교체 (기존 멤버/잘린 꼬리 모두 정리)
+    - rows에 없는 날짜의 일 파일은 그대로 둠
+    """
+    rows = rows[COLUMNS].sort_values("captured_hour", kind="stable")
+    written: List[pathlib.Path] = []
+    for day, part in rows.groupby(rows["captured_hour"].str[:10], sort=True):
+        path = day_path(f"{day}T00:00:00Z")
+        text = part.to_csv(index=False)
+        with atomic_io.atomic_open(path, "wb") as f:
+            f.write(gzip.compress(text.encode("utf-8"), mtime=0))
+        written.append(path)
+    return written
+
+
+# ======================
+# 읽기 / 와이드 뷰
+# ======================
+def iter_days(start: Optional[str] = None, end: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    일 파일 단위 long 행 (날짜 오름차순, view_cnt int64).
+    같은 (captured_hour, category_no)는 일 파일 안에서 마지막 값만 유지 → 시간은 하루에만 속하므로 전체로도 같음.
+    """
+    for path in iter_day_files(start, end):
+        df = _read_day(path)
+        df["view_cnt"] = pd.to_numeric(df["view_cnt"], errors="coerce").fillna(0).astype("int64")
+        yield df.drop_duplicates(subset=["captured_hour", "category_no"], keep="last")
+
+
+def load_long(start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """
+    기간 내 long 행 로드. 같은 (captured_hour, category_no)는 마지막 값만 유지.
+    start/end가 시각 문자열이면 시간 단위로도 잘라냄(양끝 포함).
+    """
+    frames = [_read_day(p) for p in iter_day_files(start, end)]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    if start and len(start) > 10:
+        df = df[df["captured_hour"] >= start]
+    if end and len(end) > 10:
+        df = df[df["captured_hour"] <= end]
+    df["view_cnt"] = pd.to_numeric(df["view_cnt"], errors="coerce").fillna(0).astype("int64")
+    df = df.drop_duplicates(subset=["captured_hour", "category_no"], keep="last")
+    return df.reset_index(drop=True)
+
+
+def build_wide(start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """
+    long 스토어 → 와이드 뷰 (upsert_wide_csv와 같은 모양)
+    - 행: (category_no, category_name) 멀티인덱스
+    - 열: captured_hour (시간 오름차순)
+    - 값: view_cnt (Int64; 결측 NA)
+    """
+    df = load_long(start, end)
+    if df.empty:
+        empty = pd.MultiIndex.from_arrays([[], []], names=KEY_COLS)
+        return pd.DataFrame(index=empty)
+    wide = (
+        df.pivot_table(index=KEY_COLS, columns="captured_hour", values="view_cnt", aggfunc="last")
+        .astype("Int64")
+        .sort_index()
+    )
+    wide = wide[sorted(wide.columns)]
+    wide.columns.name = None
+    return wide
+
+
+def write_wide(path: pathlib.Path = WIDE_CSV, start: Optional[str] = None, end: Optional[str] = None) -> pathlib.Path:
+    wide = build_wide(start, end)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_io.write_csv(wide.reset_index(), path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    out = write_wide()
+    print("written ->", out)
@@ -3,21 +3,48 @@
 """
 SOOP 카테고리 스냅샷 수집 + 와이드 매트릭스(행=카테고리, 열=시간) 저장
 - 스냅샷 CSV: data/soop/categories/YYYY/MM/DD/HH.csv (원본 시각별 전체 448행 보존)
+  → 환경변수 SNAPSHOT_ARCHIVE="true"면 data/soop/categories_archive/YYYY/MM.csv.gz 월 아카이브에 기록
+    (snapshot_archive.py, 기존 시간별 CSV는 `python snapshot_archive.py compact`로 접어넣기)
+- long 스토어: data/soop/categories_store/YYYY/MM/DD.csv (매 실행 새 스냅샷 행만 append, category_store.py)
 - 와이드 매트릭스: data/soop/categories_matrix.csv (행=카테고리, 열=각 시각의 view_cnt)
+  → 매 실행 이번 스냅샷 열만 upsert (matrix_cache, 스토어 전체를 다시 읽지 않음)
+    환경변수 WRITE_WIDE_MATRIX="false"면 건너뜀 (스토어만 기록, 전체 재생성은 `python category_store.py`)
+- 최신 시각 사이드카: data/soop/categories_matrix.latest.csv (이번 스냅샷 열 하나, 백엔드와 무관하게 매 실행)
+  → analyze_categories.py가 전체 매트릭스 대신 읽음 (matrix_cache.read_latest)
+- 이동 구간 통계: UPDATE_ROLLING_STATS="true"면 매 실행 categories_matrix.rolling.npz/.rolling.csv 갱신
+  (24시간/7일 평균·최고치·증가율, rolling_stats.py)
+- 통합 점유율: UPDATE_MARKET_SHARE="true"면 매 실행 data/market/viewers.soop.csv의 이번 시각 열 갱신
+  (SOOP ↔ CHZZK 카테고리 매핑 + 시청자, 점유율은 읽을 때 두 플랫폼 파일을 합쳐 계산, market_share.py)
+- 조회 인덱스: data/soop/categories_index/ (category_index.py, UPDATE_CATEGORY_INDEX="true"면 매 실행 갱신)
+- 환경변수 STORAGE_BACKEND="sqlite"면 스토어/와이드 대신 data/soop/soop.sqlite에 long 행 기록
+  (와이드 CSV는 `python db_backend.py export`로 생성, db_backend.py)
 - long 포맷 파일(categories_master.csv, categories_timeseries.csv)은 기본 비활성화
   (환경변수 WRITE_LONG_MASTER/WRITE_LONG_TS 를 "true"로 주면 활성화)
+- 응답은 페이지마다 필요한 필드(category_no, category_name, view_cnt, fixed_tags)만 레코드로 파싱
+  (api_records.py, cate_img 등 나머지 필드는 스냅샷에 남기지 않음)
+- 실행마다 단계별 시간/페이지/바이트/행 수를 JSON 한 줄로 출력 (run_metrics.py)
 """
 
 import os
-import time
-import numpy as np
 import pathlib
 from datetime import datetime, timezone
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple
 
-import requests
 import pandas as pd
 
+import api_records
+import atomic_io
+import category_index
+import category_store
+import db_backend
+import market_share
+import matrix_cache
+import rolling_stats
+import run_metrics
+import fetch_engine
+import http_client
+import snapshot_archive
+
 # ======================
 # 설정
 # ======================
@@ -29,7 +56,7 @@ HEADERS = {
 }
 PAGE_SIZE = 120
 ORDER = "view_cnt"
-SLEEP_BETWEEN_PAGES = 0.35
+# 페이지 간 간격/재시도는 http_client(호스트별 토큰 버킷, 백오프)가 담당
 
 OUT_ROOT = pathlib.Path("data/soop/categories")
 OUT_ROOT.mkdir(parents=True, exist_ok=True)
@@ -40,12 +67,16 @@ WIDE_CSV = pathlib.Path("data/soop/categories_matrix.csv")  # ★ 핵심 산출
 # long 파일 쓰기 옵션(기본 꺼짐)
 WRITE_LONG_MASTER = os.getenv("WRITE_LONG_MASTER", "false").lower() == "true"
 WRITE_LONG_TS     = os.getenv("WRITE_LONG_TS", "false").lower() == "true"
+# 와이드 매트릭스 매 실행 갱신 옵션(기본 켜짐: 이번 시각 열만 upsert)
+WRITE_WIDE_MATRIX = os.getenv("WRITE_WIDE_MATRIX", "true").lower() == "true"
+# 조회 인덱스(category_index.py) 매 실행 증분 갱신 옵션(기본 꺼짐)
+UPDATE_CATEGORY_INDEX = os.getenv("UPDATE_CATEGORY_INDEX", "false").lower() == "true"
 
 
 # ======================
 # 요청/수집
 # ======================
-def fetch_category_page(page_no: int, n_per: int = PAGE_SIZE, order: str = ORDER) -> Tuple[List[Dict[str, Any]], bool]:
+def fetch_category_page(page_no: int, n_per: int = PAGE_SIZE, order: str = ORDER) -> Tuple[List[api_records.SoopCategory], bool]:
     params = {
         "m": "categoryList",
         "szKeyword": "",
@@ -55,39 +86,16 @@ def fetch_category_page(page_no: int, n_per: int = PAGE_SIZE, order: str = ORDER
         "nOffset": 0,
         "szPlatform": "pc",
     }
-    backoff = 1.0
-    for attempt in range(5):
-        try:
-            r = requests.get(BASE, params=params, headers=HEADERS, timeout=15)
-            r.raise_for_status()
-            j = r.json()
-            data = j.get("data", {})
-            items = data.get("list", []) or []
-            is_more = bool(data.get("is_more", False))
-            return items, is_more
-        except Exception:
-            if attempt == 4:
-                raise
-            time.sleep(backoff)
-            backoff = min(backoff * 2, 10)
-    return [], False
+    return http_client.get_parsed(BASE, lambda r: api_records.soop_page(r.content, api_records.SoopCategory),
+                                  params=params, headers=HEADERS, timeout=15)
 
 
 def fetch_all_categories() -> pd.DataFrame:
-    rows: List[Dict[str, Any]] = []
-    page = 1
-    while True:
-        items, is_more = fetch_category_page(page)
-        rows += items
-        if not is_more:
-            break
-        page += 1
-        time.sleep(SLEEP_BETWEEN_PAGES)
+    rows = fetch_engine.fetch_paged(fetch_category_page)
     if not rows:
-        return pd.DataFrame(columns=["category_no","category_name","view_cnt","fixed_tags","cate_img"])
-    df = pd.DataFrame(rows)
-    keep = [c for c in ["category_no","category_name","view_cnt","fixed_tags","cate_img"] if c in df.columns]
-    df = df[keep].copy()
+        return pd.DataFrame(columns=list(api_records.SoopCategory.__slots__))
+    with run_metrics.stage("normalize"):
+        df = api_records.to_frame(rows, api_records.SoopCategory)
     ts = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
     df["captured_at_utc"] = ts
     df["platform"] = "soop"
@@ -99,17 +107,18 @@ def fetch_all_categories() -> pd.DataFrame:
 # ======================
 def save_snapshot_csv(df: pd.DataFrame) -> pathlib.Path:
     ts = pd.to_datetime(df["captured_at_utc"].iloc[0])
+    if snapshot_archive.SNAPSHOT_ARCHIVE:
+        return snapshot_archive.write_snapshot(df, OUT_ROOT, ts)
     outdir = OUT_ROOT / f"{ts.year:04d}" / f"{ts.month:02d}" / f"{ts.day:02d}"
     outdir.mkdir(parents=True, exist_ok=True)
     outpath = outdir / f"{ts.hour:02d}.csv"
-    df.to_csv(outpath, index=False, encoding="utf-8-sig")
+    atomic_io.write_csv(df, outpath, index=False)
     return outpath
 
 
 def append_master_csv(df: pd.DataFrame) -> pathlib.Path:
     if WRITE_LONG_MASTER:
-        header = not MASTER_CSV.exists()
-        df.to_csv(MASTER_CSV, index=False, mode="a", header=header, encoding="utf-8-sig")
+        atomic_io.append_csv(df, MASTER_CSV, index=False)
     return MASTER_CSV  # noop 또는 쓰기
 
 
@@ -129,17 +138,16 @@ def upsert_timeseries_csv(df: pd.DataFrame) -> pathlib.Path:
         ts_all = ts_part
     ts_all = ts_all.drop_duplicates(["captured_at_utc","category_no"], keep="last")
     ts_all.sort_values(["captured_at_utc","category_no"], inplace=True)
-    ts_all.to_csv(TIMESERIES_CSV, index=False, encoding="utf-8-sig")
+    atomic_io.write_csv(ts_all, TIMESERIES_CSV, index=False)
     return TIMESERIES_CSV
 
 
-def upsert_wide_csv(df: pd.DataFrame) -> pathlib.Path:
+def pivot_snapshot(df: pd.DataFrame) -> pd.DataFrame:
     """
-    카테고리별(view_cnt) 와이드 매트릭스 누적 갱신:
+    스냅샷 → 와이드 한 열:
     - 행: (category_no, category_name) 멀티인덱스
     - 열: captured_hour (UTC, 'YYYY-MM-DDTHH:00:00Z')
     - 값: view_cnt (Int64; 결측은 NA)
-    - 같은 시간/카테고리는 새 스냅샷으로 덮어씀(최근값 우선)
     """
     df = df.copy()
 
@@ -153,59 +161,53 @@ def upsert_wide_csv(df: pd.DataFrame) -> pathlib.Path:
     df["captured_hour"] = df["captured_at_utc"].dt.strftime("%Y-%m-%dT%H:00:00Z")
 
     # 3) 현재 스냅샷 피벗 (멀티인덱스)
-    cur = (
-        df.pivot_table(
-            index=["category_no", "category_name"],
-            columns="captured_hour",
-            values="view_cnt",
-            aggfunc="sum",
-        )
-        .astype("Int64")
-        .sort_index()
-    )
-
-    # 4) 기존 매트릭스와 병합 (있으면 읽기)
-    if WIDE_CSV.exists():
-        # 멀티인덱스 그대로 복원
-        old = pd.read_csv(
-            WIDE_CSV,
-            dtype={"category_no": str, "category_name": str},
+    with run_metrics.stage("pivot"):
+        cur = (
+            df.pivot_table(
+                index=["category_no", "category_name"],
+                columns="captured_hour",
+                values="view_cnt",
+                aggfunc="sum",
+            )
+            .astype("Int64")
+            .sort_index()
         )
-        if not {"category_no", "category_name"}.issubset(old.columns):
-            # 혹시 과거에 단일 인덱스로 저장된 적이 있다면 안전탈출
-            old = old.rename(columns={old.columns[0]: "category_no"})
-            if "category_name" not in old.columns:
-                old["category_name"] = ""  # 최소한의 복구
-        old["category_no"] = old["category_no"].astype(str).str.zfill(8)
-        old = old.set_index(["category_no", "category_name"])
-
-        # 숫자화(혹시 문자열 섞였어도 강제 숫자)
-        for c in old.columns:
-            old[c] = pd.to_numeric(old[c], errors="coerce").astype("Int64")
-
-        # 열 합집합으로 맞추고, 동일 열은 새값으로 덮어쓰기
-        wide = old.reindex(index=old.index.union(cur.index))
-        for col in cur.columns:
-            wide[col] = cur[col]
-    else:
-        wide = cur
+    return cur
 
-    # 5) 열 정렬(시간순)
-    cols = list(wide.columns)
-    parsed = pd.to_datetime(cols, utc=True, errors="coerce")
-    order = np.argsort(parsed.values)  # NaT는 뒤로 정렬됨
-    wide = wide.iloc[:, order]
 
-    # 6) 저장
-    WIDE_CSV.parent.mkdir(parents=True, exist_ok=True)
-    out_df = wide.reset_index()  # 멀티인덱스를 두 컬럼으로 풀어 저장
-    out_df.to_csv(WIDE_CSV, index=False, encoding="utf-8-sig")
+def upsert_wide_csv(df: pd.DataFrame) -> pathlib.Path:
+    """
+    카테고리별(view_cnt) 와이드 매트릭스 누적 갱신 (행/열/값은 pivot_snapshot과 같음)
+    - 같은 시간/카테고리는 새 스냅샷으로 덮어씀(최근값 우선)
+    """
+    cur = pivot_snapshot(df)
 
+    # 캐시된 매트릭스에 반영 (같은 시각 열은 새 스냅샷으로 통째로 교체)
+    matrix_cache.CACHE.upsert(WIDE_CSV, cur, load_wide_csv, replace_cols=True)
     return WIDE_CSV
 
 
+def load_wide_csv(path: pathlib.Path) -> pd.DataFrame:
+    """기존 와이드 매트릭스 로드 (index=(category_no, category_name), 값 float64 한 번에 파싱)"""
+    if not path.exists():
+        empty = pd.MultiIndex.from_arrays([[], []], names=["category_no", "category_name"])
+        return pd.DataFrame(index=empty)
+    # 멀티인덱스 그대로 복원
+    old = matrix_cache.read_wide_csv(path, ["category_no", "category_name"])
+    if not {"category_no", "category_name"}.issubset(old.columns):
+        # 혹시 과거에 단일 인덱스로 저장된 적이 있다면 안전탈출
+        old = old.rename(columns={old.columns[0]: "category_no"})
+        if "category_name" not in old.columns:
+            old["category_name"] = ""  # 최소한의 복구
+    old["category_no"] = old["category_no"].astype(str).str.zfill(8)
+    return old.set_index(["category_no", "category_name"])
+
+
+@run_metrics.instrumented("collect_categories")
 def main():
-    df_all = fetch_all_categories()
+    with run_metrics.stage("fetch"):
+        df_all = fetch_all_categories()
+    run_metrics.count("rows", len(df_all))
     if df_all.empty:
         print("빈 응답. 잠시 후 재시도 바람.")
         return
@@ -217,15 +219,53 @@ def main():
         print(df_sorted[cols_show].head(25).to_string(index=False))
         print(f"\nrows_total={len(df_all)}")
 
-    snap = save_snapshot_csv(df_all)
-    master = append_master_csv(df_all)      # 기본은 noop
-    tsfile = upsert_timeseries_csv(df_all)  # 기본은 noop
-    wide   = upsert_wide_csv(df_all)        # ★ 와이드 파일 갱신
+    with run_metrics.stage("snapshot"):
+        snap = save_snapshot_csv(df_all)
+        cur = pivot_snapshot(df_all)
+        latest = matrix_cache.write_latest(WIDE_CSV, cur)
+    with run_metrics.stage("master"):
+        master = append_master_csv(df_all)      # 기본은 noop
+        tsfile = upsert_timeseries_csv(df_all)  # 기본은 noop
 
     print(f"\nsaved snapshot -> {snap}")
+    print(f"saved latest -> {latest}")
+    hour = cur.columns[0]
+    nos, names = cur.index.get_level_values("category_no"), cur.index.get_level_values("category_name")
+    if rolling_stats.UPDATE_ROLLING_STATS:
+        with run_metrics.stage("rolling"):
+            rolled = rolling_stats.update(WIDE_CSV, category_store.KEY_COLS, hour, nos, names, cur[hour])
+        print(f"updated rolling -> {rolled}")
+    if market_share.UPDATE_MARKET_SHARE:
+        with run_metrics.stage("market"):
+            market = market_share.update("soop", hour, nos, names, cur[hour])
+        print(f"updated market -> {', '.join(map(str, market))}")
     print(f"appended master -> {master} (WRITE_LONG_MASTER={WRITE_LONG_MASTER})")
     print(f"updated timeseries(long) -> {tsfile} (WRITE_LONG_TS={WRITE_LONG_TS})")
-    print(f"updated wide -> {wide}")
+
+    if db_backend.enabled():
+        # DB 백엔드: long 행만 트랜잭션 하나로 기록, 와이드 CSV는 `python db_backend.py export`
+        with run_metrics.stage("db"), db_backend.transaction(db_backend.SOOP_DB) as con:
+            n = db_backend.insert_soop_categories(con, category_store.normalize_snapshot(df_all))
+        print(f"inserted db -> {db_backend.SOOP_DB} ({n} rows)")
+        return
+
+    # ★ long 스토어 append (첫 실행이면 기존 와이드 매트릭스를 먼저 이관)
+    with run_metrics.stage("store"):
+        migrated = category_store.import_wide_csv(WIDE_CSV)
+        stored = category_store.append_snapshot(df_all)
+
+    if migrated:
+        print(f"migrated wide -> {category_store.STORE_ROOT} ({migrated} rows)")
+    print(f"appended store -> {', '.join(map(str, stored))}")
+    if WRITE_WIDE_MATRIX:
+        wide = upsert_wide_csv(df_all)
+        print(f"updated wide -> {wide}")
+    else:
+        print("wide -> skipped (WRITE_WIDE_MATRIX=false; rebuild with `python category_store.py`)")
+    if UPDATE_CATEGORY_INDEX:
+        with run_metrics.stage("index"):
+            n = category_index.build()
+        print(f"updated index -> {category_index.INDEX_ROOT} ({n} rows)")
 
 
 if __name__ == "__main__":
@@ -5,16 +5,38 @@ CHZZK(치지직) 수집기 (피드백 반영판)
 - 스냅샷(옵션): data/chzzk/lives/YYYY/MM/DD/HH.csv  → 기본 비활성화(용량 절감)
 - 카테고리 와이드(전체): data/chzzk/categories_matrix.csv
 - 카테고리 와이드(게임만): data/chzzk/game_categories_matrix.csv
+- 최신 시각 사이드카: categories_matrix.latest.csv / game_categories_matrix.latest.csv
+  (이번 스냅샷 열 하나, 백엔드와 무관하게 매 실행 → analyze_chzzk_*.py가 전체 매트릭스 대신 읽음)
+- 이동 구간 통계: UPDATE_ROLLING_STATS="true"면 위 세 매트릭스 옆 *.rolling.npz/.rolling.csv 갱신
+  (24시간/7일 평균·최고치·증가율, rolling_stats.py)
+- 통합 점유율: UPDATE_MARKET_SHARE="true"면 매 실행 data/market/viewers.chzzk.csv의 이번 시각 열 갱신
+  (SOOP ↔ CHZZK 카테고리 매핑 + 시청자, 점유율은 읽을 때 두 플랫폼 파일을 합쳐 계산, market_share.py)
 - 디테일 와이드(열=스트리머 이름): data/chzzk/details_matrix.csv (수집 시점 TOP 100만)
+  환경변수 DETAILS_MATRIX_IDS="true"면 대신 details_matrix_ids.csv에 channelId 기준 정수 id(sid) 열로 기록
+  (sid 레지스트리: data/chzzk/streamers.csv, 닉네임 이력: data/chzzk/nick_history.csv)
+  환경변수 DETAILS_MATRIX_FORMAT="sparse"면 값이 있는 셀만 담은 .npz로 저장 (sparse_matrix.py)
+- 환경변수 STORAGE_BACKEND="sqlite"면 와이드 CSV 대신 data/chzzk/chzzk.sqlite에 long 행 기록
+  (와이드 CSV는 `python db_backend.py export`로 생성)
+- 응답은 페이지마다 필요한 필드만 레코드로 파싱 (api_records.py, 썸네일/채널 이미지 URL은 스냅샷에 남기지 않음)
+- 실행마다 단계별 시간/페이지/바이트/행 수/매트릭스 크기를 JSON 한 줄로 출력 (run_metrics.py)
 """
 
-import os, time, json, csv
+import os, json, csv
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, Any, List
-import numpy as np
+from typing import List
 import pandas as pd
-import requests
+
+import api_records
+import atomic_io
+import db_backend
+import http_client
+import market_share
+import matrix_cache
+import rolling_stats
+import run_metrics
+import sparse_matrix
+import streamer_registry
 
 OPENAPI = "https://openapi.chzzk.naver.com"
 HEADERS = {
@@ -30,12 +52,19 @@ SNAP_ROOT      = OUT_ROOT / "lives"
 CAT_WIDE       = OUT_ROOT / "categories_matrix.csv"
 GAME_CAT_WIDE  = OUT_ROOT / "game_categories_matrix.csv"
 DET_WIDE       = OUT_ROOT / "details_matrix.csv"
+DET_WIDE_IDS   = OUT_ROOT / "details_matrix_ids.csv"
 
 # 스냅샷 저장 여부 (기본 False)
 WRITE_LIVE_SNAPSHOTS = os.getenv("WRITE_LIVE_SNAPSHOTS", "false").lower() == "true"
+# 디테일 매트릭스 열을 스트리머 정수 id로 기록할지 (기본 False: channelName 열)
+DETAILS_MATRIX_IDS = os.getenv("DETAILS_MATRIX_IDS", "false").lower() == "true"
+# 결측 channelId의 문자열 표현 (sid 발급에서 제외)
+MISSING_IDS = {"", "None", "nan", "<NA>"}
+# 디테일 매트릭스 저장 형식: "csv"(기본, 밀집) 또는 "sparse"(.npz 트리플릿)
+DETAILS_MATRIX_FORMAT = os.getenv("DETAILS_MATRIX_FORMAT", "csv").lower()
 
 PAGE_SIZE = 20
-SLEEP_BETWEEN = 0.25
+# 페이지 간 간격/재시도는 http_client(호스트별 토큰 버킷, 백오프)가 담당
 
 KEY_COLS = ["categoryType", "categoryId", "categoryValue"]
 
@@ -43,16 +72,38 @@ def _read_wide_unique(path: Path, key_cols=KEY_COLS) -> pd.DataFrame:
     """
     기존 wide CSV를 읽되, 같은 (key_cols) 조합이 여러 줄이면
     시간열별 최대값(max)으로 묶어 '유일 인덱스'로 만들어서 반환.
-    반환: index=MultiIndex(key_cols), 값 컬럼은 Int64
+    반환: index=MultiIndex(key_cols), 값 컬럼은 float64 (결측 NaN)
     """
-    old = pd.read_csv(path, dtype=str)
+    old = matrix_cache.read_wide_csv(path, key_cols)
     num_cols = [c for c in old.columns if c not in key_cols]
-    for c in num_cols:
-        old[c] = pd.to_numeric(old[c], errors="coerce").astype("Int64")
-    old = (old.groupby(key_cols, dropna=False)[num_cols]
-              .max()
-              .reset_index())
-    return old.set_index(key_cols)
+    if not all(pd.api.types.is_numeric_dtype(t) for t in old[num_cols].dtypes):  # 숫자가 아닌 값이 섞인 경우
+        old = pd.concat([old[key_cols], pd.DataFrame(matrix_cache.numeric_block(old[num_cols]),
+                                                     columns=num_cols, index=old.index)], axis=1)
+    if not old.duplicated(subset=key_cols).any():
+        return old.set_index(key_cols)
+    return old.groupby(key_cols, dropna=False, sort=False)[num_cols].max()
+
+def _load_cat_wide(path: Path) -> pd.DataFrame:
+    """카테고리 wide 캐시 로더 (파일이 없으면 빈 프레임)"""
+    if not path.exists():
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[]] * len(KEY_COLS), names=KEY_COLS))
+    return _read_wide_unique(path, KEY_COLS)
+
+def _load_det_wide(path: Path) -> pd.DataFrame:
+    """디테일 wide 캐시 로더 (index=captured_hour)"""
+    if not path.exists():
+        return pd.DataFrame(index=pd.Index([], name="captured_hour", dtype=object))
+    old = matrix_cache.read_wide_csv(path, ["captured_hour"])
+    if "captured_hour" not in old.columns:
+        old = old.rename(columns={old.columns[0]:"captured_hour"})
+    old = old.set_index("captured_hour")
+    if path == DET_WIDE_IDS:
+        old.columns = old.columns.astype(int)  # sid 열
+    return old
+
+def _load_det_sparse(path: Path) -> sparse_matrix.SparseMatrix:
+    """디테일 희소 매트릭스(.npz) 로더, 없으면 같은 이름의 기존 CSV에서 변환"""
+    return sparse_matrix.load_or_migrate(path, path.with_suffix(".csv"), _load_det_wide)
 
 def _utc_hour_iso(dt=None) -> str:
     if dt is None:
@@ -78,43 +129,31 @@ def fetch_all_lives() -> pd.DataFrame:
 
     url = f"{OPENAPI}/open/v1/lives"
     params = {"size": PAGE_SIZE}
-    rows: List[Dict[str, Any]] = []
+    rows: List[api_records.ChzzkLive] = []
     seen_next = set()
 
     while True:
-        r = requests.get(url, headers=HEADERS, params=params, timeout=20)
-        r.raise_for_status()
-        js = r.json() or {}
-        content = js.get("content") or {}
-        data = content.get("data") or []
-        page = content.get("page") or {}
+        # 필요한 필드만 레코드로 (썸네일/채널 이미지 등은 버림), 깨진 JSON은 get_parsed가 재시도
+        data, nxt = http_client.get_parsed(url, lambda r: api_records.chzzk_page(r.content),
+                                           headers=HEADERS, params=params, timeout=20)
         rows.extend(data)
 
-        nxt = page.get("next")
         if not nxt or nxt in seen_next:
             break
         seen_next.add(nxt)
         params["next"] = nxt
-        time.sleep(SLEEP_BETWEEN)
 
     if not rows:
         return pd.DataFrame()
 
-    df = pd.json_normalize(rows)
-
-    # 필요한 컬럼만 유지
-    keep = [c for c in [
-        "liveId","liveTitle","liveThumbnailImageUrl","concurrentUserCount",
-        "openDate","categoryType","liveCategory","liveCategoryValue",
-        "channelId","channelName","channelImageUrl","tags"
-    ] if c in df.columns]
-    df = df[keep].copy()
+    with run_metrics.stage("normalize"):
+        df = api_records.to_frame(rows, api_records.ChzzkLive)
 
-    # 타입 정리
-    df["concurrentUserCount"] = pd.to_numeric(df.get("concurrentUserCount", 0), errors="coerce").fillna(0).astype("Int64")
-    for c in ["channelId","channelName","categoryType","liveCategory","liveCategoryValue"]:
-        if c in df.columns:
-            df[c] = df[c].astype(str)
+        # 타입 정리
+        df["concurrentUserCount"] = pd.to_numeric(df.get("concurrentUserCount", 0), errors="coerce").fillna(0).astype("Int64")
+        for c in ["channelId","channelName","categoryType","liveCategory","liveCategoryValue"]:
+            if c in df.columns:
+                df[c] = df[c].astype(str)
 
     return df
 
@@ -135,10 +174,64 @@ def save_live_snapshot(df: pd.DataFrame) -> Path:
         )
     snap["captured_at_utc"] = ts
 
-    snap.to_csv(outpath, index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+    atomic_io.write_csv(snap, outpath, index=False, quoting=csv.QUOTE_ALL)
     return outpath
 
 
+def category_counts(df: pd.DataFrame) -> pd.Series:
+    """스냅샷 → (categoryType, categoryId, categoryValue)별 concurrentUserCount 합계 (Int64 Series)"""
+    return (df[KEY_COLS + ["concurrentUserCount"]]
+            .assign(concurrentUserCount=pd.to_numeric(df["concurrentUserCount"], errors="coerce").fillna(0).astype("Int64"))
+            .groupby(KEY_COLS, dropna=False)["concurrentUserCount"]
+            .sum().astype("Int64"))
+
+
+def top_channels(df: pd.DataFrame, n: int = 100) -> pd.DataFrame:
+    """시청자 수 상위 n개 라이브"""
+    return df.sort_values("concurrentUserCount", ascending=False).head(n).copy()
+
+
+def game_only(df: pd.DataFrame) -> pd.DataFrame:
+    """categoryType == 'GAME' 라이브만"""
+    return df[df.get("categoryType", "").astype(str) == "GAME"].copy()
+
+
+def write_latest_categories(df: pd.DataFrame) -> List[Path]:
+    """카테고리 와이드 2종의 최신 시각 사이드카 (키 열 + 이번 시각 열)"""
+    df = _ensure_cat_cols(df)
+    ts_col = _utc_hour_iso()
+    out = []
+    for path, part in [(CAT_WIDE, df), (GAME_CAT_WIDE, game_only(df))]:
+        counts = category_counts(part) if not part.empty else pd.Series(
+            dtype="Int64", index=pd.MultiIndex.from_arrays([[]] * len(KEY_COLS), names=KEY_COLS))
+        out.append(matrix_cache.write_latest(path, counts.to_frame(ts_col)))
+    return out
+
+
+def update_rolling(df: pd.DataFrame) -> List[Path]:
+    """
+    이번 스냅샷 → 이동 구간 통계 (rolling_stats.py)
+    - 카테고리(전체/게임): id=categoryType|categoryId, label=categoryValue
+    - 디테일(TOP 100): id=label=channelName (details_matrix.csv 열과 같음)
+    """
+    ts_col = _utc_hour_iso()
+    df = _ensure_cat_cols(df)
+    out = []
+    for path, part in [(CAT_WIDE, df), (GAME_CAT_WIDE, game_only(df))]:
+        if part.empty:
+            continue
+        counts = category_counts(part)
+        ids = [f"{t}|{i}" for t, i, _ in counts.index]
+        labels = [str(v) for _, _, v in counts.index]
+        out.append(rolling_stats.update(path, KEY_COLS, ts_col, ids, labels, counts))
+    top = top_channels(df)
+    names = top["channelName"].astype(str).str.strip()
+    top = top.assign(channelName=names).drop_duplicates(subset=["channelName"], keep="last")
+    out.append(rolling_stats.update(DET_WIDE, ["captured_hour"], ts_col, top["channelName"], top["channelName"],
+                                    top["concurrentUserCount"]))
+    return out
+
+
 def upsert_category_matrix(df: pd.DataFrame) -> Path:
     """
     categories_matrix.csv
@@ -151,32 +244,15 @@ def upsert_category_matrix(df: pd.DataFrame) -> Path:
 
     if df.empty:
         if not CAT_WIDE.exists():
-            pd.DataFrame(columns=KEY_COLS).to_csv(CAT_WIDE, index=False, encoding="utf-8-sig")
+            atomic_io.write_csv(pd.DataFrame(columns=KEY_COLS), CAT_WIDE, index=False)
         return CAT_WIDE
 
     ts_col = _utc_hour_iso()
-    # 현재 스냅샷을 바로 GroupBy → Series(MultiIndex)로
-    cur = (df[KEY_COLS + ["concurrentUserCount"]]
-           .assign(concurrentUserCount=pd.to_numeric(df["concurrentUserCount"], errors="coerce").fillna(0).astype("Int64"))
-           .groupby(KEY_COLS, dropna=False)["concurrentUserCount"]
-           .sum().astype("Int64"))
-
-    # 과거 파일 읽기(있다면) + 중복 유일화
-    if CAT_WIDE.exists():
-        old = _read_wide_unique(CAT_WIDE, KEY_COLS)
-        wide = old.reindex(index=old.index.union(cur.index))
-    else:
-        wide = pd.DataFrame(index=cur.index)
+    with run_metrics.stage("pivot"):
+        cur = category_counts(df)
 
-    wide[ts_col] = cur
-
-    # 시간열 정렬
-    cols = list(wide.columns)
-    order = np.argsort(pd.to_datetime(cols, utc=True, errors="coerce").values)
-    wide = wide.iloc[:, order]
-
-    out_df = wide.reset_index()
-    out_df.to_csv(CAT_WIDE, index=False, encoding="utf-8-sig")
+    # 캐시된 매트릭스에 반영 (처음엔 과거 파일 읽기 + 중복 유일화, 같은 시각 열은 통째로 교체)
+    matrix_cache.CACHE.upsert(CAT_WIDE, cur.to_frame(ts_col), _load_cat_wide, replace_cols=True)
     return CAT_WIDE
 
 
@@ -191,32 +267,18 @@ def upsert_game_categories_matrix(df: pd.DataFrame) -> Path:
     df = _ensure_cat_cols(df)
     GAME_CAT_WIDE.parent.mkdir(parents=True, exist_ok=True)
 
-    game = df[df.get("categoryType", "").astype(str) == "GAME"].copy()
+    game = game_only(df)
     if game.empty:
         if not GAME_CAT_WIDE.exists():
-            pd.DataFrame(columns=KEY_COLS).to_csv(GAME_CAT_WIDE, index=False, encoding="utf-8-sig")
+            atomic_io.write_csv(pd.DataFrame(columns=KEY_COLS), GAME_CAT_WIDE, index=False)
         return GAME_CAT_WIDE
 
     ts_col = _utc_hour_iso()
-    cur = (game[KEY_COLS + ["concurrentUserCount"]]
-           .assign(concurrentUserCount=pd.to_numeric(game["concurrentUserCount"], errors="coerce").fillna(0).astype("Int64"))
-           .groupby(KEY_COLS, dropna=False)["concurrentUserCount"]
-           .sum().astype("Int64"))
-
-    if GAME_CAT_WIDE.exists():
-        old = _read_wide_unique(GAME_CAT_WIDE, KEY_COLS)
-        wide = old.reindex(index=old.index.union(cur.index))
-    else:
-        wide = pd.DataFrame(index=cur.index)
-
-    wide[ts_col] = cur
+    with run_metrics.stage("pivot"):
+        cur = category_counts(game)
 
-    cols = list(wide.columns)
-    order = np.argsort(pd.to_datetime(cols, utc=True, errors="coerce").values)
-    wide = wide.iloc[:, order]
-
-    out_df = wide.reset_index()
-    out_df.to_csv(GAME_CAT_WIDE, index=False, encoding="utf-8-sig")
+    # 캐시된 매트릭스에 반영 (처음엔 과거 파일 읽기 + 중복 유일화, 같은 시각 열은 통째로 교체)
+    matrix_cache.CACHE.upsert(GAME_CAT_WIDE, cur.to_frame(ts_col), _load_cat_wide, replace_cols=True)
     return GAME_CAT_WIDE
 
 
@@ -226,44 +288,45 @@ def upsert_details_matrix_top100(df: pd.DataFrame) -> Path:
     details_matrix.csv (TOP 100)
     - 행: captured_hour(UTC)
     - 열: channelName (스트리머 이름만)
+          DETAILS_MATRIX_IDS면 details_matrix_ids.csv에 channelId 기준 sid (channelId 없는 행은 제외)
     - 값: concurrentUserCount
     - 수집 시점에서 시청자 수 상위 100명만 기록
     """
+    out_path = DET_WIDE_IDS if DETAILS_MATRIX_IDS else DET_WIDE
+    if DETAILS_MATRIX_FORMAT == "sparse":
+        out_path = out_path.with_suffix(".npz")
     if df.empty:
-        return DET_WIDE
+        return out_path
 
     ts_col = _utc_hour_iso()
 
-    cur = df.copy()
-    # TOP 100 by viewers
-    cur = cur.sort_values("concurrentUserCount", ascending=False).head(100).copy()
-
-    cur["col"] = cur["channelName"].astype(str).str.strip()
-    cur = cur[["col","concurrentUserCount"]].dropna()
-    cur = cur.drop_duplicates(subset=["col"], keep="last").set_index("col")["concurrentUserCount"].astype("Int64")
-
-    if DET_WIDE.exists():
-        old = pd.read_csv(DET_WIDE, dtype=str)
-        if "captured_hour" not in old.columns:
-            old = old.rename(columns={old.columns[0]:"captured_hour"})
-        for c in old.columns:
-            if c == "captured_hour": continue
-            old[c] = pd.to_numeric(old[c], errors="coerce").astype("Int64")
-        old = old.set_index("captured_hour")
-        wide = old.reindex(columns=old.columns.union(cur.index))
-        wide.loc[ts_col, cur.index] = cur.values
-    else:
-        wide = pd.DataFrame(index=[ts_col], columns=cur.index, dtype="Int64")
-        wide.loc[ts_col] = cur.values
-
-    wide = wide.sort_index()
-    out_df = wide.reset_index().rename(columns={"index":"captured_hour"})
-    out_df.to_csv(DET_WIDE, index=False, encoding="utf-8-sig")
-    return DET_WIDE
-
-
+    with run_metrics.stage("pivot"):
+        cur = top_channels(df)
+
+        if DETAILS_MATRIX_IDS:
+            # channelId 없는 행은 제외 (결측이 str()로 "None"/"nan"이 되어 서로 다른 채널이 sid 하나로 합쳐지는 것 방지)
+            ids = cur["channelId"]
+            cur = cur[ids.notna() & ~ids.astype(str).str.strip().isin(MISSING_IDS)]
+            registry = streamer_registry.get_registry(OUT_ROOT)
+            cur["col"] = registry.encode(cur["channelId"], cur["channelName"].astype(str).str.strip(), ts_col)
+            registry.save()
+        else:
+            cur["col"] = cur["channelName"].astype(str).str.strip()
+        cur = cur[["col","concurrentUserCount"]].dropna()
+        cur = cur.drop_duplicates(subset=["col"], keep="last").set_index("col")["concurrentUserCount"].astype("Int64")
+
+        row = cur.to_frame(ts_col).T
+        row.index.name = "captured_hour"
+    loader = _load_det_sparse if out_path.suffix == ".npz" else _load_det_wide
+    matrix_cache.CACHE.upsert(out_path, row, loader)
+    return out_path
+
+
+@run_metrics.instrumented("collect_chzzk")
 def main():
-    df = fetch_all_lives()
+    with run_metrics.stage("fetch"):
+        df = fetch_all_lives()
+    run_metrics.count("rows", len(df))
     if df.empty:
         print("빈 응답."); return
 
@@ -273,13 +336,38 @@ def main():
         print("\n=== CHZZK live snapshot (top20 by viewers) ===")
         print(df.sort_values("concurrentUserCount", ascending=False)[show_cols].head(20).to_string(index=False))
 
+    with run_metrics.stage("snapshot"):
+        latest = write_latest_categories(df)
+    print(f"saved latest    -> {', '.join(map(str, latest))}")
+    if rolling_stats.UPDATE_ROLLING_STATS:
+        with run_metrics.stage("rolling"):
+            rolled = update_rolling(df)
+        print(f"updated rolling -> {', '.join(map(str, rolled))}")
+    if market_share.UPDATE_MARKET_SHARE:
+        with run_metrics.stage("market"):
+            counts = category_counts(_ensure_cat_cols(df))
+            market = market_share.update("chzzk", _utc_hour_iso(), [f"{t}|{i}" for t, i, _ in counts.index],
+                                         [str(v) for _, _, v in counts.index], counts)
+        print(f"updated market  -> {', '.join(map(str, market))}")
+
     # lives 스냅샷: 기본 비활성화
     if WRITE_LIVE_SNAPSHOTS:
-        snap = save_live_snapshot(df)
+        with run_metrics.stage("snapshot"):
+            snap = save_live_snapshot(df)
         print(f"saved snapshot  -> {snap}")
     else:
         print("snapshot       -> skipped (WRITE_LIVE_SNAPSHOTS=false)")
 
+    if db_backend.enabled():
+        # DB 백엔드: long 행만 트랜잭션 하나로 기록, 와이드 CSV는 `python db_backend.py export`
+        ts_col = _utc_hour_iso()
+        cat_df = _ensure_cat_cols(df)
+        with run_metrics.stage("db"), db_backend.transaction(db_backend.CHZZK_DB) as con:
+            n_cat = db_backend.replace_chzzk_categories(con, ts_col, category_counts(cat_df)) if not cat_df.empty else 0
+            n_det = db_backend.insert_chzzk_details(con, ts_col, top_channels(df))
+        print(f"inserted db -> {db_backend.CHZZK_DB} (categories={n_cat}, details={n_det})")
+        return
+
     cat  = upsert_category_matrix(df)
     det  = upsert_details_matrix_top100(df)
     game = upsert_game_categories_matrix(df)
@@ -4,15 +4,32 @@
 SOOP 디테일(방송 목록) 수집
 - 카테고리별로 '스냅샷 / 마스터 / 와이드 매트릭스 / BJ 마스터'를 각각 분리 저장
 - 와이드 매트릭스 열 라벨: "user_id|user_nick" (사람이 바로 식별 가능)
+  환경변수 DETAILS_MATRIX_IDS="true"면 대신 details_matrix_ids.csv에 스트리머 정수 id(sid) 열로 기록
+  (sid는 data/soop/streamers.csv 레지스트리가 user_id 기준으로 발급 → 닉네임이 바뀌어도 열 유지)
+- 환경변수 DETAILS_MATRIX_FORMAT="sparse"면 매트릭스를 값이 있는 셀만 담은 .npz로 저장
+  (details_matrix.npz / details_matrix_ids.npz, 처음엔 기존 CSV를 읽어 변환, sparse_matrix.py)
+- 환경변수 STORAGE_BACKEND="sqlite"면 매트릭스 대신 data/soop/soop.sqlite(soop_details)에 long 행 기록
+  (와이드 CSV는 `python db_backend.py export`로 생성, db_backend.py)
 - 동일 시간대에 같은 BJ가 여러 레코드면 '마지막 값' 기준으로 반영(최근 스냅샷 우선)
+- 환경변수 UPDATE_ROLLING_STATS="true"면 카테고리별 스트리머(user_id) 24시간/7일 평균·최고치·증가율 갱신
+  (details_matrix.rolling.npz/.rolling.csv, rolling_stats.py)
+- 실행마다 단계별 시간/페이지/바이트/행 수/매트릭스 크기를 JSON 한 줄로 출력 (run_metrics.py)
 
 폴더 구조:
 data/soop/details/
   ├─ 00040070_버추얼/
   │    ├─ snapshots/YYYY/MM/DD/HH.csv
+  │    ├─ snapshots_archive/YYYY/MM.csv.gz  # (옵션) SNAPSHOT_ARCHIVE="true"면 시간별 CSV 대신 월 아카이브
+  │    ├─ snapshots_delta/YYYY/MM/DD/HH.key|delta.csv  # (옵션) DETAILS_SNAPSHOT_DELTA="true"면 직전 시간 대비 델타
   │    ├─ details_master.csv
   │    ├─ details_matrix.csv      # 행: captured_hour(UTC), 열: user_id|user_nick, 값: view_cnt(Int64)
-  │    └─ bj_master.csv           # user_id, nickname, first_seen, last_seen
+  │    ├─ details_matrix.csv.state.json  # 매트릭스에 반영된 details_master.csv 위치(워터마크, 매트릭스 파일별)
+  │    ├─ details_matrix.rolling.csv  # (옵션) 스트리머별 이동 구간 요약 (+ .rolling.npz 증분 상태)
+  │    ├─ details_matrix_ids.csv  # (옵션) 행: captured_hour(UTC), 열: sid, 값: view_cnt(Int64)
+  │    ├─ bj_master.sqlite        # (작업 사본, git 제외) bj(user_id PK, user_nick, first_seen, last_seen) + nick_history
+  │    ├─ bj_master.csv           # (export) user_id, user_nick, first_seen, last_seen
+  │    ├─ bj_nick_history.csv     # (export) user_id, user_nick, first_seen, last_seen (닉네임별)
+  │    └─ bj_master.log.csv       # export 뒤 upsert한 행 (append-only, 같은 열)
   └─ 00810000_FC온라인/
        ├─ snapshots/...
        ├─ details_master.csv
@@ -21,19 +38,44 @@ data/soop/details/
 """
 
 from __future__ import annotations
-import requests
+import io
+import json
+import os
 import pandas as pd
 from datetime import datetime, timezone
 from pathlib import Path
-import time
 import re
 from typing import Dict, Tuple, Any, List
 
+import api_records
+import atomic_io
+import bj_store
+import db_backend
+import fetch_engine
+import http_client
+import matrix_cache
+import rolling_stats
+import run_metrics
+import snapshot_archive
+import snapshot_delta
+import sparse_matrix
+import streamer_registry
+
 # ───────────────────────────────── 기본 설정 ─────────────────────────────────
 BASE = "https://sch.sooplive.co.kr/api.php"
 HEADERS = {"User-Agent": "Mozilla/5.0", "Accept": "application/json, text/plain, */*"}
 DATA_ROOT = Path("data/soop/details")
 DATA_ROOT.mkdir(parents=True, exist_ok=True)
+REGISTRY_ROOT = Path("data/soop")  # streamers.csv / nick_history.csv
+
+# 매트릭스 열을 스트리머 정수 id로 기록할지(기본 꺼짐: 기존 "user_id|user_nick" 열)
+DETAILS_MATRIX_IDS = os.getenv("DETAILS_MATRIX_IDS", "false").lower() == "true"
+# 매트릭스 저장 형식: "csv"(기본, 밀집) 또는 "sparse"(.npz 트리플릿)
+DETAILS_MATRIX_FORMAT = os.getenv("DETAILS_MATRIX_FORMAT", "csv").lower()
+# BJ 마스터 텍스트 원본 유지 여부 (bj_master.log.csv에 이번 스냅샷 행 append, 로그가 커지면 CSV로 압축)
+# (기본 꺼짐: 로컬에선 bj_master.sqlite만 갱신, `python bj_store.py export`로 생성.
+#  sqlite는 git에 올리지 않으므로 워크플로는 켜 두고 텍스트를 커밋 → 캐시가 없으면 텍스트에서 sqlite를 다시 만듦)
+WRITE_BJ_MASTER_CSV = os.getenv("WRITE_BJ_MASTER_CSV", "false").lower() == "true"
 
 # 수집 대상 카테고리 (cate_no → 한글명)
 CATEGORY_MAP: Dict[str, str] = {
@@ -43,7 +85,7 @@ CATEGORY_MAP: Dict[str, str] = {
 
 PAGE_SIZE = 60
 ORDER = "view_cnt_desc"
-SLEEP_BETWEEN_PAGES = 0.25
+# 페이지/카테고리 동시 수집은 fetch_engine, 요청 간격/재시도는 http_client가 담당
 
 # ────────────────────────────── 유틸 ──────────────────────────────
 _SLUG_RE = re.compile(r"[^0-9A-Za-z가-힣_()-]+")
@@ -60,7 +102,7 @@ def category_dir(cate_no: str, cate_name: str) -> Path:
     return DATA_ROOT / f"{cate_no}_{slug(cate_name)}"
 
 # ─────────────────────────── 네트워크 수집 ───────────────────────────
-def fetch_category_contents(cate_no: str, page=1, nListCnt=PAGE_SIZE) -> Tuple[List[Dict[str, Any]], bool]:
+def fetch_category_contents(cate_no: str, page=1, nListCnt=PAGE_SIZE) -> Tuple[List[api_records.SoopBroad], bool]:
     params = {
         "m": "categoryContentsList",
         "szType": "live",
@@ -70,23 +112,15 @@ def fetch_category_contents(cate_no: str, page=1, nListCnt=PAGE_SIZE) -> Tuple[L
         "szOrder": ORDER,
         "szCateNo": cate_no,
     }
-    r = requests.get(BASE, params=params, headers=HEADERS, timeout=15)
-    r.raise_for_status()
-    js = r.json()
-    data = js.get("data", {}) or {}
-    return data.get("list", []) or [], bool(data.get("is_more", False))
-
-def fetch_all_for_category(cate_no: str) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    page = 1
-    while True:
-        items, is_more = fetch_category_contents(cate_no, page)
-        rows.extend(items)
-        if not is_more:
-            break
-        page += 1
-        time.sleep(SLEEP_BETWEEN_PAGES)
-    return rows
+    return http_client.get_parsed(BASE, lambda r: api_records.soop_page(r.content, api_records.SoopBroad),
+                                  params=params, headers=HEADERS, timeout=15)
+
+def fetch_all_for_category(cate_no: str) -> List[api_records.SoopBroad]:
+    return fetch_engine.fetch_paged(lambda page: fetch_category_contents(cate_no, page))
+
+def details_frame(items: List[api_records.SoopBroad]) -> pd.DataFrame:
+    """방송 레코드 → DataFrame (broad_no, broad_title, user_id, user_nick, view_cnt, broad_start, hash_tags 중 응답에 있는 열)"""
+    return api_records.to_frame(items, api_records.SoopBroad)
 
 # ─────────────────────── 저장(스냅샷/마스터) ───────────────────────
 def save_snapshot_and_append_master(df: pd.DataFrame, cate_no: str, cate_name: str, ts_iso: str) -> None:
@@ -95,7 +129,6 @@ def save_snapshot_and_append_master(df: pd.DataFrame, cate_no: str, cate_name: s
     """
     cdir = category_dir(cate_no, cate_name)
     snap_dir = cdir / "snapshots"
-    snap_dir.mkdir(parents=True, exist_ok=True)
 
     # 공통 메타 부여
     df = df.copy()
@@ -105,132 +138,235 @@ def save_snapshot_and_append_master(df: pd.DataFrame, cate_no: str, cate_name: s
 
     # 시각별 스냅샷 파일
     ts = datetime.fromisoformat(ts_iso.replace("Z", "+00:00"))
-    outdir = snap_dir / ts.strftime("%Y/%m/%d")
-    outdir.mkdir(parents=True, exist_ok=True)
-    snap_path = outdir / f"{ts.strftime('%H')}.csv"
-    df.to_csv(snap_path, index=False, encoding="utf-8-sig")
+    with run_metrics.stage("snapshot"):
+        if snapshot_delta.DETAILS_SNAPSHOT_DELTA:
+            snapshot_delta.write_snapshot(df, snap_dir, ts)
+        elif snapshot_archive.SNAPSHOT_ARCHIVE:
+            snapshot_archive.write_snapshot(df, snap_dir, ts)
+        else:
+            outdir = snap_dir / ts.strftime("%Y/%m/%d")
+            outdir.mkdir(parents=True, exist_ok=True)
+            snap_path = outdir / f"{ts.strftime('%H')}.csv"
+            atomic_io.write_csv(df, snap_path, index=False)
 
     # 카테고리별 마스터 파일
     master_csv = cdir / "details_master.csv"
-    header = not master_csv.exists()
-    df.to_csv(master_csv, mode="a", header=header, index=False, encoding="utf-8-sig")
+    with run_metrics.stage("master"):
+        atomic_io.append_csv(df, master_csv, index=False)
 
     # BJ 마스터 갱신
-    update_bj_master(df, cate_no, cate_name)
+    with run_metrics.stage("bj_master"):
+        update_bj_master(df, cate_no, cate_name)
 
 def update_bj_master(df: pd.DataFrame, cate_no: str, cate_name: str) -> None:
     """
-    user_id ↔ nickname 최신 맵과 first_seen / last_seen를 유지
+    user_id ↔ nickname 최신 맵과 first_seen / last_seen를 유지 (bj_master.sqlite, bj_store.py)
+    - 이번 스냅샷의 BJ만 upsert → 비용은 스냅샷 크기에 비례
+    - WRITE_BJ_MASTER_CSV="true"면 같은 행을 bj_master.log.csv에 덧붙이고,
+      로그가 bj_master.csv보다 커졌을 때만 bj_master.csv / bj_nick_history.csv 재기록 (bj_store.compact)
     """
     cdir = category_dir(cate_no, cate_name)
-    bj_csv = cdir / "bj_master.csv"
     need = ["captured_at_utc", "user_id", "user_nick"]
     if any(col not in df.columns for col in need):
         return
 
     hour = to_hour_utc_iso(df["captured_at_utc"]).iloc[0]
-    snap = (
-        df[["user_id", "user_nick"]]
-        .astype(str)
-        .drop_duplicates(subset=["user_id"])
-        .assign(first_seen=hour, last_seen=hour)
-    )
+    bj_store.upsert_snapshot(cdir, df, hour, log=WRITE_BJ_MASTER_CSV)
+    if WRITE_BJ_MASTER_CSV:
+        bj_store.compact(cdir)
+
+# ────────────────────────── 와이드 매트릭스 ──────────────────────────
+MATRIX_NEED = ["captured_at_utc", "user_id", "user_nick", "view_cnt"]
 
-    if bj_csv.exists():
-        m = pd.read_csv(bj_csv, dtype=str)
+def matrix_path(cate_no: str, cate_name: str) -> Path:
+    """설정(DETAILS_MATRIX_IDS / DETAILS_MATRIX_FORMAT)에 따른 카테고리 매트릭스 경로"""
+    path = category_dir(cate_no, cate_name) / ("details_matrix_ids.csv" if DETAILS_MATRIX_IDS else "details_matrix.csv")
+    return path.with_suffix(".npz") if DETAILS_MATRIX_FORMAT == "sparse" else path
+
+def matrix_state_path(matrix_csv: Path) -> Path:
+    """매트릭스 파일별 워터마크 (details_matrix.csv → details_matrix.csv.state.json, .npz도 각자)"""
+    return matrix_csv.with_name(matrix_csv.name + ".state.json")
+
+def _legacy_state(matrix_csv: Path) -> Dict[str, Any]:
+    """
+    이전 이름(details_matrix.state.json — .csv/.npz가 같이 쓰던 파일)의 워터마크.
+    다른 형식의 매트릭스 파일이 없을 때만(= 그 워터마크가 이 파일 것임이 확실할 때만) 사용,
+    애매하면 {} → 마스터 전체를 한 번 다시 반영 (같은 셀 덮어쓰기라 결과 동일)
+    """
+    other = matrix_csv.with_suffix(".csv" if matrix_csv.suffix == ".npz" else ".npz")
+    p = matrix_csv.with_suffix(".state.json")
+    if other.exists() or not matrix_csv.exists() or not p.exists():
+        return {}
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def load_matrix_state(matrix_csv: Path) -> Dict[str, Any]:
+    p = matrix_state_path(matrix_csv)
+    if not p.exists():
+        return _legacy_state(matrix_csv)
+    try:
+        state = json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if state.get("matrix", matrix_csv.name) == matrix_csv.name else {}
+
+def save_matrix_state(matrix_csv: Path, state: Dict[str, Any]) -> None:
+    p = matrix_state_path(matrix_csv)
+    state = {**state, "matrix": matrix_csv.name}
+    atomic_io.write_text(p, json.dumps(state, ensure_ascii=False, indent=2))
+
+def read_master_increment(master_csv: Path, state: Dict[str, Any]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    details_master.csv에서 워터마크 이후에 append된 행만 읽기
+    - state["offset"]: 지난번 반영 시점의 파일 크기(바이트)
+    - state["head"]  : 첫 데이터 행(같은 파일인지 확인용)
+    - state["last_captured_at"]: 반영된 마지막 captured_at_utc
+    파일이 새로 만들어졌거나 잘렸으면 처음부터 읽되 last_captured_at 이후 행만 남김
+    """
+    with open(master_csv, "rb") as f:
+        header = f.readline()
+        head = f.readline().decode("utf-8", errors="replace").rstrip("\r\n")
+        size = f.seek(0, io.SEEK_END)
+        offset = int(state.get("offset", 0))
+        same_file = state.get("head") == head and len(header) <= offset <= size
+        f.seek(offset if same_file else len(header))
+        body = f.read()
+
+    last = state.get("last_captured_at")
+    if body.strip():
+        df = pd.read_csv(io.BytesIO(header + body), encoding="utf-8-sig")
+        if not same_file and last and "captured_at_utc" in df.columns:
+            df = df[df["captured_at_utc"].astype(str) > last]
     else:
-        m = pd.DataFrame(columns=["user_id", "user_nick", "first_seen", "last_seen"])
+        df = pd.DataFrame(columns=header.decode("utf-8-sig").strip().split(","))
 
-    m = pd.concat([m, snap], ignore_index=True)
-    # 동일 user_id는 마지막 등장(최신 닉네임/last_seen)만 유지
-    m.sort_values(["user_id", "last_seen"], inplace=True)
-    m = m.drop_duplicates(subset=["user_id"], keep="last")
-    m.to_csv(bj_csv, index=False, encoding="utf-8-sig")
+    if "captured_at_utc" in df.columns and len(df):
+        last = max(str(last or ""), df["captured_at_utc"].astype(str).max())
+    return df, {"offset": size, "head": head, "last_captured_at": last}
+
+def master_end_state(master_csv: Path, last_captured_at: str) -> Dict[str, Any]:
+    """details_master.csv 현재 끝을 가리키는 워터마크 (매트릭스를 통째로 다시 만든 뒤 사용)"""
+    with open(master_csv, "rb") as f:
+        f.readline()
+        head = f.readline().decode("utf-8", errors="replace").rstrip("\r\n")
+        size = f.seek(0, io.SEEK_END)
+    return {"offset": size, "head": head, "last_captured_at": last_captured_at}
 
-# ────────────────────────── 와이드 매트릭스 ──────────────────────────
 def update_matrix_for_category(cate_no: str, cate_name: str) -> None:
     """
-    카테고리별 details_master.csv → details_matrix.csv
+    카테고리별 details_master.csv → details_matrix.csv (증분)
     행: captured_hour(UTC, ISO)
-    열: "user_id|user_nick"
+    열: "user_id|user_nick" (DETAILS_MATRIX_IDS면 details_matrix_ids.csv에 sid)
     값: view_cnt (Int64)
+    - 워터마크(<매트릭스 파일 이름>.state.json) 이후에 append된 행만 피벗해서 병합
+      (워터마크가 없으면 마스터 전체를 한 번 반영)
     - 동일 시간/동일 user_id는 '마지막 값' 유지
-    - 기존 파일이 있으면 같은 열/시간은 덮어쓰기(최신 스냅샷 우선)
+    - 기존 파일이 있으면 같은 셀은 덮어쓰기(최신 스냅샷 우선), 나머지 셀은 그대로
     """
     cdir = category_dir(cate_no, cate_name)
     master_csv = cdir / "details_master.csv"
-    matrix_csv = cdir / "details_matrix.csv"
+    matrix_csv = matrix_path(cate_no, cate_name)
 
     if not master_csv.exists():
         print(f"[{cate_no}] no master yet; skip matrix")
         return
 
-    df = pd.read_csv(master_csv, encoding="utf-8-sig")
-    need = ["captured_at_utc", "user_id", "user_nick", "view_cnt"]
-    if any(col not in df.columns for col in need):
+    with run_metrics.stage("parse"):
+        df, state = read_master_increment(master_csv, load_matrix_state(matrix_csv))
+    if any(col not in df.columns for col in MATRIX_NEED):
         print(f"[{cate_no}] master columns missing; skip matrix")
         return
+    if df.empty:
+        save_matrix_state(matrix_csv, state)
+        print(f"[{cate_no}] no new master rows; matrix unchanged")
+        return
 
-    df = df[need].copy()
+    df = df[MATRIX_NEED].copy()
     df["user_id"] = df["user_id"].astype(str)
     df["user_nick"] = df["user_nick"].astype(str)
     df["view_cnt"] = ensure_int64(df["view_cnt"])
     df["captured_hour"] = to_hour_utc_iso(df["captured_at_utc"])
-    df["col_label"] = df["user_id"] + "|" + df["user_nick"]
 
     # 시간 정렬 후 중복 제거(같은 시간/같은 BJ는 마지막 값)
-    df.sort_values(["captured_hour"], inplace=True)
+    df.sort_values(["captured_hour"], inplace=True, kind="stable")
     df = df.drop_duplicates(subset=["captured_hour", "user_id"], keep="last")
 
-    # 현재 스냅샷 → 와이드
-    cur = (
-        df.pivot_table(index="captured_hour", columns="col_label", values="view_cnt", aggfunc="last")
-        .astype("Int64")
-    )
-
-    # 기존 매트릭스 병합
-    if matrix_csv.exists():
-        old = pd.read_csv(matrix_csv, dtype=str)
-        if "captured_hour" not in old.columns:
-            first = old.columns[0]
-            old = old.rename(columns={first: "captured_hour"})
-        for c in old.columns:
-            if c == "captured_hour":
-                continue
-            old[c] = ensure_int64(old[c])
-        old = old.set_index("captured_hour")
-
-        # 행·열 합집합, 동일 셀은 cur(최신)로 덮어쓰기
-        wide = old.reindex(index=old.index.union(cur.index), columns=old.columns.union(cur.columns))
-        for col in cur.columns:
-            wide[col] = cur[col]
+    if DETAILS_MATRIX_IDS:
+        registry = streamer_registry.get_registry(REGISTRY_ROOT)
+        df["col_label"] = registry.encode(df["user_id"], df["user_nick"], df["captured_hour"])
+        registry.save()
     else:
-        wide = cur
+        df["col_label"] = df["user_id"] + "|" + df["user_nick"]
+
+    # 이번에 추가된 행 → 와이드
+    with run_metrics.stage("pivot"):
+        cur = (
+            df.pivot_table(index="captured_hour", columns="col_label", values="view_cnt", aggfunc="last")
+            .astype("Int64")
+        )
+
+    # 캐시된 매트릭스에 병합: 행·열 합집합, cur에 값이 있는 셀만 최신으로 덮어쓰기
+    # (워터마크는 매트릭스가 실제로 디스크에 기록된 뒤에 저장)
+    loader = load_matrix_sparse if matrix_csv.suffix == ".npz" else load_matrix_csv
+    matrix_cache.CACHE.upsert(
+        matrix_csv, cur, loader,
+        on_flush=lambda: save_matrix_state(matrix_csv, state),
+    )
+    print(f"updated matrix -> {matrix_csv} (+{len(df)} rows)")
 
-    # 시간 오름차순
-    wide = wide.sort_index()
-    out_df = wide.reset_index()
-    out_df.to_csv(matrix_csv, index=False, encoding="utf-8-sig")
-    print(f"updated matrix -> {matrix_csv}")
+def update_rolling_for_category(df: pd.DataFrame, cate_no: str, cate_name: str, ts_iso: str) -> None:
+    """
+    이번 스냅샷 → 카테고리별 스트리머 이동 구간 통계 (rolling_stats.py)
+    - id=user_id, label=user_nick, 같은 BJ가 여러 레코드면 마지막 값 (매트릭스와 같은 기준)
+    - 상태가 없으면 details_matrix.csv(있으면) 전체에서 처음 한 번 생성
+    """
+    if any(col not in df.columns for col in ["user_id", "user_nick", "view_cnt"]):
+        return
+    cur = df.drop_duplicates(subset=["user_id"], keep="last")
+    hour = to_hour_utc_iso(pd.Series([ts_iso])).iloc[0]
+    matrix_csv = category_dir(cate_no, cate_name) / "details_matrix.csv"
+    out = rolling_stats.update(matrix_csv, ["captured_hour"], hour, cur["user_id"].astype(str),
+                               cur["user_nick"].astype(str), ensure_int64(cur["view_cnt"]))
+    print(f"updated rolling -> {out}")
+
+def load_matrix_csv(path: Path) -> pd.DataFrame:
+    """기존 details_matrix.csv 로드 (index=captured_hour)"""
+    if not path.exists():
+        return pd.DataFrame(index=pd.Index([], name="captured_hour", dtype=object))
+    old = matrix_cache.read_wide_csv(path, ["captured_hour"])
+    if "captured_hour" not in old.columns:
+        first = old.columns[0]
+        old = old.rename(columns={first: "captured_hour"})
+    old = old.set_index("captured_hour")
+    if path.name == "details_matrix_ids.csv":
+        old.columns = old.columns.astype(int)  # sid 열
+    return old
+
+def load_matrix_sparse(path: Path) -> sparse_matrix.SparseMatrix:
+    """희소 매트릭스(.npz) 로드, 없으면 같은 이름의 기존 CSV에서 변환"""
+    return sparse_matrix.load_or_migrate(path, path.with_suffix(".csv"), load_matrix_csv)
 
 # ────────────────────────────── 메인 ──────────────────────────────
+@run_metrics.instrumented("collect_details")
 def main():
     now_iso = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
     all_preview = []  # 콘솔 프린트용
 
-    for cate_no, cate_name in CATEGORY_MAP.items():
-        items = fetch_all_for_category(cate_no)
+    # 네트워크 수집은 카테고리 전체를 동시에, 저장/매트릭스 갱신은 카테고리별로 차례대로
+    with run_metrics.stage("fetch"):
+        fetched = fetch_engine.run_concurrent(fetch_all_for_category, CATEGORY_MAP.keys())
+
+    for (cate_no, cate_name), items in zip(CATEGORY_MAP.items(), fetched):
         if not items:
             print(f"[{cate_no}] empty")
             continue
 
-        df = pd.DataFrame(items)
-
-        # 사용 컬럼만 (있으면 사용)
-        cols = ["broad_no", "broad_title", "user_id", "user_nick", "view_cnt", "broad_start", "hash_tags"]
-        cols = [c for c in cols if c in df.columns]
-        df = df[cols].copy()
+        with run_metrics.stage("normalize"):
+            df = details_frame(items)  # 사용 컬럼만 (있으면 사용)
+        run_metrics.count("rows", len(df))
 
         # 스냅샷 저장 + 카테고리 마스터 append + BJ 마스터 갱신
         save_snapshot_and_append_master(df, cate_no, cate_name, now_iso)
@@ -241,8 +377,21 @@ def main():
         df_prev["captured_at_utc"] = now_iso
         all_preview.append(df_prev)
 
-        # 카테고리별 와이드 매트릭스 갱신
-        update_matrix_for_category(cate_no, cate_name)
+        # 카테고리별 와이드 매트릭스 갱신 (DB 백엔드면 아래에서 한 번에 insert)
+        if not db_backend.enabled():
+            update_matrix_for_category(cate_no, cate_name)
+        if rolling_stats.UPDATE_ROLLING_STATS:
+            with run_metrics.stage("rolling"):
+                update_rolling_for_category(df, cate_no, cate_name, now_iso)
+
+    if db_backend.enabled() and all_preview:
+        # DB 백엔드: 모든 카테고리 long 행을 트랜잭션 하나로, 와이드 CSV는 `python db_backend.py export`
+        with run_metrics.stage("db"), db_backend.transaction(db_backend.SOOP_DB) as con:
+            n = 0
+            for part in all_preview:
+                part = part.assign(captured_hour=to_hour_utc_iso(part["captured_at_utc"]))
+                n += db_backend.insert_soop_details(con, part["category_no"].iloc[0], part)
+        print(f"inserted db -> {db_backend.SOOP_DB} ({n} rows)")
 
     # 콘솔 프리뷰
     if all_preview:
@@ -0,0 +1,138 @@
+# collector.py
+# -*- coding: utf-8 -*-
+"""
+통합 수집 데몬 (프로세스 하나에서 모든 수집 작업을 스케줄)
+- SOOP 카테고리: 매시 정각 (collect_categories.main + categories_matrix.csv 이번 시각 열 upsert)
+  데몬에서는 WRITE_WIDE_MATRIX 설정과 관계없이 항상 upsert (매트릭스는 matrix_cache에 상주 → 열 하나만 갱신)
+- SOOP 디테일  : UTC 00, 12시 (collect_details.main)
+- CHZZK        : 매시 정각 (collect_chzzk.main)
+- 하나의 asyncio 이벤트 루프가 스케줄을 관리하고, 각 작업은 스레드에서 실행
+  → pandas/numpy import, HTTP 커넥션 풀(http_client), 와이드 매트릭스 캐시(matrix_cache)는
+    프로세스 수명 동안 유지. 데몬에서는 매트릭스를 MATRIX_FLUSH_INTERVAL 초(기본 300)마다 기록
+  (그 사이 다른 프로세스가 매트릭스 파일을 바꾸면 matrix_cache가 다시 읽고 미기록 반영분만 재적용)
+- 작업마다 출력 경로 단위 락을 잡아서 같은 파일을 두 작업이 동시에 쓰지 않음
+  (이전 실행이 아직 끝나지 않았으면 이번 틱은 건너뜀)
+
+사용:
+  python collector.py                   # 데몬 실행 (저장소 루트에서)
+  python collector.py --once categories # 한 작업만 즉시 1회 실행
+  python collector.py --once all        # 모든 작업 즉시 1회 실행
+
+데이터 커밋/푸시는 하지 않음 (GitHub Actions 워크플로우 또는 호스트 cron 담당).
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+import collect_categories
+import collect_chzzk
+import collect_details
+import matrix_cache
+
+
+class Job:
+    """정시(minute=0) 기준 작업. hours=None 이면 매시."""
+
+    def __init__(self, name: str, fn: Callable[[], None], resource: str, hours: Optional[Sequence[int]] = None):
+        self.name = name
+        self.fn = fn
+        self.resource = resource
+        self.hours = sorted(set(hours)) if hours is not None else None
+
+    def next_run(self, now: datetime) -> datetime:
+        t = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        while self.hours is not None and t.hour not in self.hours:
+            t += timedelta(hours=1)
+        return t
+
+
+def run_categories() -> None:
+    """SOOP 카테고리 수집 (데몬에서는 와이드 매트릭스 upsert를 끄지 않음)"""
+    collect_categories.WRITE_WIDE_MATRIX = True
+    collect_categories.main()
+
+
+JOBS: List[Job] = [
+    Job("categories", run_categories, resource="data/soop/categories"),
+    Job("details", collect_details.main, resource="data/soop/details", hours=(0, 12)),
+    Job("chzzk", collect_chzzk.main, resource="data/chzzk"),
+]
+
+
+def _log(msg: str) -> None:
+    print(f"[{datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}] {msg}", flush=True)
+
+
+class Scheduler:
+    def __init__(self, jobs: Sequence[Job]):
+        self.jobs = list(jobs)
+        self.locks: Dict[str, asyncio.Lock] = {j.resource: asyncio.Lock() for j in self.jobs}
+
+    async def run_job(self, job: Job) -> None:
+        lock = self.locks[job.resource]
+        if lock.locked():
+            _log(f"{job.name}: previous run still holds {job.resource}; skip this tick")
+            return
+        async with lock:
+            _log(f"{job.name}: start")
+            try:
+                await asyncio.to_thread(job.fn)
+            except (Exception, SystemExit):
+                # 한 작업의 실패가 데몬 전체를 멈추지 않도록
+                _log(f"{job.name}: failed\n{traceback.format_exc()}")
+            else:
+                _log(f"{job.name}: done")
+
+    async def run_forever(self) -> None:
+        tasks: set = set()
+        due = {j.name: j.next_run(datetime.now(timezone.utc)) for j in self.jobs}
+        while True:
+            wake = min(due.values())
+            delay = (wake - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now = datetime.now(timezone.utc)
+            for job in self.jobs:
+                if due[job.name] <= now:
+                    t = asyncio.create_task(self.run_job(job))
+                    tasks.add(t)
+                    t.add_done_callback(tasks.discard)
+                    due[job.name] = job.next_run(now)
+
+
+async def run_once(names: Sequence[str]) -> None:
+    jobs = [j for j in JOBS if j.name in names]
+    sched = Scheduler(jobs)
+    await asyncio.gather(*(sched.run_job(j) for j in jobs))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="SOOP/CHZZK 통합 수집 데몬")
+    ap.add_argument("--once", choices=[j.name for j in JOBS] + ["all"],
+                    help="스케줄 없이 지정 작업을 즉시 1회 실행")
+    args = ap.parse_args(argv)
+
+    if args.once:
+        names = [j.name for j in JOBS] if args.once == "all" else [args.once]
+        asyncio.run(run_once(names))
+        return
+
+    matrix_cache.CACHE.flush_interval = float(os.getenv("MATRIX_FLUSH_INTERVAL", "300"))
+    for j in JOBS:
+        hours = "every hour" if j.hours is None else ",".join(f"{h:02d}" for h in j.hours)
+        _log(f"scheduled {j.name} ({hours} UTC)")
+    try:
+        asyncio.run(Scheduler(JOBS).run_forever())
+    except KeyboardInterrupt:
+        _log("stopped")
+    finally:
+        matrix_cache.CACHE.close()
+
+
+if __name__ == "__main__":
+    main()
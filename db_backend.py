@@ -0,0 +1,277 @@
+# db_backend.py
+# -*- coding: utf-8 -*-
+"""
+임베디드 DB(SQLite) 저장 백엔드 (옵션)
+- 환경변수 STORAGE_BACKEND="sqlite"면 수집기가 와이드 CSV를 다시 쓰는 대신
+  long 행을 인덱스가 걸린 테이블에 실행당 트랜잭션 하나로 insert
+  · SOOP : data/soop/soop.sqlite   (soop_categories, soop_details)
+  · CHZZK: data/chzzk/chzzk.sqlite (chzzk_categories, chzzk_details)
+- 같은 키(시각 + 행/열 키)는 INSERT OR REPLACE → 최근 값 우선 (CSV 경로와 같은 규칙)
+- 와이드 CSV는 요청할 때만 export (SQL로 키 순서대로 읽으면서 한 줄씩 피벗 → 전체를 메모리에 올리지 않음)
+  SQLite 열 개수 제한(기본 2000) 때문에 피벗 자체는 SQL 조건 집계 대신 정렬된 커서를 순회해서 만듦
+- 저널은 WAL: 커밋은 원자적, 실행 도중 죽어도 마지막 커밋 상태로 남음
+- bj_master는 이미 카테고리별 SQLite(bj_store.py)라 그대로 사용
+
+사용:
+  python db_backend.py export           # 모든 와이드 CSV를 DB에서 생성 (기존 경로에 기록)
+  python db_backend.py import           # 기존 와이드 CSV → DB 1회 이관 (테이블이 비어 있을 때만)
+"""
+
+from __future__ import annotations
+import argparse
+import contextlib
+import csv
+import itertools
+import os
+import pathlib
+import sqlite3
+from typing import Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+import atomic_io
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "csv").lower()
+
+SOOP_DB = pathlib.Path("data/soop/soop.sqlite")
+CHZZK_DB = pathlib.Path("data/chzzk/chzzk.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS soop_categories (
+    captured_hour TEXT NOT NULL,
+    category_no   TEXT NOT NULL,
+    category_name TEXT NOT NULL,
+    view_cnt      INTEGER NOT NULL,
+    PRIMARY KEY (category_no, category_name, captured_hour)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS soop_categories_hour ON soop_categories (captured_hour);
+
+CREATE TABLE IF NOT EXISTS soop_details (
+    category_no   TEXT NOT NULL,
+    captured_hour TEXT NOT NULL,
+    user_id       TEXT NOT NULL,
+    user_nick     TEXT NOT NULL,
+    view_cnt      INTEGER NOT NULL,
+    PRIMARY KEY (category_no, captured_hour, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS soop_details_user ON soop_details (category_no, user_id);
+
+CREATE TABLE IF NOT EXISTS chzzk_categories (
+    captured_hour  TEXT NOT NULL,
+    category_type  TEXT NOT NULL,
+    category_id    TEXT NOT NULL,
+    category_value TEXT NOT NULL,
+    viewers        INTEGER NOT NULL,
+    PRIMARY KEY (category_type, category_id, category_value, captured_hour)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS chzzk_categories_hour ON chzzk_categories (captured_hour);
+
+CREATE TABLE IF NOT EXISTS chzzk_details (
+    captured_hour TEXT NOT NULL,
+    channel_id    TEXT NOT NULL,
+    channel_name  TEXT NOT NULL,
+    viewers       INTEGER NOT NULL,
+    PRIMARY KEY (captured_hour, channel_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS chzzk_details_channel ON chzzk_details (channel_id);
+"""
+
+
+def enabled() -> bool:
+    return STORAGE_BACKEND == "sqlite"
+
+
+def connect(path: pathlib.Path) -> sqlite3.Connection:
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path, timeout=30)  # 데몬에서 SOOP 작업 둘이 겹치면 잠금 대기
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+@contextlib.contextmanager
+def transaction(path: pathlib.Path) -> Iterator[sqlite3.Connection]:
+    """트랜잭션 하나 (정상 종료 시 commit, 예외 시 rollback)"""
+    con = connect(path)
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+def _text(s: pd.Series) -> List[str]:
+    return ["" if v is None or (isinstance(v, float) and v != v) else str(v) for v in s]
+
+
+def _ints(s: pd.Series) -> List[int]:
+    return [int(v) for v in pd.to_numeric(s, errors="coerce").fillna(0)]
+
+
+# ======================
+# 쓰기 (수집기)
+# ======================
+def insert_soop_categories(con: sqlite3.Connection, long: pd.DataFrame) -> int:
+    """long 행(captured_hour, category_no, category_name, view_cnt; category_store.normalize_snapshot 모양)"""
+    rows = list(zip(_text(long["captured_hour"]), _text(long["category_no"]),
+                    _text(long["category_name"]), _ints(long["view_cnt"])))
+    con.executemany("INSERT OR REPLACE INTO soop_categories VALUES (?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def insert_soop_details(con: sqlite3.Connection, cate_no: str, long: pd.DataFrame) -> int:
+    """long 행(captured_hour, user_id, user_nick, view_cnt) — 같은 시각/같은 BJ는 뒤 행 우선"""
+    rows = list(zip(itertools.repeat(cate_no), _text(long["captured_hour"]), _text(long["user_id"]),
+                    _text(long["user_nick"]), _ints(long["view_cnt"])))
+    con.executemany("INSERT OR REPLACE INTO soop_details VALUES (?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def replace_chzzk_categories(con: sqlite3.Connection, hour: str, counts: pd.Series) -> int:
+    """한 시각의 카테고리 집계(index=(categoryType, categoryId, categoryValue))로 그 시각 행 전체 교체"""
+    con.execute("DELETE FROM chzzk_categories WHERE captured_hour = ?", (hour,))
+    keys = counts.index.to_frame(index=False)
+    rows = list(zip(itertools.repeat(hour), *(_text(keys[c]) for c in keys.columns), _ints(counts)))
+    con.executemany("INSERT OR REPLACE INTO chzzk_categories VALUES (?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def insert_chzzk_details(con: sqlite3.Connection, hour: str, top: pd.DataFrame) -> int:
+    """한 시각의 TOP 채널(channelId, channelName, concurrentUserCount)"""
+    rows = list(zip(itertools.repeat(hour), _text(top["channelId"]), _text(top["channelName"].astype(str).str.strip()),
+                    _ints(top["concurrentUserCount"])))
+    con.executemany("INSERT OR REPLACE INTO chzzk_details VALUES (?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+# ======================
+# export (정렬된 커서 → 와이드 CSV)
+# ======================
+def export_wide(con: sqlite3.Connection, out: pathlib.Path, table: str, row_cols: Sequence[str],
+                col_expr: str, value_col: str, header: Sequence[str],
+                where: str = "", params: Sequence = ()) -> Optional[pathlib.Path]:
+    """
+    table을 (row_cols) × col_expr 와이드로 out에 기록 (결측은 빈칸).
+    열 라벨/행 키 모두 오름차순, 같은 셀이 여러 행이면 정렬상 마지막 값.
+    행이 하나도 없으면 기존 파일을 건드리지 않고 None.
+    """
+    cond = f"WHERE {where}" if where else ""
+    cols = [r[0] for r in con.execute(f"SELECT DISTINCT {col_expr} FROM {table} {cond} ORDER BY 1", params)]
+    if not cols:
+        return None
+    pos = {c: j for j, c in enumerate(cols)}
+    keys = ", ".join(row_cols)
+    cur = con.execute(
+        f"SELECT {keys}, {col_expr}, {value_col} FROM {table} {cond} ORDER BY {keys}, {col_expr}", params)
+    n = len(row_cols)
+    with atomic_io.atomic_open(out, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow([*header, *cols])
+        for key, group in itertools.groupby(cur, key=lambda r: r[:n]):
+            cells = [""] * len(cols)
+            for r in group:
+                cells[pos[r[n]]] = r[n + 1]
+            w.writerow([*key, *cells])
+    return out
+
+
+def export_soop(con: sqlite3.Connection) -> List[Optional[pathlib.Path]]:
+    import collect_details  # 카테고리 폴더/매트릭스 경로 규칙 재사용
+
+    written = [export_wide(con, pathlib.Path("data/soop/categories_matrix.csv"), "soop_categories",
+                           ["category_no", "category_name"], "captured_hour", "view_cnt",
+                           ["category_no", "category_name"])]
+    for cate_no, cate_name in collect_details.CATEGORY_MAP.items():
+        out = collect_details.category_dir(cate_no, cate_name) / "details_matrix.csv"
+        written.append(export_wide(con, out, "soop_details", ["captured_hour"], "user_id || '|' || user_nick",
+                                   "view_cnt", ["captured_hour"], "category_no = ?", (cate_no,)))
+    return written
+
+
+def export_chzzk(con: sqlite3.Connection) -> List[Optional[pathlib.Path]]:
+    root = CHZZK_DB.parent
+    keys = ["category_type", "category_id", "category_value"]
+    header = ["categoryType", "categoryId", "categoryValue"]
+    return [
+        export_wide(con, root / "categories_matrix.csv", "chzzk_categories", keys, "captured_hour", "viewers", header),
+        export_wide(con, root / "game_categories_matrix.csv", "chzzk_categories", keys, "captured_hour", "viewers",
+                    header, "category_type = 'GAME'"),
+        export_wide(con, root / "details_matrix.csv", "chzzk_details", ["captured_hour"], "channel_name", "viewers",
+                    ["captured_hour"]),
+    ]
+
+
+# ======================
+# 기존 와이드 CSV → DB (1회 이관)
+# ======================
+def _melt(path: pathlib.Path, id_cols: Sequence[str], var_name: str) -> Optional[pd.DataFrame]:
+    if not path.exists():
+        return None
+    wide = pd.read_csv(path, dtype=str)
+    if not set(id_cols).issubset(wide.columns):
+        return None
+    long = wide.melt(id_vars=list(id_cols), var_name=var_name, value_name="value").dropna(subset=["value"])
+    return long
+
+
+def _empty(con: sqlite3.Connection, table: str, where: str = "", params: Sequence = ()) -> bool:
+    cond = f"WHERE {where}" if where else ""
+    return con.execute(f"SELECT 1 FROM {table} {cond} LIMIT 1", params).fetchone() is None
+
+
+def import_soop(con: sqlite3.Connection) -> int:
+    import collect_details
+
+    n = 0
+    if _empty(con, "soop_categories"):
+        long = _melt(pathlib.Path("data/soop/categories_matrix.csv"), ["category_no", "category_name"], "captured_hour")
+        if long is not None:
+            long["category_no"] = long["category_no"].str.zfill(8)
+            n += insert_soop_categories(con, long.rename(columns={"value": "view_cnt"}))
+    for cate_no, cate_name in collect_details.CATEGORY_MAP.items():
+        if not _empty(con, "soop_details", "category_no = ?", (cate_no,)):
+            continue
+        path = collect_details.category_dir(cate_no, cate_name) / "details_matrix.csv"
+        long = _melt(path, ["captured_hour"], "label")
+        if long is not None:
+            label = long["label"].str.split("|", n=1, expand=True).reindex(columns=[0, 1])
+            long["user_id"], long["user_nick"] = label[0], label[1].fillna("")
+            n += insert_soop_details(con, cate_no, long.rename(columns={"value": "view_cnt"}))
+    return n
+
+
+def import_chzzk(con: sqlite3.Connection) -> int:
+    # CHZZK 디테일 매트릭스는 열이 channelName뿐이라(channelId 없음) 이관하지 않음
+    if not _empty(con, "chzzk_categories"):
+        return 0
+    long = _melt(CHZZK_DB.parent / "categories_matrix.csv", ["categoryType", "categoryId", "categoryValue"],
+                 "captured_hour")
+    if long is None:
+        return 0
+    rows = list(zip(_text(long["captured_hour"]), _text(long["categoryType"]), _text(long["categoryId"]),
+                    _text(long["categoryValue"]), _ints(long["value"])))
+    con.executemany("INSERT OR REPLACE INTO chzzk_categories VALUES (?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="SQLite 저장 백엔드 export/import")
+    ap.add_argument("cmd", choices=["export", "import"])
+    args = ap.parse_args(argv)
+
+    for db, export, imp in ((SOOP_DB, export_soop, import_soop), (CHZZK_DB, export_chzzk, import_chzzk)):
+        if args.cmd == "export":
+            if not db.exists():
+                continue
+            with transaction(db) as con:
+                for out in filter(None, export(con)):
+                    print("written ->", out)
+        else:
+            with transaction(db) as con:
+                print(f"imported {imp(con)} rows -> {db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# fetch_engine.py
+# -*- coding: utf-8 -*-
+"""
+공용 페이지 수집 엔진 (스레드 풀)
+- HTTP 요청 자체(공유 세션, 호스트별 속도 제한, 재시도)는 http_client.py 담당
+- is_more 방식 페이지네이션은 1페이지를 먼저 받고, 받은 페이지 수만큼(최대 FETCH_CONCURRENCY) 겹쳐서 요청
+  (마지막 페이지(is_more=False)가 나오면 새 요청 중단 → 불필요한 요청은 이미 나간 것뿐)
+- 카테고리 여러 개도 run_concurrent()로 동시에 수집 (요청 총량은 호스트별 토큰 버킷이 제한)
+  run_concurrent 안에서 fetch_paged를 부르면 스레드는 최대 FETCH_CONCURRENCY² → 세션 커넥션 풀도 그만큼(http_client.POOL_MAXSIZE)
+- 작업은 제출하는 스레드의 contextvars 컨텍스트 사본에서 실행 (run_metrics 계측이 워커 스레드에도 이어짐)
+
+환경변수:
+  FETCH_CONCURRENCY  동시 요청 수 (기본 4)
+"""
+
+from __future__ import annotations
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Tuple, TypeVar
+
+from http_client import FETCH_CONCURRENCY
+
+T = TypeVar("T")
+R = TypeVar("R")
+Page = Tuple[List[T], bool]  # (레코드, is_more)
+
+
+# ======================
+# 동시 수집
+# ======================
+def _map(ex: ThreadPoolExecutor, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+    """ex.map과 같지만 호출마다 현재 컨텍스트 사본에서 실행"""
+    futures = [ex.submit(contextvars.copy_context().run, fn, x) for x in items]
+    return [f.result() for f in futures]
+
+
+def fetch_paged(fetch_page: Callable[[int], Page[T]], concurrency: int = FETCH_CONCURRENCY) -> List[T]:
+    """
+    fetch_page(page_no) -> (records, is_more) 를 페이지 순서대로 이어붙여 반환.
+    - 1페이지는 혼자 요청 (한 페이지짜리 목록에 추가 요청 없음)
+    - 그 뒤로는 동시에 요청하는 페이지 수를 받은 페이지 수만큼(최대 concurrency) 늘려가며 요청
+      → 짧은 목록에서 끝 페이지 뒤로 나가는 헛요청이 적음
+    - is_more=False 페이지(end)가 나오면 새 페이지는 더 요청하지 않고, end 뒤쪽 요청은 기다리지 않음
+      (시작 안 한 요청은 취소, 이미 나간 요청은 결과든 예외든 버림)
+    - 실패한 페이지가 나오면 새 페이지는 더 요청하지 않고, 나가 있는 요청만 마저 받음
+      → 그 페이지가 end 뒤쪽이면 무시, 아니면 가장 앞 페이지의 예외를 그대로 올림
+    """
+    records, is_more = fetch_page(1)
+    if not is_more:
+        return list(records)
+    pages: Dict[int, List[T]] = {1: records}
+    failed: Dict[int, BaseException] = {}
+    end = None  # 처음으로 is_more=False 인 페이지
+    nxt = 2
+    pending: Dict[Future, int] = {}
+    ex = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        while True:
+            while end is None and not failed and len(pending) < min(concurrency, len(pages)):
+                pending[ex.submit(contextvars.copy_context().run, fetch_page, nxt)] = nxt
+                nxt += 1
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                page = pending.pop(f)
+                if end is not None and page > end:
+                    continue
+                try:
+                    records, is_more = f.result()
+                except Exception as e:
+                    failed[page] = e
+                    continue
+                pages[page] = records
+                if not is_more and (end is None or page < end):
+                    end = page
+            if end is not None:
+                for f in [f for f, page in pending.items() if page > end]:
+                    f.cancel()
+                    del pending[f]
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+    first_failed = min(failed, default=None)
+    if first_failed is not None and (end is None or first_failed <= end):
+        raise failed[first_failed]
+    rows: List[T] = []
+    for page in range(1, end + 1):
+        rows.extend(pages[page])
+    return rows
+
+
+def run_concurrent(fn: Callable[[T], R], items: Iterable[T], concurrency: int = FETCH_CONCURRENCY) -> List[R]:
+    """items 각각에 fn을 동시에 적용, 결과는 입력 순서대로"""
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as ex:
+        return _map(ex, fn, items)
@@ -0,0 +1,198 @@
+# http_client.py
+# -*- coding: utf-8 -*-
+"""
+수집기 공용 HTTP 클라이언트
+- 프로세스 전체에서 requests.Session 하나를 공유 (keep-alive 커넥션 풀 → TLS 핸드셰이크 절감)
+- 호스트별 토큰 버킷: 429/5xx를 받으면 속도를 절반으로 낮추고, 성공이 이어지면 기본 속도까지 천천히 회복
+- 재시도: 연결 오류/타임아웃/429/5xx는 지수 백오프 + full jitter, Retry-After 헤더가 있으면 그 값을 우선
+  get_parsed는 본문 해석 실패(ValueError, 깨진 JSON)도 같은 백오프로 재시도
+- 그 밖의 4xx는 바로 예외(raise_for_status)
+- run_metrics 계측: http(요청 시간), http_requests / http_retries / http_status_<코드> / http_parse_errors, pages / bytes_received
+
+환경변수:
+  FETCH_RATE         호스트별 기본 초당 요청 수 (기본 5)
+  FETCH_BURST        토큰 버킷 크기 (기본 FETCH_CONCURRENCY)
+  HTTP_RETRIES       최대 시도 횟수 (기본 5)
+  HTTP_BACKOFF_BASE  첫 백오프(초) (기본 1.0)
+  HTTP_BACKOFF_MAX   백오프 상한(초) (기본 10)
+"""
+
+from __future__ import annotations
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import run_metrics
+
+T = TypeVar("T")
+
+FETCH_CONCURRENCY = max(1, int(os.getenv("FETCH_CONCURRENCY", "4")))
+FETCH_RATE = float(os.getenv("FETCH_RATE", "5"))
+FETCH_BURST = max(1, int(os.getenv("FETCH_BURST", str(FETCH_CONCURRENCY))))
+# run_concurrent(카테고리) × fetch_paged(페이지) 중첩 시 동시 스레드 최대 FETCH_CONCURRENCY²
+POOL_MAXSIZE = FETCH_CONCURRENCY * FETCH_CONCURRENCY
+HTTP_RETRIES = max(1, int(os.getenv("HTTP_RETRIES", "5")))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "1.0"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "10"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MIN_RATE = 0.2  # 아무리 느려져도 5초에 1번은 허용
+
+
+# ======================
+# 호스트별 적응형 토큰 버킷
+# ======================
+class TokenBucket:
+    """스레드 안전 토큰 버킷: rate 개/초로 채워지고 최대 burst 개까지 쌓임"""
+
+    def __init__(self, rate: float, burst: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self) -> None:
+        """429/5xx: 속도 절반, 쌓인 토큰 비움"""
+        if self.base_rate <= 0:
+            return
+        with self._lock:
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self._tokens = 0.0
+
+    def reward(self) -> None:
+        """성공: 기본 속도의 10%씩 회복"""
+        if self.base_rate <= 0 or self.rate >= self.base_rate:
+            return
+        with self._lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+
+_session: Optional[requests.Session] = None
+_buckets: Dict[str, TokenBucket] = {}
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """프로세스 공용 세션 (중첩 수집의 최대 동시 요청 수만큼 커넥션을 유지)"""
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def bucket_for(url: str) -> TokenBucket:
+    host = urlsplit(url).netloc
+    with _lock:
+        b = _buckets.get(host)
+        if b is None:
+            b = _buckets[host] = TokenBucket(FETCH_RATE, FETCH_BURST)
+        return b
+
+
+# ======================
+# 재시도
+# ======================
+def retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    """Retry-After 헤더(초 또는 HTTP-date) → 대기 초, 없거나 해석 불가면 None"""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_seconds(attempt: int) -> float:
+    """지수 백오프 + full jitter: U(0, min(max, base * 2^attempt))"""
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+def get_parsed(url: str, parse: Callable[[requests.Response], T], retries: int = HTTP_RETRIES, **kwargs) -> T:
+    """
+    공용 세션으로 GET (호스트별 속도 제한 + 재시도) 후 parse(응답) 결과를 반환.
+    - 본문 해석 실패(ValueError: 잘린/깨진 JSON 등)도 연결 오류처럼 백오프 후 재시도
+    - 재시도 불가 오류나 마지막 시도 실패는 예외로 올림
+    """
+    bucket = bucket_for(url)
+    for attempt in range(retries):
+        bucket.acquire()
+        run_metrics.count("http_requests")
+        if attempt:
+            run_metrics.count("http_retries")
+        try:
+            with run_metrics.stage("http"):
+                r = get_session().get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            run_metrics.count("http_errors")
+            if attempt == retries - 1:
+                raise
+            time.sleep(backoff_seconds(attempt))
+            continue
+
+        if r.status_code in RETRY_STATUS:
+            run_metrics.count(f"http_status_{r.status_code}")
+            bucket.penalize()
+            if attempt == retries - 1:
+                r.raise_for_status()
+            wait = retry_after_seconds(r)
+            time.sleep(min(HTTP_BACKOFF_MAX * 6, wait) if wait is not None else backoff_seconds(attempt))
+            continue
+
+        r.raise_for_status()
+        bucket.reward()
+        run_metrics.count("pages")
+        run_metrics.count("bytes_received", len(r.content))
+        try:
+            return parse(r)
+        except ValueError:
+            run_metrics.count("http_parse_errors")
+            if attempt == retries - 1:
+                raise
+            time.sleep(backoff_seconds(attempt))
+    raise RuntimeError("unreachable")
+
+
+def get(url: str, retries: int = HTTP_RETRIES, **kwargs) -> requests.Response:
+    """
+    공용 세션으로 GET (호스트별 속도 제한 + 재시도).
+    성공(2xx) 응답을 반환하고, 재시도 불가 오류나 마지막 시도 실패는 예외로 올림.
+    본문을 해석하는 호출은 get_parsed를 써야 해석 실패도 재시도됨.
+    """
+    return get_parsed(url, lambda r: r, retries, **kwargs)
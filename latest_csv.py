@@ -0,0 +1,104 @@
+# latest_csv.py
+# -*- coding: utf-8 -*-
+"""
+최신 시각 열 읽기/랭킹 기록 (표준 라이브러리만: csv, array — pandas/numpy import 없음)
+- 분석 스크립트(analyze_*.py)와 matrix_cache.read_latest가 공유하는 가벼운 코어
+  → 매시 cron의 분석 단계는 인터프리터 + 이 모듈만 올라옴 (pandas import 수백 ms 절약)
+- 사이드카 <매트릭스>.latest.csv(키 열 + 최신 시간 열)가 매트릭스 헤더의 최신 시간 이상이면 사이드카만,
+  아니면 매트릭스에서 키 열과 최신 열만 골라 읽음 (csv.reader 한 번 훑기, 값 변환 없음)
+- 값 열은 array('q')로 변환 (pd.to_numeric(errors="coerce").fillna(0)과 같은 규칙: 숫자 아니면 0)
+- 랭킹 정렬은 안정 정렬 (값이 같으면 파일 순서 유지)
+- 기록은 atomic_io.atomic_open (utf-8-sig, os.linesep 줄바꿈 — DataFrame.to_csv와 같은 모양)
+
+사용 예:
+  cols, rows, hour = latest_csv.read_latest_rows(path, ["category_no", "category_name"])
+"""
+
+from __future__ import annotations
+import csv
+import math
+import os
+import pathlib
+import re
+from array import array
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import atomic_io
+
+HOUR_COL_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:00:00Z$")  # ISO 정시 (고정 폭 → 문자열 순서 = 시간 순서)
+
+
+def latest_path(path: pathlib.Path) -> pathlib.Path:
+    """categories_matrix.csv → categories_matrix.latest.csv"""
+    path = pathlib.Path(path)
+    return path.with_name(f"{path.stem}.latest.csv")
+
+
+def read_header(path: pathlib.Path) -> List[str]:
+    """CSV 첫 줄만 읽어 열 이름 목록 (본문은 읽지 않음)"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def latest_hour(header: Sequence[str]) -> Optional[str]:
+    return max((c for c in header if HOUR_COL_RE.match(c)), default=None)
+
+
+def read_latest_rows(path: pathlib.Path, key_cols: Sequence[str]
+                     ) -> Tuple[Optional[List[str]], Optional[List[List[str]]], Optional[str]]:
+    """
+    와이드 매트릭스의 (키 열 + 최신 시간 열) → (열 이름, 행(전부 str), 최신 열 이름). 없으면 (None, None, None).
+    - 키 열은 파일에 있는 것만 (파일 순서), 마지막 열이 최신 시간
+    """
+    path = pathlib.Path(path)
+    side = latest_path(path)
+    side_header = read_header(side) if side.exists() else []
+    main_header = read_header(path) if path.exists() else []
+    side_hour, main_hour = latest_hour(side_header), latest_hour(main_header)
+
+    if side_hour is not None and (main_hour is None or side_hour >= main_hour):
+        src, header, hour = side, side_header, side_hour
+    elif main_hour is not None:
+        src, header, hour = path, main_header, main_hour
+    else:
+        return None, None, None
+
+    cols = [c for c in header if c in key_cols] + [hour]
+    pos = [header.index(c) for c in cols]
+    with open(src, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        rows = [[r[i] for i in pos] for r in reader if r]
+    return cols, rows, hour
+
+
+def to_int(text: str) -> int:
+    """'123' / '123.0' → 123, 빈값·숫자 아님 → 0"""
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            v = float(text)
+        except ValueError:
+            return 0
+        return int(v) if math.isfinite(v) else 0
+
+
+def int_column(rows: Sequence[Sequence[str]], col: int = -1) -> array:
+    """rows의 col 열 → array('q')"""
+    return array("q", (to_int(r[col]) for r in rows))
+
+
+def rank_desc(values: Sequence[int]) -> List[int]:
+    """값 내림차순 행 번호 (같은 값은 원래 순서 유지)"""
+    return sorted(range(len(values)), key=values.__getitem__, reverse=True)
+
+
+def write_rows(path: pathlib.Path, header: Sequence[str], rows: Iterable[Sequence]) -> pathlib.Path:
+    """header + rows를 utf-8-sig CSV로 원자적 기록"""
+    path = pathlib.Path(path)
+    with atomic_io.atomic_open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f, lineterminator=os.linesep)
+        w.writerow(header)
+        w.writerows(rows)
+    return path
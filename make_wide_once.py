@@ -1,29 +1,156 @@
 # make_wide_once.py
+# -*- coding: utf-8 -*-
+"""
+SOOP 카테고리 와이드 매트릭스 1회 재생성
+- 기본: categories_timeseries.csv 전체를 읽어 pivot_table (기존 방식, 메모리 ∝ 전체 이력)
+- --stream: 청크 단위 스트리밍 재생성 (메모리 ∝ 청크 + 카테고리×시간 배열)
+  1) 1차 패스: 청크를 돌며 (category_no, category_name) 행 키와 시간 열 키만 수집
+  2) (행 × 시간) int64 배열을 임시 파일(np.memmap)에 미리 잡고,
+     2차 패스에서 청크 값을 위치로 scatter (같은 셀은 나중 값 우선)
+  3) 행 블록 단위로 CSV 기록 → 출력도 한 번에 메모리에 올리지 않음
+  출력 모양은 collect_categories / category_store와 같음
+  (category_no, category_name, 시간 열 'YYYY-MM-DDTHH:00:00Z', 결측은 빈칸)
+
+사용:
+  python make_wide_once.py                                   # 기존 방식
+  python make_wide_once.py --stream                          # timeseries CSV 스트리밍
+  python make_wide_once.py --stream --source snapshots       # 시간별 스냅샷 트리(+아카이브)에서
+  python make_wide_once.py --stream --source store           # long 스토어(categories_store) 일 파일에서
+  python make_wide_once.py --stream --chunksize 100000 --block-rows 128
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import pathlib
+import tempfile
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
-from pathlib import Path
 
-ts_csv = Path("data/soop/categories_timeseries.csv")
-out_csv = Path("data/soop/categories_matrix.csv")
+import atomic_io
+import category_store
+import snapshot_archive
+
+ts_csv = pathlib.Path("data/soop/categories_timeseries.csv")
+out_csv = pathlib.Path("data/soop/categories_matrix.csv")
+snap_root = pathlib.Path("data/soop/categories")
+
+READ_COLS = ["captured_at_utc", "category_no", "category_name", "view_cnt"]
+MISSING = -1  # view_cnt는 0 이상이라 결측 표시로 사용
+
+
+# ======================
+# 기존 방식 (전체 로드)
+# ======================
+def rebuild_in_memory() -> pathlib.Path:
+    if not ts_csv.exists():
+        raise SystemExit("timeseries csv가 없습니다.")
+
+    df = pd.read_csv(ts_csv, encoding="utf-8-sig")
+    df["captured_at_utc"] = pd.to_datetime(df["captured_at_utc"], utc=True).dt.floor("H").astype(str)
+    df["view_cnt"] = pd.to_numeric(df["view_cnt"], errors="coerce").fillna(0).astype(int)
+
+    wide = df.pivot_table(index="category_no",
+                          columns="captured_at_utc",
+                          values="view_cnt",
+                          aggfunc="last").sort_index()
+
+    name_map = (
+        df.sort_values("captured_at_utc")
+          .drop_duplicates(["category_no"], keep="last")
+          .set_index("category_no")["category_name"]
+    )
+    wide.insert(0, "category_name", name_map.reindex(wide.index).fillna(""))
+
+    atomic_io.write_csv(wide, out_csv)
+    return out_csv
+
+
+# ======================
+# 스트리밍 방식
+# ======================
+def iter_chunks(source: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """원본을 청크 단위 long 행(captured_hour, category_no, category_name, view_cnt)으로"""
+    if source == "timeseries":
+        if not ts_csv.exists():
+            raise SystemExit("timeseries csv가 없습니다.")
+        reader = pd.read_csv(ts_csv, encoding="utf-8-sig", usecols=READ_COLS,
+                             dtype={"category_no": str, "category_name": str}, chunksize=chunksize)
+        for chunk in reader:
+            yield category_store.normalize_snapshot(chunk)
+    elif source == "snapshots":
+        # 아카이브(있으면) 먼저, 그다음 아직 접어넣지 않은 시간별 CSV → 같은 시간이면 CSV가 나중(우선)
+        for _, df in snapshot_archive.iter_hours(snap_root):
+            yield category_store.normalize_snapshot(df[READ_COLS])
+        for p in sorted(snap_root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]/[0-9][0-9].csv")):
+            df = pd.read_csv(p, encoding="utf-8-sig", usecols=READ_COLS,
+                             dtype={"category_no": str, "category_name": str})
+            yield category_store.normalize_snapshot(df)
+    elif source == "store":
+        # long 스토어 일 파일 하나 = 청크 하나 (chunksize 무시)
+        if category_store.is_empty():
+            raise SystemExit("category_store가 비어 있습니다.")
+        yield from category_store.iter_days()
+    else:
+        raise ValueError(f"unknown source: {source}")
+
+
+def _row_key(chunk: pd.DataFrame) -> pd.Series:
+    return chunk["category_no"] + "\x1f" + chunk["category_name"]
+
+
+def rebuild_streaming(source: str = "timeseries", chunksize: int = 200_000, block_rows: int = 256) -> pathlib.Path:
+    # 1차 패스: 행/열 키만
+    row_keys, hours = set(), set()
+    for chunk in iter_chunks(source, chunksize):
+        row_keys.update(_row_key(chunk).unique())
+        hours.update(chunk["captured_hour"].unique())
+    rows = pd.Index(sorted(row_keys, key=lambda k: tuple(k.split("\x1f", 1))))
+    cols = pd.Index(sorted(hours))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        values = np.lib.format.open_memmap(pathlib.Path(tmp) / "wide.npy", mode="w+",
+                                           dtype=np.int64, shape=(len(rows), len(cols)))
+        values[:] = MISSING
+
+        # 2차 패스: 위치로 scatter (청크 안 중복은 마지막 값만 남겨서 순서대로 덮어씀)
+        for chunk in iter_chunks(source, chunksize):
+            ri = rows.get_indexer(_row_key(chunk))
+            ci = cols.get_indexer(chunk["captured_hour"])
+            pos = pd.DataFrame({"r": ri, "c": ci, "v": chunk["view_cnt"].to_numpy()})
+            pos = pos.drop_duplicates(subset=["r", "c"], keep="last")
+            values[pos["r"].to_numpy(), pos["c"].to_numpy()] = pos["v"].to_numpy()
+
+        # 행 블록 단위 기록
+        with atomic_io.atomic_open(out_csv, "w", newline="", encoding="utf-8-sig") as f:
+            w = csv.writer(f, lineterminator="\n")
+            w.writerow(["category_no", "category_name", *cols])
+            for lo in range(0, len(rows), block_rows):
+                block = np.asarray(values[lo:lo + block_rows])
+                text = np.where(block == MISSING, "", block.astype(str))
+                for key, cells in zip(rows[lo:lo + block_rows], text):
+                    w.writerow([*key.split("\x1f", 1), *cells])
+        del values
+    return out_csv
 
-if not ts_csv.exists():
-    raise SystemExit("timeseries csv가 없습니다.")
 
-df = pd.read_csv(ts_csv, encoding="utf-8-sig")
-df["captured_at_utc"] = pd.to_datetime(df["captured_at_utc"], utc=True).dt.floor("H").astype(str)
-df["view_cnt"] = pd.to_numeric(df["view_cnt"], errors="coerce").fillna(0).astype(int)
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="SOOP 카테고리 와이드 매트릭스 재생성")
+    ap.add_argument("--stream", action="store_true", help="청크 단위 스트리밍 재생성")
+    ap.add_argument("--source", choices=["timeseries", "snapshots", "store"], default="timeseries",
+                    help="--stream 원본 (기본: categories_timeseries.csv)")
+    ap.add_argument("--chunksize", type=int, default=200_000, help="청크당 행 수")
+    ap.add_argument("--block-rows", type=int, default=256, help="출력 블록당 카테고리 행 수")
+    args = ap.parse_args(argv)
 
-wide = df.pivot_table(index="category_no",
-                      columns="captured_at_utc",
-                      values="view_cnt",
-                      aggfunc="last").sort_index()
+    if args.stream:
+        out = rebuild_streaming(args.source, args.chunksize, args.block_rows)
+    else:
+        out = rebuild_in_memory()
+    print("written ->", out)
 
-name_map = (
-    df.sort_values("captured_at_utc")
-      .drop_duplicates(["category_no"], keep="last")
-      .set_index("category_no")["category_name"]
-)
-wide.insert(0, "category_name", name_map.reindex(wide.index).fillna(""))
 
-out_csv.parent.mkdir(parents=True, exist_ok=True)
-wide.to_csv(out_csv, encoding="utf-8-sig")
-print("written ->", out_csv)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+# market_share.py
+# -*- coding: utf-8 -*-
+"""
+SOOP ↔ CHZZK 통합 카테고리 시청자 타임라인 / 점유율
+- 매핑 표: data/market/category_map.<platform>.csv (플랫폼별 파일, 읽을 때는 두 파일을 합쳐 사용)
+    platform, category_key, category_name, unified_id, unified_name, source
+    · category_key: SOOP category_no / CHZZK categoryType|categoryId
+    · 처음 보는 카테고리는 이름 정규화(NFKC, 소문자, 공백·구두점 제거) + ALIASES로 다른 플랫폼 카테고리와 자동 연결(source=auto),
+      짝이 없으면 자기 자신이 통합 카테고리(source=self, unified_id=<platform>:<key>)
+    · 손으로 고친 행(unified_id/unified_name 수정, source=manual)은 자동 갱신이 덮어쓰지 않음
+      → 고친 뒤 `python market_share.py rebuild`로 과거 시각도 다시 계산
+    · 이전 형식 category_map.csv(두 플랫폼 한 파일)가 있으면 함께 읽고, 다음 저장 때 플랫폼별 파일로 옮긴 뒤 삭제
+    · 프로세스 안에서 캐시 (파일이 바뀌면 다시 읽음)
+- 플랫폼별 시청자 매트릭스 (행: unified_id, unified_name / 열: captured_hour)
+    data/market/viewers.soop.csv, data/market/viewers.chzzk.csv
+    · 수집기가 UPDATE_MARKET_SHARE="true"면 매 실행 뒤 update(platform, 시각, ...)로 자기 플랫폼 파일의 그 시각 열만 갱신
+      → 플랫폼별 워크플로가 따로 커밋해도 같은 파일을 고치지 않음 (매핑도 자기 플랫폼 파일만 기록)
+- 통합 매트릭스는 읽을 때 두 플랫폼 파일을 합쳐 계산 (combined, 행: unified_id, unified_name, platform)
+    viewers  시청자 수, platform = soop / chzzk / all(두 플랫폼 합)
+    share    그 시각 전체 시청자(두 플랫폼 모든 카테고리) 대비 점유율, 베이시스 포인트(1/10000)
+    unified_id "*"(전체) 행 = 플랫폼별 합계 → 플랫폼 점유율
+    · `python market_share.py join`이면 data/market/viewers_matrix.csv / share_matrix.csv로 기록 (매시 실행 안 함)
+- 재생성(rebuild)의 SOOP 이력은 long 스토어(category_store)가 원본, 스토어가 비어 있을 때만 categories_matrix.csv
+
+사용:
+  python market_share.py rebuild            # 두 플랫폼 카테고리 전체 이력 → 매핑/플랫폼별·통합 매트릭스 재생성
+  python market_share.py join               # 플랫폼별 매트릭스 → 통합 매트릭스 두 개 기록
+  python market_share.py map                # 매핑 표 중 두 플랫폼이 연결된 카테고리 출력
+  python market_share.py top -n 20          # 두 플랫폼이 모두 수집된 최신 시각의 통합 점유율 상위
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import pathlib
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import atomic_io
+import category_store
+import latest_csv
+import matrix_cache
+
+UPDATE_MARKET_SHARE = os.getenv("UPDATE_MARKET_SHARE", "false").lower() == "true"
+
+MARKET_ROOT = pathlib.Path("data/market")
+LEGACY_MAP_CSV = MARKET_ROOT / "category_map.csv"  # 이전 형식 (읽기만, 다음 저장 때 삭제)
+VIEWERS_CSV = MARKET_ROOT / "viewers_matrix.csv"   # join 출력
+SHARE_CSV = MARKET_ROOT / "share_matrix.csv"       # join 출력
+
+SOOP_WIDE = pathlib.Path("data/soop/categories_matrix.csv")
+CHZZK_WIDE = pathlib.Path("data/chzzk/categories_matrix.csv")
+SOOP_KEYS = ["category_no", "category_name"]
+CHZZK_KEYS = ["categoryType", "categoryId", "categoryValue"]
+
+MAP_COLS = ["platform", "category_key", "category_name", "unified_id", "unified_name", "source"]
+INDEX = ["unified_id", "unified_name", "platform"]
+PLATFORM_INDEX = INDEX[:2]
+PLATFORMS = ["soop", "chzzk"]
+TOTAL_ID, TOTAL_NAME, ALL = "*", "전체", "all"
+BP = 10_000  # 점유율 단위 (베이시스 포인트)
+
+# 정규화한 이름 → 같은 카테고리로 볼 정규화 이름 (이름이 달라 자동으로는 안 묶이는 것)
+ALIASES: Dict[str, str] = {
+    "talk": "토크캠방",
+    "토크": "토크캠방",
+    "fconline": "fc온라인",
+    "leagueoflegends": "리그오브레전드",
+    "스타크래프트리마스터": "스타크래프트",
+    "pubgbattlegrounds": "pubg배틀그라운드",
+    "배틀그라운드": "pubg배틀그라운드",
+    "valorant": "발로란트",
+    "maplestory": "메이플스토리",
+}
+
+_PUNCT_RE = re.compile(r"[\s\-_:;·.,'\"’!?()\[\]/&+~]+")
+
+
+def norm_name(name: str) -> str:
+    s = _PUNCT_RE.sub("", unicodedata.normalize("NFKC", str(name)).lower())
+    return ALIASES.get(s, s)
+
+
+def map_path(platform: str, root: pathlib.Path = MARKET_ROOT) -> pathlib.Path:
+    return pathlib.Path(root) / f"category_map.{platform}.csv"
+
+
+def viewers_path(platform: str, root: pathlib.Path = MARKET_ROOT) -> pathlib.Path:
+    return pathlib.Path(root) / f"viewers.{platform}.csv"
+
+
+def _map_files(root: pathlib.Path) -> List[pathlib.Path]:
+    """읽는 순서 (뒤 파일이 앞 파일의 같은 키를 덮어씀)"""
+    return [pathlib.Path(root) / LEGACY_MAP_CSV.name] + [map_path(p, root) for p in PLATFORMS]
+
+
+def _map_stamp(root: pathlib.Path) -> Tuple[Optional[float], ...]:
+    return tuple(p.stat().st_mtime if p.exists() else None for p in _map_files(root))
+
+
+# ======================
+# 매핑 표
+# ======================
+class CategoryMap:
+    def __init__(self, root: pathlib.Path = MARKET_ROOT):
+        self.root = pathlib.Path(root)
+        self.rows: Dict[Tuple[str, str], List[str]] = {}  # (platform, key) → [name, uid, uname, source]
+        self.by_norm: Dict[str, Tuple[str, str]] = {}     # 정규화 이름 → (uid, uname)
+        self.stamp = _map_stamp(self.root)
+        self.dirty: set = set()  # 저장할 플랫폼
+        self._lock = threading.Lock()
+        for path in _map_files(self.root):
+            if not path.exists():
+                continue
+            df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+            for p, key, name, uid, uname, source in df[MAP_COLS].itertuples(index=False):
+                self.rows[(p, key)] = [name, uid, uname, source]
+                self.by_norm.setdefault(norm_name(name), (uid, uname))
+        if (self.root / LEGACY_MAP_CSV.name).exists():
+            self.dirty = {p for p, _ in self.rows}  # 플랫폼별 파일로 옮김
+
+    def resolve(self, platform: str, keys: Sequence[str], names: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """(key, name) → (unified_id, unified_name) 목록. 처음 보는 key는 매핑에 추가."""
+        uids, unames = [], []
+        with self._lock:
+            for key, name in zip(keys, names):
+                key, name = str(key), str(name)
+                row = self.rows.get((platform, key))
+                if row is None:
+                    match = self.by_norm.get(norm_name(name))
+                    if match is not None:
+                        row = [name, match[0], match[1], "auto"]
+                    else:
+                        row = [name, f"{platform}:{key}", name, "self"]
+                        self.by_norm[norm_name(name)] = (row[1], row[2])
+                    self.rows[(platform, key)] = row
+                    self.dirty.add(platform)
+                uids.append(row[1])
+                unames.append(row[2])
+        return uids, unames
+
+    def frame(self, platform: Optional[str] = None) -> pd.DataFrame:
+        data = [[p, k, *row] for (p, k), row in self.rows.items() if platform is None or p == platform]
+        return pd.DataFrame(data, columns=MAP_COLS).sort_values(["unified_id", "platform", "category_key"])
+
+    def save(self) -> List[pathlib.Path]:
+        """바뀐 플랫폼의 매핑 파일만 기록 (다른 플랫폼 파일은 건드리지 않음)"""
+        with self._lock:
+            written = []
+            for platform in sorted(self.dirty):
+                path = map_path(platform, self.root)
+                atomic_io.write_csv(self.frame(platform), path, index=False)
+                written.append(path)
+            if self.dirty:
+                (self.root / LEGACY_MAP_CSV.name).unlink(missing_ok=True)
+            self.dirty = set()
+            self.stamp = _map_stamp(self.root)
+            return written
+
+
+_maps: Dict[pathlib.Path, CategoryMap] = {}
+_maps_lock = threading.Lock()
+
+
+def get_map(root: pathlib.Path = MARKET_ROOT) -> CategoryMap:
+    """폴더별 매핑 (프로세스 안에서 재사용, 파일이 밖에서 바뀌었으면 다시 읽음)"""
+    root = pathlib.Path(root)
+    with _maps_lock:
+        m = _maps.get(root)
+        if m is None or (not m.dirty and m.stamp != _map_stamp(root)):
+            m = _maps[root] = CategoryMap(root)
+        return m
+
+
+# ======================
+# 통합 열 계산
+# ======================
+def platform_rows(platform: str, keys: Sequence[str], names: Sequence[str], values: Sequence[float],
+                  cmap: CategoryMap) -> pd.DataFrame:
+    """플랫폼 카테고리 값(행 × 시각) → 통합 카테고리별 합 (index=INDEX, 열 번호는 입력과 같음)"""
+    uids, unames = cmap.resolve(platform, keys, names)
+    block = np.asarray(values, dtype="float64")
+    block = block.reshape(len(uids), -1)
+    frame = pd.DataFrame(block)
+    frame.index = pd.MultiIndex.from_arrays([uids, unames, [platform] * len(uids)], names=INDEX)
+    return frame.groupby(level=INDEX, sort=False).sum(min_count=1)
+
+
+def with_totals(base: pd.DataFrame) -> pd.DataFrame:
+    """플랫폼 행(soop/chzzk) → + 통합 카테고리 all 행, 전체(*) 행. 값 열은 그대로(여러 시각 가능)."""
+    base = base[base.index.get_level_values("platform").isin(PLATFORMS)
+                & (base.index.get_level_values("unified_id") != TOTAL_ID)]
+    cats = base.groupby(level=["unified_id", "unified_name"], sort=False).sum(min_count=1)
+    cats.index = pd.MultiIndex.from_arrays(
+        [cats.index.get_level_values(0), cats.index.get_level_values(1), [ALL] * len(cats)], names=INDEX)
+    plat = base.groupby(level="platform", sort=False).sum(min_count=1)
+    plat.index = pd.MultiIndex.from_arrays(
+        [[TOTAL_ID] * len(plat), [TOTAL_NAME] * len(plat), list(plat.index)], names=INDEX)
+    grand = base.sum(min_count=1).to_frame().T
+    grand.index = pd.MultiIndex.from_tuples([(TOTAL_ID, TOTAL_NAME, ALL)], names=INDEX)
+    return pd.concat([base, cats, plat, grand])
+
+
+def shares(viewers: pd.DataFrame) -> pd.DataFrame:
+    """시청자 → 전체(*, all) 대비 베이시스 포인트 (반올림 정수)"""
+    grand = viewers.loc[(TOTAL_ID, TOTAL_NAME, ALL)].to_numpy(dtype="float64")
+    v = viewers.to_numpy(dtype="float64")
+    out = np.full(v.shape, np.nan)
+    np.divide(v * BP, grand, out=out, where=grand > 0)
+    return pd.DataFrame(np.round(out), index=viewers.index, columns=viewers.columns).astype("Int64")
+
+
+def _load_platform(path: pathlib.Path, hours: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """플랫폼별 시청자 매트릭스 (index=PLATFORM_INDEX). hours를 주면 그 시각 열만 읽음"""
+    if not path.exists():
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=PLATFORM_INDEX))
+    if hours is None:
+        return matrix_cache.read_wide_csv(path, PLATFORM_INDEX).set_index(PLATFORM_INDEX)
+    wanted = set(PLATFORM_INDEX) | set(hours)
+    return pd.read_csv(path, usecols=lambda c: c in wanted, dtype={c: str for c in PLATFORM_INDEX},
+                       encoding="utf-8-sig").set_index(PLATFORM_INDEX)
+
+
+# ======================
+# 증분 갱신 (수집기)
+# ======================
+def update(platform: str, hour: str, keys: Sequence[str], names: Sequence[str],
+           values: Sequence[float]) -> List[pathlib.Path]:
+    """
+    platform의 한 시각 카테고리 스냅샷 → 그 플랫폼 시청자 매트릭스(viewers.<platform>.csv)의 그 시각 열만 교체.
+    다른 플랫폼 파일과 통합 매트릭스는 건드리지 않음 (통합은 읽을 때 combined로 계산)
+    """
+    if not len(keys):
+        return []
+    cmap = get_map()
+    values = pd.array(values, dtype="Float64").to_numpy("float64", na_value=np.nan)
+    mine = platform_rows(platform, keys, names, values, cmap).droplevel("platform").set_axis([hour], axis=1)
+    path = viewers_path(platform)
+    matrix_cache.CACHE.upsert(path, mine.astype("Int64"), _load_platform, replace_cols=True)
+    return [path, *cmap.save()]
+
+
+# ======================
+# 통합 (읽을 때 계산)
+# ======================
+def load_base(hours: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """플랫폼별 매트릭스 → 플랫폼 행(index=INDEX, 열=시각 오름차순, float64). hours를 주면 그 시각만"""
+    parts = []
+    for platform in PLATFORMS:
+        path = viewers_path(platform)
+        if not path.exists():
+            continue
+        frame = _load_platform(path, hours)
+        cols = [c for c in frame.columns if matrix_cache.HOUR_COL_RE.match(str(c))]
+        block = pd.DataFrame(matrix_cache.numeric_block(frame[cols]), columns=cols)
+        block.index = pd.MultiIndex.from_arrays(
+            [frame.index.get_level_values(0), frame.index.get_level_values(1), [platform] * len(frame)], names=INDEX)
+        parts.append(block)
+    if not parts:
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], [], []], names=INDEX))
+    return pd.concat(parts).sort_index(axis=1)
+
+
+def combined(hours: Optional[Sequence[str]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(통합 시청자 Int64, 점유율 Int64 베이시스 포인트), 행=INDEX (all/전체 행 포함)"""
+    viewers = with_totals(load_base(hours))
+    return viewers.astype("Int64"), shares(viewers)
+
+
+def latest_common_hour() -> Optional[str]:
+    """두 플랫폼 파일(있는 것)에 모두 있는 가장 최근 시각 (한쪽 수집이 아직이면 그 전 시각)"""
+    hour_sets = [{c for c in latest_csv.read_header(viewers_path(p)) if matrix_cache.HOUR_COL_RE.match(c)}
+                 for p in PLATFORMS if viewers_path(p).exists()]
+    common = set.intersection(*hour_sets) if hour_sets else set()
+    return max(common, default=None)
+
+
+def join() -> List[pathlib.Path]:
+    """플랫폼별 매트릭스 → viewers_matrix.csv / share_matrix.csv"""
+    viewers, share = combined()
+    if viewers.empty:
+        return []
+    for path, frame in [(VIEWERS_CSV, viewers), (SHARE_CSV, share)]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        matrix_cache.WideMatrix.from_frame(frame).save(path)
+    return [VIEWERS_CSV, SHARE_CSV]
+
+
+# ======================
+# 전체 재생성
+# ======================
+def _soop_history() -> pd.DataFrame:
+    """SOOP 카테고리 전체 이력: long 스토어, 비어 있으면 categories_matrix.csv (WRITE_WIDE_MATRIX를 끈 기간이 있으면 스토어보다 늦을 수 있음)"""
+    wide = category_store.build_wide().reset_index()
+    if wide.empty and SOOP_WIDE.exists():
+        wide = matrix_cache.read_wide_csv(SOOP_WIDE, SOOP_KEYS)
+    wide["category_no"] = wide["category_no"].astype(str).str.zfill(8)
+    return wide
+
+
+def rebuild() -> List[pathlib.Path]:
+    """두 플랫폼 카테고리 전체 이력(SOOP 스토어, CHZZK 매트릭스) → 매핑 보강 + 플랫폼별/통합 매트릭스 재작성"""
+    cmap = get_map()
+    written = []
+    for platform, wide, id_cols, name_col in [
+        ("soop", _soop_history(), ["category_no"], "category_name"),
+        ("chzzk", matrix_cache.read_wide_csv(CHZZK_WIDE, CHZZK_KEYS) if CHZZK_WIDE.exists() else None,
+         ["categoryType", "categoryId"], "categoryValue"),
+    ]:
+        if wide is None or wide.empty:
+            continue
+        hours = [c for c in wide.columns if matrix_cache.HOUR_COL_RE.match(str(c))]
+        keys = wide[id_cols].astype(str).agg("|".join, axis=1)
+        vals = matrix_cache.numeric_block(wide[hours])
+        rows = platform_rows(platform, keys, wide[name_col].astype(str), vals, cmap).set_axis(hours, axis=1)
+        path = viewers_path(platform)
+        matrix_cache.CACHE.drop(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        matrix_cache.WideMatrix.from_frame(rows.droplevel("platform").astype("Int64")).save(path)
+        written.append(path)
+    cmap.save()
+    return written + join() if written else []
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="SOOP ↔ CHZZK 통합 카테고리 점유율")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="매핑/플랫폼별·통합 매트릭스 전체 재생성")
+    sub.add_parser("join", help="플랫폼별 매트릭스 → 통합 매트릭스 기록")
+    sub.add_parser("map", help="두 플랫폼이 연결된 카테고리 출력")
+    t = sub.add_parser("top", help="최신 시각 통합 점유율 상위")
+    t.add_argument("-n", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "rebuild":
+        out = rebuild()
+        print(f"written -> {', '.join(map(str, out)) or '(no source matrices)'} / map -> {MARKET_ROOT}")
+    elif args.cmd == "join":
+        out = join()
+        print(f"written -> {', '.join(map(str, out)) or '(no platform matrices)'}")
+    elif args.cmd == "map":
+        df = get_map().frame()
+        joined = df.groupby("unified_id")["platform"].transform("nunique") > 1
+        print(df[joined].to_string(index=False))
+    else:
+        hour = latest_common_hour()
+        if hour is None:
+            print(f"{MARKET_ROOT}/viewers.*.csv 없음 (python market_share.py rebuild 먼저 실행)")
+            return
+        _, share = combined([hour])
+        share = share.reset_index()
+        share[hour] = pd.to_numeric(share[hour], errors="coerce")
+        wide = share.pivot_table(index=["unified_id", "unified_name"], columns="platform", values=hour, aggfunc="sum")
+        wide = wide.drop(index=TOTAL_ID, level="unified_id", errors="ignore")
+        wide = wide.sort_values(ALL, ascending=False).head(args.n) / (BP / 100)
+        print(f"=== {hour} (% of all viewers) ===")
+        print(wide.round(2).to_string())
+        totals = share[share["unified_id"] == TOTAL_ID].set_index("platform")[hour] / (BP / 100)
+        print("platforms:", ", ".join(f"{p}={v:.2f}%" for p, v in totals.items()))
+
+
+if __name__ == "__main__":
+    main()
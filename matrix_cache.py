@@ -0,0 +1,413 @@
+# matrix_cache.py
+# -*- coding: utf-8 -*-
+"""
+와이드 매트릭스 메모리 캐시 (+ write-behind 플러시)
+- 출력 경로별로 현재 와이드 매트릭스를 메모리에 보관
+  값: numpy int64 블록 + 결측 마스크, 행/열 키 → 위치 dict
+- 스냅샷 반영은 행/열 append + 인덱스 scatter (CSV 재파싱 없음)
+- 디스크 쓰기는 MATRIX_FLUSH_INTERVAL 초마다 백그라운드 스레드가 dirty 항목만 처리
+  MATRIX_FLUSH_INTERVAL=0(기본)이면 commit() 즉시 기록 → 단발 실행 스크립트는 기존과 동일하게 동작
+- 프로세스 종료 시(atexit) 남은 dirty 항목을 모두 기록
+- 적재/기록 때의 파일 (mtime, 크기)를 기억해 두고, get/플러시 때 달라졌으면 디스크에서 다시 적재한 뒤
+  아직 기록하지 않은 반영분만 다시 적용 (데몬 실행 중 backfill/rebuild가 쓴 파일을 덮어쓰지 않음)
+- CSV 파싱/기록도 블록 단위 (열별 to_numeric / IntegerArray 루프 없음)
+  · read_wide_csv: 키 열만 str, 값 열은 read_csv 타입 추론으로 한 번에
+  · numeric_block: 문자열 프레임도 to_numeric 한 번으로 float64 2차원 배열
+  · WideMatrix.save: 정렬 순서대로 int64 블록을 문자열로 바꿔 행 블록 단위 기록 (to_frame().to_csv와 같은 출력)
+- loader가 DataFrame 대신 매트릭스 객체(예: sparse_matrix.SparseMatrix)를 돌려주면 그대로 보관하고,
+  플러시 때 그 객체의 save(path)로 기록
+- 최신 시각 사이드카: <매트릭스>.latest.csv (키 열 + 가장 최근 시간 열 하나, 수집기가 매 실행 기록)
+  · 행은 매트릭스와 같은 키 전체 (이번 시각에 없던 키는 빈칸) → 매트릭스의 최신 열과 같은 내용
+  · write_latest(path, frame) / read_latest(path, key_cols)
+  · 분석 스크립트는 전체 이력을 파싱하지 않고 사이드카(없거나 낡았으면 매트릭스의 키 열 + 최신 열만)를 읽음
+  · 읽기 코어는 표준 라이브러리만 쓰는 latest_csv (분석 스크립트는 pandas 없이 그쪽을 직접 사용)
+- run_metrics 계측: parse(첫 적재), write(기록), 반영 후 매트릭스 크기
+
+사용 예:
+  # 처음 한 번만 loader(path)로 CSV 로드, frame(행/열 라벨이 붙은 값)을 반영하고 dirty 표시
+  CACHE.upsert(path, frame, loader, replace_cols=True)
+"""
+
+from __future__ import annotations
+import atexit
+import csv
+import os
+import pathlib
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import atomic_io
+import latest_csv
+import run_metrics
+from latest_csv import HOUR_COL_RE, latest_path  # 기존 matrix_cache.* 이름 유지
+
+MATRIX_FLUSH_INTERVAL = float(os.getenv("MATRIX_FLUSH_INTERVAL", "0"))
+
+
+# ======================
+# 공용 파싱/기록
+# ======================
+def numeric_block(frame: pd.DataFrame) -> np.ndarray:
+    """frame 값 → float64 2차원 배열 (숫자가 아니면 NaN). 문자열 프레임도 to_numeric 한 번으로 처리."""
+    if not frame.size:
+        return np.zeros(frame.shape)
+    if all(pd.api.types.is_numeric_dtype(t) for t in frame.dtypes):
+        return frame.to_numpy(dtype="float64", na_value=np.nan)
+    flat = pd.to_numeric(pd.Series(frame.to_numpy(dtype=object).ravel()), errors="coerce")
+    return flat.to_numpy(dtype="float64", na_value=np.nan).reshape(frame.shape)
+
+
+def read_wide_csv(path: pathlib.Path, key_cols: Sequence[str]) -> pd.DataFrame:
+    """
+    와이드 CSV 로드: key_cols만 str로 고정하고 값 열은 C 파서의 타입 추론(int64/float64)으로 한 번에 파싱.
+    헤더에 key_cols가 하나도 없으면(과거 단일 인덱스 파일) 첫 열을 키로 취급.
+    숫자가 아닌 값이 섞인 열은 object로 남고 numeric_block이 NaN으로 처리.
+    """
+    header = list(pd.read_csv(path, nrows=0).columns)
+    keys = [c for c in header if c in key_cols] or header[:1]
+    return pd.read_csv(path, dtype={c: str for c in keys})
+
+
+def write_wide_csv(path: pathlib.Path, index_names: Sequence[str], row_keys: Sequence[Hashable],
+                   col_keys: Sequence[Hashable], values: np.ndarray, mask: np.ndarray,
+                   block_rows: int = 512) -> pathlib.Path:
+    """
+    int64 블록 → 와이드 CSV (행/열 키 오름차순, 결측은 빈칸, utf-8-sig).
+    to_frame().reset_index().to_csv(index=False)와 같은 내용을 행 블록 단위로 기록.
+    """
+    row_order = sorted(range(len(row_keys)), key=row_keys.__getitem__)
+    col_order = np.array(sorted(range(len(col_keys)), key=col_keys.__getitem__), dtype=np.intp)
+    multi = len(index_names) > 1
+    with atomic_io.atomic_open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow([*index_names, *(col_keys[j] for j in col_order)])
+        for lo in range(0, len(row_order), block_rows):
+            ri = np.array(row_order[lo:lo + block_rows], dtype=np.intp)
+            block = values[np.ix_(ri, col_order)]
+            text = np.where(mask[np.ix_(ri, col_order)], "", block.astype(str))
+            for i, cells in zip(ri, text.tolist()):
+                key = row_keys[i]
+                w.writerow([*key, *cells] if multi else [key, *cells])
+    return pathlib.Path(path)
+
+
+# ======================
+# 최신 시각 사이드카
+# ======================
+def _known_keys(path: pathlib.Path, key_cols: Sequence[str]) -> List[Hashable]:
+    """
+    지금까지 알려진 행 키: 직전 사이드카의 키 (없으면 매트릭스의 키 열, 둘 다 없으면 빈 목록)
+    → 사이드카가 매트릭스와 같은 행(이번 시각에 없던 키 포함)을 가짐
+    """
+    side = latest_path(path)
+    src = side if side.exists() else pathlib.Path(path)
+    if not src.exists() or src.suffix != ".csv":
+        return []
+    header = latest_csv.read_header(src)
+    if not all(c in header for c in key_cols):
+        return []
+    pos = [header.index(c) for c in key_cols]
+    with open(src, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        keys = [tuple(r[i] for i in pos) for r in reader if r]
+    return keys if len(key_cols) > 1 else [k[0] for k in keys]
+
+
+def write_latest(path: pathlib.Path, frame: pd.DataFrame) -> pathlib.Path:
+    """
+    이번 스냅샷 피벗(index=키 열, 열=시간 하나)을 path의 사이드카로 기록
+    - 행은 알려진 키 전체 ∪ 이번 키, 키 오름차순 (매트릭스 행과 같은 집합/순서), 이번 시각에 없던 키는 빈칸
+      → 분석 스크립트가 매트릭스의 최신 열을 읽을 때와 같은 결과 (빈칸 = 0)
+    """
+    out = latest_path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    names = list(frame.index.names)
+    multi = len(names) > 1
+    text = (lambda k: tuple(str(x) for x in norm_key(k))) if multi else (lambda k: str(norm_key(k)))
+    cur = {text(k): i for i, k in enumerate(frame.index)}
+    values = frame.iloc[:, 0].astype("Int64").to_numpy(dtype=object, na_value=None)
+    rows = []
+    for k in sorted(set(_known_keys(path, names)) | set(cur)):
+        i = cur.get(k)
+        v = "" if i is None or values[i] is None else values[i]
+        rows.append([*k, v] if multi else [k, v])
+    latest_csv.write_rows(out, [*names, frame.columns[0]], rows)
+    return out
+
+
+def read_latest(path: pathlib.Path, key_cols: Sequence[str]) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    와이드 매트릭스의 (키 열 + 최신 시간 열) → (DataFrame(전부 str), 최신 열 이름). 없으면 (None, None).
+    사이드카/매트릭스 선택과 읽기는 latest_csv.read_latest_rows (pandas 없이 쓰려면 그쪽을 직접)
+    """
+    cols, rows, hour = latest_csv.read_latest_rows(path, key_cols)
+    if hour is None:
+        return None, None
+    return pd.DataFrame(rows, columns=cols, dtype=str), hour
+
+
+# ======================
+# 와이드 매트릭스 (numpy 블록)
+# ======================
+def _norm(v):
+    # CSV에서 빈 키는 NaN으로 읽힘 → 디스크 표현이 같은 ""로 통일 (NaN은 dict 키로 서로 다름)
+    return "" if isinstance(v, float) and v != v else v
+
+
+def norm_key(k: Hashable) -> Hashable:
+    return tuple(_norm(x) for x in k) if isinstance(k, tuple) else _norm(k)
+
+
+class WideMatrix:
+    """행 키 × 열 키 int64 블록. 결측은 mask=True."""
+
+    def __init__(self, index_names: Sequence[str]):
+        self.index_names = list(index_names)
+        self.row_keys: List[Hashable] = []
+        self.col_keys: List[Hashable] = []
+        self.row_pos: Dict[Hashable, int] = {}
+        self.col_pos: Dict[Hashable, int] = {}
+        self.values = np.zeros((0, 0), dtype=np.int64)
+        self.mask = np.ones((0, 0), dtype=bool)
+
+    @property
+    def shape(self):
+        return len(self.row_keys), len(self.col_keys)
+
+    # ---- 생성/변환 ----
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "WideMatrix":
+        m = cls(frame.index.names)
+        m.row_keys = [norm_key(k) for k in frame.index]
+        m.col_keys = [norm_key(k) for k in frame.columns]
+        m.row_pos = {k: i for i, k in enumerate(m.row_keys)}
+        m.col_pos = {k: j for j, k in enumerate(m.col_keys)}
+        block = numeric_block(frame)
+        m.mask = np.isnan(block)
+        m.values = np.where(m.mask, 0, block).astype(np.int64)
+        return m
+
+    def to_frame(self) -> pd.DataFrame:
+        """Int64 DataFrame (행/열 모두 라벨 오름차순)"""
+        r, c = self.shape
+        vals, mask = self.values[:r, :c], self.mask[:r, :c]
+        data = {j: pd.arrays.IntegerArray(vals[:, j].copy(), mask[:, j].copy()) for j in range(c)}
+        if len(self.index_names) > 1:
+            index = pd.MultiIndex.from_tuples(self.row_keys, names=self.index_names) if r else \
+                pd.MultiIndex.from_arrays([[]] * len(self.index_names), names=self.index_names)
+        else:
+            index = pd.Index(self.row_keys, name=self.index_names[0], dtype=object)
+        frame = pd.DataFrame(data, index=index)
+        frame.columns = pd.Index(self.col_keys, dtype=object)
+        return frame.sort_index(axis=0).sort_index(axis=1)
+
+    def column(self, key: Hashable) -> pd.Series:
+        """열 하나 → Int64 Series (index=행 키 튜플/값, 결측 제외). 없는 열이면 빈 Series."""
+        j = self.col_pos.get(norm_key(key))
+        if j is None:
+            return pd.Series([], dtype="Int64")
+        r = len(self.row_keys)
+        keep = ~self.mask[:r, j]
+        keys = [k for k, ok in zip(self.row_keys, keep) if ok]
+        index = pd.MultiIndex.from_tuples(keys, names=self.index_names) if len(self.index_names) > 1 and keys \
+            else pd.Index(keys, name=self.index_names[0] if len(self.index_names) == 1 else None, dtype=object)
+        return pd.Series(self.values[:r, j][keep], index=index, dtype="Int64")
+
+    def save(self, path: pathlib.Path) -> pathlib.Path:
+        r, c = self.shape
+        return write_wide_csv(path, self.index_names, self.row_keys, self.col_keys,
+                              self.values[:r, :c], self.mask[:r, :c])
+
+    # ---- 확장 ----
+    def _grow(self, rows: int, cols: int) -> None:
+        cap_r, cap_c = self.values.shape
+        if rows <= cap_r and cols <= cap_c:
+            return
+        new_r = max(rows, cap_r * 2 if rows > cap_r else cap_r, 8)
+        new_c = max(cols, cap_c * 2 if cols > cap_c else cap_c, 8)
+        values = np.zeros((new_r, new_c), dtype=np.int64)
+        mask = np.ones((new_r, new_c), dtype=bool)
+        values[:cap_r, :cap_c] = self.values
+        mask[:cap_r, :cap_c] = self.mask
+        self.values, self.mask = values, mask
+
+    def _positions(self, keys, pos: Dict[Hashable, int], store: List[Hashable]) -> np.ndarray:
+        out = np.empty(len(keys), dtype=np.intp)
+        for i, k in enumerate(keys):
+            k = norm_key(k)
+            p = pos.get(k)
+            if p is None:
+                p = pos[k] = len(store)
+                store.append(k)
+            out[i] = p
+        return out
+
+    # ---- 갱신 ----
+    def assign(self, frame: pd.DataFrame, replace_cols: bool = False) -> None:
+        """
+        frame(행/열 라벨이 붙은 값)을 반영.
+        - 없는 행/열은 뒤에 append
+        - frame의 결측 셀은 기존 값 유지 (replace_cols=True면 frame의 열 전체를 frame 값으로 교체)
+        """
+        ri = self._positions(list(frame.index), self.row_pos, self.row_keys)
+        ci = self._positions(list(frame.columns), self.col_pos, self.col_keys)
+        self._grow(len(self.row_keys), len(self.col_keys))
+        if replace_cols and len(ci):
+            self.values[:, ci] = 0
+            self.mask[:, ci] = True
+        if not len(ri) or not len(ci):
+            return
+        block = numeric_block(frame)
+        present = ~np.isnan(block)
+        rr, cc = np.nonzero(present)
+        self.values[ri[rr], ci[cc]] = block[rr, cc].astype(np.int64)
+        self.mask[ri[rr], ci[cc]] = False
+
+
+# ======================
+# 캐시
+# ======================
+class MatrixCache:
+    def __init__(self, flush_interval: float = MATRIX_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._entries: Dict[pathlib.Path, Any] = {}
+        self._loaders: Dict[pathlib.Path, Callable[[pathlib.Path], Any]] = {}
+        self._stamps: Dict[pathlib.Path, Optional[Tuple[int, int]]] = {}  # 적재/기록 시점 (mtime_ns, size)
+        self._pending: Dict[pathlib.Path, List[Tuple[pd.DataFrame, bool]]] = {}  # 아직 기록 안 된 반영분
+        self._writers: Dict[pathlib.Path, Callable[[pd.DataFrame, pathlib.Path], None]] = {}
+        self._dirty: Dict[pathlib.Path, List[Callable[[], None]]] = {}
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get(self, path: pathlib.Path, loader: Callable[[pathlib.Path], Any],
+            writer: Optional[Callable[[pd.DataFrame, pathlib.Path], None]] = None) -> Any:
+        """
+        path의 매트릭스 반환. 처음이면 loader(path)가 돌려준 프레임(index=행 키)으로 적재
+        (프레임이 아니라 assign/to_frame/save를 가진 매트릭스 객체면 그대로 사용).
+        writer(frame, path)는 플러시 때 사용(기본: 매트릭스의 save(path) → utf-8-sig CSV).
+        디스크 파일이 적재/기록 이후 바뀌었으면(다른 프로세스의 backfill/rebuild 등) 다시 적재하고
+        아직 기록하지 않은 반영분만 다시 적용.
+        """
+        path = pathlib.Path(path)
+        with self._lock:
+            self._loaders[path] = loader
+            if path in self._entries:
+                self._refresh(path)
+            else:
+                self._load(path)
+            if writer is not None:
+                self._writers[path] = writer
+            return self._entries[path]
+
+    def _load(self, path: pathlib.Path) -> None:
+        stamp = _stamp(path)  # 적재 전에 기록 → 적재 도중 바뀌면 다음 get에서 다시 적재
+        with run_metrics.stage("parse"):
+            loaded = self._loaders[path](path)
+            m = WideMatrix.from_frame(loaded) if isinstance(loaded, pd.DataFrame) else loaded
+        for frame, replace_cols in self._pending.get(path, []):
+            m.assign(frame, replace_cols=replace_cols)
+        self._entries[path] = m
+        self._stamps[path] = stamp
+
+    def _refresh(self, path: pathlib.Path) -> None:
+        """디스크 파일이 마지막 적재/기록 이후 바뀌었으면 다시 적재 (+ 미기록 반영분 재적용)"""
+        if _stamp(path) != self._stamps.get(path):
+            print(f"[matrix_cache] {path} changed on disk, reloading")
+            self._load(path)
+
+    def upsert(self, path: pathlib.Path, frame: pd.DataFrame, loader: Callable[[pathlib.Path], Any],
+               replace_cols: bool = False, writer: Optional[Callable[[pd.DataFrame, pathlib.Path], None]] = None,
+               on_flush: Optional[Callable[[], None]] = None) -> Any:
+        """get → assign → commit 를 락 하나로 묶은 것 (백그라운드 플러시와 겹치지 않게)"""
+        with self._lock:
+            m = self.get(path, loader, writer)
+            m.assign(frame, replace_cols=replace_cols)
+            self._pending.setdefault(path, []).append((frame, replace_cols))
+            run_metrics.matrix(path, m.shape)
+            self.commit(path, on_flush)
+            return m
+
+    def commit(self, path: pathlib.Path, on_flush: Optional[Callable[[], None]] = None) -> None:
+        """path를 dirty로 표시. on_flush는 실제 기록 직후 호출(워터마크 저장 등)."""
+        path = pathlib.Path(path)
+        with self._lock:
+            hooks = self._dirty.setdefault(path, [])
+            if on_flush is not None:
+                hooks.append(on_flush)
+        if self.flush_interval <= 0:
+            self.flush(path)
+        else:
+            self._ensure_thread()
+
+    def flush(self, path: Optional[pathlib.Path] = None) -> List[pathlib.Path]:
+        """dirty 항목 기록 (path 지정 시 그 항목만)"""
+        with self._lock:
+            targets = [pathlib.Path(path)] if path is not None else list(self._dirty)
+            written = []
+            for p in targets:
+                if p not in self._dirty:
+                    continue
+                if p in self._loaders:
+                    self._refresh(p)  # 플러시 주기 사이에 바뀐 파일을 덮어쓰지 않게
+                m = self._entries[p]
+                p.parent.mkdir(parents=True, exist_ok=True)
+                with run_metrics.stage("write"):
+                    if hasattr(m, "save") and p not in self._writers:
+                        m.save(p)
+                    else:
+                        self._writers.get(p, _default_writer)(m.to_frame(), p)
+                self._stamps[p] = _stamp(p)
+                self._pending.pop(p, None)
+                for hook in self._dirty.pop(p):
+                    hook()
+                written.append(p)
+            return written
+
+    def drop(self, path: pathlib.Path) -> None:
+        """메모리에서 제거(디스크 파일을 외부에서 바꿨을 때). dirty면 먼저 기록."""
+        path = pathlib.Path(path)
+        with self._lock:
+            self.flush(path)
+            self._entries.pop(path, None)
+            self._writers.pop(path, None)
+            self._loaders.pop(path, None)
+            self._stamps.pop(path, None)
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="matrix-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:  # 다음 주기에 다시 시도
+                print(f"[matrix_cache] flush failed: {e!r}")
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+
+
+def _stamp(path: pathlib.Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _default_writer(frame: pd.DataFrame, path: pathlib.Path) -> None:
+    atomic_io.write_csv(frame.reset_index(), path, index=False)
+
+
+CACHE = MatrixCache()
+atexit.register(CACHE.close)
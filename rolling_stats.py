@@ -0,0 +1,478 @@
+# rolling_stats.py
+# -*- coding: utf-8 -*-
+"""
+카테고리/스트리머 이동 구간 통계 (이동 평균, 최고치, 증가율)
+- 계산은 numpy 벡터 연산 (엔티티 × 시간 2차원 배열, 축 1 = 시간)
+  · to_grid            : 시간 키를 빈틈 없는 정시 격자에 배치 (수집이 빠진 시각은 NaN → 관측 시각만 평균)
+  · window_sum_count   : 누적합(cumsum) 차로 구간 합/관측 수 → rolling_mean
+  · rolling_max        : 블록 prefix/suffix 최대(van Herk–Gil-Werman) → 구간 길이와 무관하게 O(N·T)
+  · growth             : 구간 평균 / 직전 같은 길이 구간 평균 - 1
+  · resample           : UTC 경계에 맞춘 N시간 묶음(mean/max)
+- 증분 상태: <매트릭스>.rolling.npz (RollingState)
+    최근 RING_HOURS(2주) 시각 링 버퍼 + 전체 기간 최고치/시각
+    push(시각, 엔티티, 값)는 그 시각 열만 갱신 → 이력 길이와 무관
+    상태가 없으면 처음 한 번만 기존 이력에서 만듦 (read_history)
+    · SOOP 카테고리: long 스토어(category_store.build_wide)가 있으면 그것, 없으면 와이드 매트릭스
+      (categories_matrix.csv는 WRITE_WIDE_MATRIX="false"로 돌린 기간이 있으면 스토어보다 낡았을 수 있음)
+    · 그 외: 와이드 매트릭스
+- 요약: <매트릭스>.rolling.csv (대시보드가 읽는 작은 파일, 최근 7일에 관측된 엔티티만)
+    value, avg_24h, peak_24h, hours_24h, growth_24h(직전 24시간 대비),
+    avg_7d, peak_7d, peak_7d_hour, hours_7d, growth_7d(직전 7일 대비, week-over-week), peak_all, peak_all_hour
+- 수집기는 환경변수 UPDATE_ROLLING_STATS="true"면 매 실행 이번 스냅샷을 push하고 요약을 다시 씀
+    SOOP 카테고리: id=category_no / SOOP 디테일: 카테고리별 id=user_id
+    CHZZK 카테고리(전체/게임): id=categoryType|categoryId / CHZZK 디테일(TOP 100): id=channelName (매트릭스 열과 같음)
+
+사용:
+  python rolling_stats.py rebuild                                   # 기존 이력 → 상태/요약 (처음 한 번)
+  python rolling_stats.py summary data/soop/categories_matrix.csv -n 20 --sort growth_7d
+  python rolling_stats.py series data/soop/categories_matrix.csv --window 168 --stat mean --out ma7d.csv
+  python rolling_stats.py series data/chzzk/categories_matrix.csv --resample 24 --window 7 --stat growth
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import pathlib
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import atomic_io
+import category_store
+import matrix_cache
+
+UPDATE_ROLLING_STATS = os.getenv("UPDATE_ROLLING_STATS", "false").lower() == "true"
+
+DAY, WEEK = 24, 168
+RING_HOURS = 2 * WEEK  # 주간 증가율에 직전 7일까지 필요
+NO_HOUR = -1
+
+# 수집기가 쓰는 매트릭스와 그 행 인덱스 (rebuild 대상)
+SOURCES: Dict[str, Tuple[str, List[str]]] = {
+    "soop_categories": ("data/soop/categories_matrix.csv", ["category_no", "category_name"]),
+    "chzzk_categories": ("data/chzzk/categories_matrix.csv", ["categoryType", "categoryId", "categoryValue"]),
+    "chzzk_game_categories": ("data/chzzk/game_categories_matrix.csv", ["categoryType", "categoryId", "categoryValue"]),
+    "chzzk_details": ("data/chzzk/details_matrix.csv", ["captured_hour"]),
+}
+SOOP_DETAILS_GLOB = "data/soop/details/*/details_matrix.csv"
+
+
+# ======================
+# 시간 키
+# ======================
+def hour_num(hours: Sequence[str]) -> np.ndarray:
+    """'YYYY-MM-DDTHH:00:00Z' → 1970-01-01T00 이후 시간 수 (int64)"""
+    return np.array([str(h)[:13] for h in hours], dtype="datetime64[h]").astype(np.int64)
+
+
+def hour_str(nums) -> np.ndarray:
+    """hour_num의 역변환"""
+    text = np.datetime_as_string(np.asarray(nums, dtype=np.int64).astype("datetime64[h]"), unit="h")
+    return np.char.add(text, ":00:00Z")
+
+
+# ======================
+# 벡터 연산 (축 1 = 시간)
+# ======================
+def to_grid(hours: Sequence[str], values: np.ndarray) -> Tuple[int, np.ndarray]:
+    """
+    (엔티티 × 시간 키) 값 → (시작 시간 번호, 빈틈 없는 정시 격자).
+    빠진 시각 열은 NaN, 같은 시각이 여러 번이면 나중 열 우선.
+    """
+    values = np.asarray(values, dtype="float64")
+    if not len(hours):
+        return NO_HOUR, np.empty((values.shape[0], 0))
+    idx = hour_num(hours)
+    start = int(idx.min())
+    grid = np.full((values.shape[0], int(idx.max()) - start + 1), np.nan)
+    grid[:, idx - start] = values
+    return start, grid
+
+
+def window_sum_count(grid: np.ndarray, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    """각 시각에서 끝나는 길이 w 구간의 합/관측 수 (앞쪽은 있는 만큼만)"""
+    present = ~np.isnan(grid)
+    n, t = grid.shape
+    s = np.zeros((n, t + 1))
+    c = np.zeros((n, t + 1), dtype=np.int64)
+    np.cumsum(np.where(present, grid, 0.0), axis=1, out=s[:, 1:])
+    np.cumsum(present, axis=1, out=c[:, 1:])
+    hi = np.arange(1, t + 1)
+    lo = np.maximum(hi - w, 0)
+    return s[:, hi] - s[:, lo], c[:, hi] - c[:, lo]
+
+
+def rolling_mean(grid: np.ndarray, w: int) -> np.ndarray:
+    """관측된 시각만의 평균 (구간에 관측이 없으면 NaN)"""
+    sums, counts = window_sum_count(grid, w)
+    out = np.full(grid.shape, np.nan)
+    np.divide(sums, counts, out=out, where=counts > 0)
+    return out
+
+
+def rolling_max(grid: np.ndarray, w: int) -> np.ndarray:
+    """각 시각에서 끝나는 길이 w 구간 최대 (NaN 무시, 전부 NaN이면 NaN)"""
+    n, t = grid.shape
+    if not t or w <= 1:
+        return grid.astype("float64", copy=True)
+    pad = (-(t + w - 1)) % w
+    x = np.concatenate([np.full((n, w - 1), np.nan), grid, np.full((n, pad), np.nan)], axis=1)
+    blocks = x.reshape(n, -1, w)
+    prefix = np.fmax.accumulate(blocks, axis=2).reshape(n, -1)
+    suffix = np.fmax.accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1].reshape(n, -1)
+    s = np.arange(t)  # 패딩 뒤 좌표: 구간 [s, s + w - 1]
+    return np.fmax(suffix[:, s], prefix[:, s + w - 1])
+
+
+def growth(grid: np.ndarray, w: int) -> np.ndarray:
+    """rolling_mean(w) / w시간 전 rolling_mean(w) - 1 (직전 평균이 없거나 0이면 NaN)"""
+    m = rolling_mean(grid, w)
+    out = np.full(grid.shape, np.nan)
+    if grid.shape[1] > w:
+        prev, cur = m[:, :-w], m[:, w:]
+        np.divide(cur, prev, out=out[:, w:], where=prev > 0)
+        out[:, w:] -= 1
+    return out
+
+
+def resample(start: int, grid: np.ndarray, step: int = DAY, how: str = "mean") -> Tuple[int, np.ndarray]:
+    """
+    정시 격자 → step시간 묶음 (UTC 기준 경계, 묶음 시작 시각이 새 열 키).
+    how: mean(관측 시각 평균) / max / sum
+    """
+    n, t = grid.shape
+    if not t:
+        return start, grid
+    left = start % step
+    right = (-(left + t)) % step
+    x = np.concatenate([np.full((n, left), np.nan), grid, np.full((n, right), np.nan)], axis=1)
+    blocks = x.reshape(n, -1, step)
+    present = ~np.isnan(blocks)
+    if how == "max":
+        out = np.fmax.reduce(blocks, axis=2)
+    elif how in ("mean", "sum"):
+        sums = np.where(present, blocks, 0.0).sum(axis=2)
+        counts = present.sum(axis=2)
+        out = np.full(sums.shape, np.nan)
+        np.divide(sums, counts if how == "mean" else 1, out=out, where=counts > 0)
+    else:
+        raise ValueError(f"how must be mean/max/sum: {how}")
+    return start - left, out
+
+
+def _argmax_hour(block: np.ndarray, first_hour: int) -> np.ndarray:
+    """구간 내 최대값 시각 (관측이 없으면 NO_HOUR)"""
+    if not block.shape[1]:
+        return np.full(block.shape[0], NO_HOUR, dtype=np.int64)
+    filled = np.where(np.isnan(block), -np.inf, block)
+    pos = filled.argmax(axis=1)
+    has = ~np.isnan(block).all(axis=1)
+    return np.where(has, first_hour + pos, NO_HOUR).astype(np.int64)
+
+
+# ======================
+# 와이드 매트릭스 → 엔티티 × 시간
+# ======================
+def read_entities(path: pathlib.Path, index: Sequence[str]) -> Tuple[List[str], List[str], List[str], np.ndarray]:
+    """
+    와이드 CSV → (id, label, 시간 키, 값(엔티티 × 시간)).
+    - 행=엔티티(index 마지막 열이 이름): id는 나머지 키 열을 '|'로 이은 것
+    - 행=captured_hour(디테일): 열 라벨 "user_id|user_nick" → id=user_id, label=user_nick
+      (구분자가 없으면 id=label=열 라벨), 같은 id 열 여러 개(닉네임 변경)는 시각별 최대로 합침
+    """
+    return frame_entities(matrix_cache.read_wide_csv(path, index), index)
+
+
+def frame_entities(frame: pd.DataFrame, index: Sequence[str]) -> Tuple[List[str], List[str], List[str], np.ndarray]:
+    """와이드 프레임(키 열 + 값 열) → (id, label, 시간 키, 값(엔티티 × 시간)). 규칙은 read_entities와 같음"""
+    keys = [c for c in index if c in frame.columns]
+    if list(index) == ["captured_hour"]:
+        key = keys[0] if keys else frame.columns[0]
+        frame = frame.set_index(key)
+        hours = [str(h) for h in frame.index]
+        labels = [str(c) for c in frame.columns]
+        ids = [c.split("|", 1)[0] for c in labels]
+        names = [c.split("|", 1)[-1] for c in labels]
+        values = matrix_cache.numeric_block(frame).T
+    else:
+        hour_cols = [c for c in frame.columns if matrix_cache.HOUR_COL_RE.match(str(c))]
+        id_cols = keys[:-1] or keys
+        ids = frame[id_cols].astype(str).agg("|".join, axis=1).tolist() if len(frame) else []
+        names = frame[keys[-1]].astype(str).tolist() if keys else ids
+        hours = hour_cols
+        values = matrix_cache.numeric_block(frame[hour_cols])
+
+    if len(set(ids)) < len(ids):
+        merged = pd.DataFrame(values).groupby(pd.Index(ids), sort=False).max()
+        last_name = dict(zip(ids, names))
+        ids = [str(i) for i in merged.index]
+        names = [last_name[i] for i in ids]
+        values = merged.to_numpy(dtype="float64")
+    return ids, names, hours, np.asarray(values, dtype="float64").reshape(len(ids), len(hours))
+
+
+def _from_store(matrix_csv: pathlib.Path) -> bool:
+    """SOOP 카테고리 매트릭스이고 long 스토어에 일 파일이 있으면 True"""
+    return pathlib.Path(matrix_csv) == category_store.WIDE_CSV and next(category_store.iter_day_files(), None) is not None
+
+
+def read_history(matrix_csv: pathlib.Path, index: Sequence[str]) -> Tuple[List[str], List[str], List[str], np.ndarray]:
+    """상태/시계열을 만들 전체 이력: SOOP 카테고리 매트릭스는 long 스토어가 있으면 스토어에서, 그 외는 read_entities"""
+    if _from_store(matrix_csv):
+        return frame_entities(category_store.build_wide().reset_index(), index)
+    return read_entities(matrix_csv, index)
+
+
+# ======================
+# 증분 상태
+# ======================
+def state_path(matrix_csv: pathlib.Path) -> pathlib.Path:
+    """categories_matrix.csv → categories_matrix.rolling.npz"""
+    matrix_csv = pathlib.Path(matrix_csv)
+    return matrix_csv.with_name(f"{matrix_csv.stem}.rolling.npz")
+
+
+def summary_path(matrix_csv: pathlib.Path) -> pathlib.Path:
+    """categories_matrix.csv → categories_matrix.rolling.csv"""
+    matrix_csv = pathlib.Path(matrix_csv)
+    return matrix_csv.with_name(f"{matrix_csv.stem}.rolling.csv")
+
+
+class RollingState:
+    """최근 width 시각 링 버퍼(슬롯 = 시간 번호 % width) + 전체 기간 최고치"""
+
+    def __init__(self, width: int = RING_HOURS):
+        self.width = width
+        self.ids: List[str] = []
+        self.labels: List[str] = []
+        self.pos: Dict[str, int] = {}
+        self.ring = np.full((0, width), np.nan)
+        self.last = NO_HOUR
+        self.peak = np.full(0, np.nan)
+        self.peak_hour = np.full(0, NO_HOUR, dtype=np.int64)
+
+    # ---- 생성/저장 ----
+    @classmethod
+    def from_history(cls, ids: Sequence[str], labels: Sequence[str], hours: Sequence[str],
+                     values: np.ndarray, width: int = RING_HOURS) -> "RollingState":
+        st = cls(width)
+        st._add(ids, labels)
+        start, grid = to_grid(hours, values)
+        if grid.shape[1]:
+            st.last = start + grid.shape[1] - 1
+            tail = grid[:, -width:]
+            tail_hours = np.arange(st.last - tail.shape[1] + 1, st.last + 1)
+            st.ring[:, tail_hours % width] = tail
+            st.peak = np.fmax.reduce(grid, axis=1)
+            st.peak_hour = _argmax_hour(grid, start)
+        return st
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "RollingState":
+        with np.load(path, allow_pickle=False) as z:
+            st = cls(int(z["ring"].shape[1]))
+            st._add(z["ids"].tolist(), z["labels"].tolist())
+            st.ring = z["ring"].astype("float64")
+            st.last = int(z["last"])
+            st.peak = z["peak"].astype("float64")
+            st.peak_hour = z["peak_hour"].astype(np.int64)
+        return st
+
+    def save(self, path: pathlib.Path) -> pathlib.Path:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_io.atomic_open(path, "wb") as f:  # 파일 핸들로 넘겨 확장자 자동 추가 방지
+            np.savez_compressed(
+                f, ids=np.array(self.ids, dtype=str), labels=np.array(self.labels, dtype=str),
+                ring=self.ring, last=np.int64(self.last), peak=self.peak, peak_hour=self.peak_hour,
+            )
+        return path
+
+    # ---- 갱신 ----
+    def _add(self, ids: Sequence[str], labels: Sequence[str]) -> np.ndarray:
+        """id → 행 번호 (새 id는 뒤에 추가), 이름은 최신 값으로"""
+        out = np.empty(len(ids), dtype=np.intp)
+        new = 0
+        for i, (k, name) in enumerate(zip(ids, labels)):
+            k = str(k)
+            p = self.pos.get(k)
+            if p is None:
+                p = self.pos[k] = len(self.ids)
+                self.ids.append(k)
+                self.labels.append(str(name))
+                new += 1
+            else:
+                self.labels[p] = str(name)
+            out[i] = p
+        if new:
+            self.ring = np.vstack([self.ring, np.full((new, self.width), np.nan)])
+            self.peak = np.concatenate([self.peak, np.full(new, np.nan)])
+            self.peak_hour = np.concatenate([self.peak_hour, np.full(new, NO_HOUR, dtype=np.int64)])
+        return out
+
+    def push(self, hour: str, ids: Sequence[str], labels: Sequence[str], values: Sequence[float]) -> bool:
+        """
+        한 시각 스냅샷 반영 (그 시각 열을 통째로 교체, 스냅샷에 없는 엔티티는 결측).
+        링보다 오래된 시각이면 무시하고 False.
+        """
+        h = int(hour_num([hour])[0])
+        if self.last != NO_HOUR and h <= self.last - self.width:
+            return False
+        if self.last == NO_HOUR or h > self.last:
+            if self.last != NO_HOUR:
+                gap = np.arange(self.last + 1, min(h, self.last + self.width) + 1)
+                self.ring[:, gap % self.width] = np.nan
+            self.last = h
+        else:
+            self.ring[:, h % self.width] = np.nan
+        rows = self._add(ids, labels)
+        vals = pd.array(values, dtype="Float64").to_numpy("float64", na_value=np.nan)  # Int64 결측(NA) → NaN
+        self.ring[rows, h % self.width] = vals
+        better = ~np.isnan(vals) & ~(self.peak[rows] >= vals)
+        self.peak[rows[better]] = vals[better]
+        self.peak_hour[rows[better]] = h
+        return True
+
+    # ---- 조회 ----
+    def window(self) -> Tuple[int, np.ndarray]:
+        """(시작 시간 번호, 링을 시간순으로 편 격자)"""
+        if self.last == NO_HOUR:
+            return NO_HOUR, np.empty((len(self.ids), 0))
+        start = self.last - self.width + 1
+        return start, self.ring[:, np.arange(start, self.last + 1) % self.width]
+
+    def summary(self) -> pd.DataFrame:
+        """최신 시각 기준 요약 (최근 7일에 관측된 엔티티만, avg_24h 내림차순)"""
+        start, grid = self.window()
+        if not grid.shape[1] or not len(self.ids):
+            return pd.DataFrame(columns=["as_of_hour", "id", "label", "value"])
+        out = pd.DataFrame({"as_of_hour": hour_str([self.last])[0], "id": self.ids, "label": self.labels,
+                            "value": pd.array(np.where(np.isnan(grid[:, -1]), None, grid[:, -1]), dtype="Int64")})
+        for name, w in (("24h", DAY), ("7d", WEEK)):
+            cur = grid[:, -w:]
+            sums, counts = window_sum_count(cur, w)
+            prev_sums, prev_counts = window_sum_count(grid[:, -2 * w:-w], w)
+            avg = np.divide(sums[:, -1], counts[:, -1], out=np.full(len(cur), np.nan), where=counts[:, -1] > 0)
+            prev = np.divide(prev_sums[:, -1], prev_counts[:, -1], out=np.full(len(cur), np.nan),
+                             where=prev_counts[:, -1] > 0)
+            peak = np.fmax.reduce(cur, axis=1)
+            out[f"avg_{name}"] = avg.round(1)
+            out[f"peak_{name}"] = pd.array(np.where(np.isnan(peak), None, peak), dtype="Int64")
+            if name == "7d":
+                ph = _argmax_hour(cur, self.last - w + 1)
+                out[f"peak_{name}_hour"] = np.where(ph == NO_HOUR, "", hour_str(np.maximum(ph, 0)))
+            out[f"hours_{name}"] = counts[:, -1]
+            g = np.divide(avg, prev, out=np.full(len(cur), np.nan), where=prev > 0) - 1
+            out[f"growth_{name}"] = g.round(4)
+        out["peak_all"] = pd.array(np.where(np.isnan(self.peak), None, self.peak), dtype="Int64")
+        out["peak_all_hour"] = np.where(self.peak_hour == NO_HOUR, "", hour_str(np.maximum(self.peak_hour, 0)))
+        out = out[out["hours_7d"] > 0]
+        return out.sort_values(["avg_24h", "id"], ascending=[False, True], na_position="last").reset_index(drop=True)
+
+
+# ======================
+# 수집기 연동
+# ======================
+def load_state(matrix_csv: pathlib.Path, index: Sequence[str]) -> RollingState:
+    """저장된 상태, 없으면 기존 이력(스토어/와이드 매트릭스, read_history)에서 한 번 만듦"""
+    sp = state_path(matrix_csv)
+    if sp.exists():
+        return RollingState.load(sp)
+    if _from_store(matrix_csv) or pathlib.Path(matrix_csv).exists():
+        return RollingState.from_history(*read_history(matrix_csv, index))
+    return RollingState()
+
+
+def update(matrix_csv: pathlib.Path, index: Sequence[str], hour: str,
+           ids: Sequence[str], labels: Sequence[str], values: Sequence[float]) -> pathlib.Path:
+    """이번 스냅샷을 상태에 push하고 상태/요약 기록. 반환: 요약 CSV 경로"""
+    st = load_state(matrix_csv, index)
+    st.push(hour, ids, labels, values)
+    st.save(state_path(matrix_csv))
+    out = summary_path(matrix_csv)
+    atomic_io.write_csv(st.summary(), out, index=False)
+    return out
+
+
+def rebuild(matrix_csv: pathlib.Path, index: Sequence[str]) -> pathlib.Path:
+    """전체 이력(read_history)에서 상태/요약을 다시 만듦"""
+    st = RollingState.from_history(*read_history(matrix_csv, index))
+    st.save(state_path(matrix_csv))
+    out = summary_path(matrix_csv)
+    atomic_io.write_csv(st.summary(), out, index=False)
+    return out
+
+
+def load_summary(matrix_csv: pathlib.Path) -> pd.DataFrame:
+    """대시보드용: 요약 CSV만 읽음 (이력은 읽지 않음)"""
+    return pd.read_csv(summary_path(matrix_csv), dtype={"id": str, "label": str},
+                       keep_default_na=False, na_values=[""], encoding="utf-8-sig")
+
+
+# ======================
+# 전체 이력 시계열 (분석용)
+# ======================
+def series(matrix_csv: pathlib.Path, index: Sequence[str], window: int, stat: str = "mean",
+           step: int = 1) -> pd.DataFrame:
+    """
+    매트릭스 전체 → 엔티티 × 시각 이동 통계 (행: id, label / 열: 시각).
+    step > 1이면 먼저 step시간 평균으로 묶고 window는 묶음 개수 단위.
+    """
+    ids, labels, hours, values = read_history(matrix_csv, index)
+    start, grid = to_grid(hours, values)
+    if step > 1:
+        start, grid = resample(start, grid, step, "mean")
+    fn = {"mean": rolling_mean, "max": rolling_max, "growth": growth}[stat]
+    out = fn(grid, window).round(4 if stat == "growth" else 1)
+    cols = hour_str(start + np.arange(out.shape[1]) * max(step, 1)) if out.shape[1] else []
+    frame = pd.DataFrame(out, columns=list(cols))
+    frame.insert(0, "label", labels)
+    frame.insert(0, "id", ids)
+    return frame
+
+
+def _index_for(path: pathlib.Path) -> List[str]:
+    for p, index in SOURCES.values():
+        if pathlib.Path(p) == pathlib.Path(path):
+            return index
+    return ["captured_hour"]  # 디테일 매트릭스 (행=시각)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="카테고리/스트리머 이동 구간 통계")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="기존 이력(스토어/와이드 매트릭스) → 상태/요약")
+    s = sub.add_parser("summary", help="요약 상위 n개")
+    s.add_argument("matrix", type=pathlib.Path)
+    s.add_argument("-n", type=int, default=20)
+    s.add_argument("--sort", default="avg_24h")
+    r = sub.add_parser("series", help="전체 이력 이동 통계 → CSV")
+    r.add_argument("matrix", type=pathlib.Path)
+    r.add_argument("--window", type=int, default=DAY, help="구간 길이 (--resample 단위)")
+    r.add_argument("--stat", choices=["mean", "max", "growth"], default="mean")
+    r.add_argument("--resample", type=int, default=1, help="N시간 평균으로 먼저 묶기 (24=일)")
+    r.add_argument("--out", type=pathlib.Path)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "rebuild":
+        targets = [(pathlib.Path(p), index) for p, index in SOURCES.values()]
+        targets += [(p, ["captured_hour"]) for p in sorted(pathlib.Path(".").glob(SOOP_DETAILS_GLOB))]
+        for path, index in targets:
+            if path.exists() or _from_store(path):
+                print(f"rebuilt -> {rebuild(path, index)}")
+        return
+    if args.cmd == "summary":
+        df = load_summary(args.matrix)
+        print(df.sort_values(args.sort, ascending=False).head(args.n).to_string(index=False))
+        return
+    df = series(args.matrix, _index_for(args.matrix), args.window, args.stat, args.resample)
+    if args.out:
+        atomic_io.write_csv(df, args.out, index=False)
+        print(f"written -> {args.out} ({len(df)} rows, {df.shape[1] - 2} hours)")
+    else:
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# run_metrics.py
+# -*- coding: utf-8 -*-
+"""
+수집기 실행별 단계 시간/카운터 계측
+- @run_metrics.instrumented("collect_categories") 를 main에 붙이면 실행마다 RunMetrics 하나를 만들고,
+  끝날 때(예외 포함) JSON 한 줄을 stdout에 출력
+    {"metrics": "collector_run", "job": ..., "status": "ok"|"error", "seconds": ...,
+     "stages": {"fetch": 1.2, "http": 3.4, ...}, "counters": {"pages": 5, ...},
+     "matrices": {"data/soop/categories_matrix.csv": [행, 열]}}
+- 코드 곳곳에서는 모듈 함수만 호출 (실행 중이 아니면 아무것도 하지 않음)
+    with run_metrics.stage("pivot"): ...
+    run_metrics.count("rows", len(df))
+    run_metrics.matrix(path, m.shape)
+- 현재 실행은 contextvars로 구분 → 데몬(collector.py)에서 작업이 동시에 돌아도 섞이지 않음
+  (fetch_engine 스레드 풀은 제출할 때 컨텍스트를 복사해 넘김)
+- 단계는 누적(같은 이름을 여러 번 지나면 합산)이고 중첩될 수 있음 (바깥 단계 시간에 안쪽 포함).
+  http는 요청 스레드들의 시간 합이라 동시 수집이면 fetch(벽시계)보다 클 수 있음
+
+주요 단계: fetch(수집 전체), http(요청), normalize(JSON→DataFrame), snapshot/master/bj_master/store/db(기록),
+          parse(CSV 읽기), pivot(와이드 변환), write(매트릭스 기록)
+주요 카운터: http_requests, http_retries, http_errors(연결 오류), http_status_<코드>(재시도한 응답), pages, bytes_received, rows
+
+환경변수:
+  METRICS_JSONL         이 파일에도 JSON 줄을 append
+  METRICS_TEXTFILE_DIR  Prometheus node_exporter textfile collector용 <job>.prom 기록
+"""
+
+from __future__ import annotations
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import pathlib
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import atomic_io
+
+METRICS_JSONL = os.getenv("METRICS_JSONL", "")
+METRICS_TEXTFILE_DIR = os.getenv("METRICS_TEXTFILE_DIR", "")
+
+_current: contextvars.ContextVar[Optional["RunMetrics"]] = contextvars.ContextVar("run_metrics", default=None)
+
+
+class RunMetrics:
+    def __init__(self, job: str):
+        self.job = job
+        self.started = time.time()
+        self.seconds = 0.0
+        self.status = "running"
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, float] = {}
+        self.matrices: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + dt
+
+    def count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def matrix(self, path: pathlib.Path, shape: Tuple[int, int]) -> None:
+        with self._lock:
+            self.matrices[str(path)] = (int(shape[0]), int(shape[1]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "metrics": "collector_run",
+                "job": self.job,
+                "started_at_utc": datetime.fromtimestamp(self.started, timezone.utc).replace(microsecond=0).isoformat(),
+                "status": self.status,
+                "seconds": round(self.seconds, 3),
+                "stages": {k: round(v, 4) for k, v in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "matrices": {k: list(v) for k, v in sorted(self.matrices.items())},
+            }
+
+    # ---- 출력 ----
+    def emit(self) -> Dict[str, Any]:
+        d = self.to_dict()
+        line = json.dumps(d, ensure_ascii=False)
+        print(line, flush=True)
+        if METRICS_JSONL:
+            atomic_io.append_bytes(pathlib.Path(METRICS_JSONL), (line + "\n").encode("utf-8"))
+        if METRICS_TEXTFILE_DIR:
+            atomic_io.write_text(pathlib.Path(METRICS_TEXTFILE_DIR) / f"{self.job}.prom", prometheus_text(d))
+        return d
+
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _label(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def prometheus_text(d: Dict[str, Any]) -> str:
+    """to_dict() 결과 → Prometheus 텍스트 포맷 (게이지, 마지막 실행 값)"""
+    job = _label(d["job"])
+    lines = [
+        "# HELP collector_last_run_timestamp_seconds Start time of the last collector run.",
+        "# TYPE collector_last_run_timestamp_seconds gauge",
+        f'collector_last_run_timestamp_seconds{{job="{job}"}} {datetime.fromisoformat(d["started_at_utc"]).timestamp():.0f}',
+        "# HELP collector_run_success Whether the last collector run finished without an exception.",
+        "# TYPE collector_run_success gauge",
+        f'collector_run_success{{job="{job}"}} {1 if d["status"] == "ok" else 0}',
+        "# HELP collector_run_seconds Wall time of the last collector run.",
+        "# TYPE collector_run_seconds gauge",
+        f'collector_run_seconds{{job="{job}"}} {d["seconds"]}',
+        "# HELP collector_stage_seconds Time spent per stage in the last collector run.",
+        "# TYPE collector_stage_seconds gauge",
+    ]
+    lines += [f'collector_stage_seconds{{job="{job}",stage="{_label(k)}"}} {v}' for k, v in d["stages"].items()]
+    for k, v in d["counters"].items():
+        name = "collector_" + _NAME_RE.sub("_", k)
+        lines += [f"# TYPE {name} gauge", f'{name}{{job="{job}"}} {v}']
+    if d["matrices"]:
+        lines += ["# HELP collector_matrix_rows Rows of each wide matrix after the last run.",
+                  "# TYPE collector_matrix_rows gauge"]
+        lines += [f'collector_matrix_rows{{job="{job}",path="{_label(p)}"}} {rc[0]}' for p, rc in d["matrices"].items()]
+        lines += ["# HELP collector_matrix_cols Columns of each wide matrix after the last run.",
+                  "# TYPE collector_matrix_cols gauge"]
+        lines += [f'collector_matrix_cols{{job="{job}",path="{_label(p)}"}} {rc[1]}' for p, rc in d["matrices"].items()]
+    return "\n".join(lines) + "\n"
+
+
+# ======================
+# 현재 실행에 기록 (실행 중이 아니면 no-op)
+# ======================
+def current() -> Optional[RunMetrics]:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    run = _current.get()
+    if run is None:
+        yield
+        return
+    with run.stage(name):
+        yield
+
+
+def count(name: str, n: float = 1) -> None:
+    run = _current.get()
+    if run is not None:
+        run.count(name, n)
+
+
+def matrix(path: pathlib.Path, shape: Tuple[int, int]) -> None:
+    run = _current.get()
+    if run is not None:
+        run.matrix(path, shape)
+
+
+def instrumented(job: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """main(...)을 감싸 실행 하나를 계측하고 끝에 emit"""
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = RunMetrics(job)
+            token = _current.set(run)
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                run.status = "ok"
+                return result
+            except BaseException:
+                run.status = "error"
+                raise
+            finally:
+                run.seconds = time.perf_counter() - t0
+                _current.reset(token)
+                run.emit()
+        return wrapper
+    return deco
@@ -0,0 +1,222 @@
+# snapshot_archive.py
+# -*- coding: utf-8 -*-
+"""
+시각별 스냅샷 CSV 압축 아카이브
+- 기존: <스냅샷 루트>/YYYY/MM/DD/HH.csv  (시간마다 작은 파일 하나 → 파일 수천 개)
+- 아카이브: <스냅샷 루트>_archive/YYYY/MM.csv.gz + MM.index.json (월마다 파일 2개)
+  · MM.csv.gz   : 시간마다 원본 CSV 바이트(BOM/헤더 포함)를 gzip 멤버 하나로 이어붙임
+  · MM.index.json: {"YYYY-MM-DDTHH": [offset, length]} → 한 시간만 바로 찾아 읽기
+  · 같은 시간을 다시 쓰면 멤버를 뒤에 붙이고 인덱스를 새 멤버로 교체(최근 값 우선)
+- 한 달치는 월 파일 한 번의 순차 읽기로 스캔 (iter_hours)
+
+스냅샷 루트 예:
+  data/soop/categories                  → data/soop/categories_archive
+  data/soop/details/<cat>/snapshots     → data/soop/details/<cat>/snapshots_archive
+
+수집기는 SNAPSHOT_ARCHIVE="true"면 시간별 CSV 대신 아카이브에 기록.
+
+사용:
+  python snapshot_archive.py compact data/soop/categories [--delete]   # 기존 시간별 CSV 접어넣기
+  python snapshot_archive.py compact --all [--delete]                  # SOOP 스냅샷 전부
+  python snapshot_archive.py cat data/soop/categories 2025-08-26T11    # 한 시간 출력
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import io
+import json
+import os
+import pathlib
+import re
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+import atomic_io
+
+SNAPSHOT_ARCHIVE = os.getenv("SNAPSHOT_ARCHIVE", "false").lower() == "true"
+
+SOOP_ROOT = pathlib.Path("data/soop")
+_HOUR_FILE_RE = re.compile(r"(\d{4})/(\d{2})/(\d{2})/(\d{2})\.csv$")
+
+
+# ======================
+# 경로 / 인덱스
+# ======================
+def archive_root(snap_root: pathlib.Path) -> pathlib.Path:
+    snap_root = pathlib.Path(snap_root)
+    return snap_root.parent / f"{snap_root.name}_archive"
+
+
+def hour_key(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H")
+
+
+def month_paths(snap_root: pathlib.Path, key: str) -> Tuple[pathlib.Path, pathlib.Path]:
+    """'YYYY-MM-DDTHH' → (월 데이터 파일, 월 인덱스 파일)"""
+    base = archive_root(snap_root) / key[0:4]
+    return base / f"{key[5:7]}.csv.gz", base / f"{key[5:7]}.index.json"
+
+
+def load_index(index_path: pathlib.Path) -> Dict[str, List[int]]:
+    if not index_path.exists():
+        return {}
+    return json.loads(index_path.read_text(encoding="utf-8"))
+
+
+def _save_index(index_path: pathlib.Path, index: Dict[str, List[int]]) -> None:
+    atomic_io.write_text(index_path, json.dumps(dict(sorted(index.items())), indent=0))
+
+
+# ======================
+# 쓰기
+# ======================
+def append_hours(snap_root: pathlib.Path, items: List[Tuple[str, bytes]]) -> List[pathlib.Path]:
+    """(시간 키, CSV 바이트) 목록을 월별로 묶어 gzip 멤버로 append하고 인덱스 갱신"""
+    by_month: Dict[Tuple[pathlib.Path, pathlib.Path], List[Tuple[str, bytes]]] = {}
+    for key, raw in items:
+        by_month.setdefault(month_paths(snap_root, key), []).append((key, raw))
+
+    written = []
+    for (data_path, index_path), month_items in sorted(by_month.items()):
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_io.file_lock(data_path):  # 인덱스 읽기 ~ 기록까지 한 프로세스만
+            index = load_index(index_path)
+            with open(data_path, "ab") as f:
+                offset = f.seek(0, io.SEEK_END)
+                for key, raw in month_items:
+                    member = gzip.compress(raw, mtime=0)
+                    f.write(member)
+                    index[key] = [offset, len(member)]
+                    offset += len(member)
+                f.flush()
+                os.fsync(f.fileno())
+            _save_index(index_path, index)  # 데이터 기록 후 인덱스 (중단돼도 인덱스는 온전한 멤버만 가리킴)
+        written.append(data_path)
+    return written
+
+
+def write_snapshot(df: pd.DataFrame, snap_root: pathlib.Path, ts: datetime) -> pathlib.Path:
+    """스냅샷 DataFrame을 시간별 CSV와 같은 바이트(utf-8-sig)로 아카이브에 기록"""
+    raw = df.to_csv(index=False).encode("utf-8-sig")
+    return append_hours(snap_root, [(hour_key(ts), raw)])[0]
+
+
+# ======================
+# 읽기
+# ======================
+def _parse(raw: bytes) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(gzip.decompress(raw)), encoding="utf-8-sig", dtype=str)
+
+
+def read_hour(snap_root: pathlib.Path, key: str) -> Optional[pd.DataFrame]:
+    """한 시간('YYYY-MM-DDTHH') 스냅샷 (모든 열 문자열), 없으면 None"""
+    data_path, index_path = month_paths(snap_root, key)
+    span = load_index(index_path).get(key)
+    if span is None:
+        return None
+    with open(data_path, "rb") as f:
+        f.seek(span[0])
+        return _parse(f.read(span[1]))
+
+
+def iter_months(snap_root: pathlib.Path) -> Iterator[Tuple[pathlib.Path, pathlib.Path]]:
+    for index_path in sorted(archive_root(snap_root).glob("[0-9][0-9][0-9][0-9]/[0-9][0-9].index.json")):
+        yield index_path.with_name(index_path.name.replace(".index.json", ".csv.gz")), index_path
+
+
+def iter_hours(snap_root: pathlib.Path, start: Optional[str] = None,
+               end: Optional[str] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """기간(시간 키 앞부분 비교, 양끝 포함) 내 스냅샷을 시간순으로. 월 파일은 한 번에 순차 읽기."""
+    for data_path, index_path in iter_months(snap_root):
+        index = load_index(index_path)
+        keys = [k for k in sorted(index) if (not start or k >= start[:13]) and (not end or k[:len(end[:13])] <= end[:13])]
+        if not keys:
+            continue
+        blob = data_path.read_bytes()
+        for k in keys:
+            off, length = index[k]
+            yield k, _parse(blob[off:off + length])
+
+
+def read_range(snap_root: pathlib.Path, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    frames = [df for _, df in iter_hours(snap_root, start, end)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+# ======================
+# 압축(기존 시간별 CSV → 아카이브)
+# ======================
+def compact(snap_root: pathlib.Path, delete: bool = False) -> int:
+    """
+    snap_root 아래 YYYY/MM/DD/HH.csv를 월 아카이브로 접어넣음.
+    이미 아카이브에 있는 시간은 건너뜀. delete=True면 옮긴(또는 이미 있던) 시간별 CSV 삭제.
+    반환: 새로 넣은 시간 수
+    """
+    snap_root = pathlib.Path(snap_root)
+    found: List[Tuple[str, pathlib.Path]] = []
+    for p in snap_root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]/[0-9][0-9].csv"):
+        m = _HOUR_FILE_RE.search(p.relative_to(snap_root).as_posix())
+        if m:
+            found.append((f"{m[1]}-{m[2]}-{m[3]}T{m[4]}", p))
+    found.sort()
+
+    indexes: Dict[pathlib.Path, Dict[str, List[int]]] = {}
+    todo: List[Tuple[str, bytes]] = []
+    for key, p in found:
+        _, index_path = month_paths(snap_root, key)
+        if index_path not in indexes:
+            indexes[index_path] = load_index(index_path)
+        if key not in indexes[index_path]:
+            todo.append((key, p.read_bytes()))
+    if todo:
+        append_hours(snap_root, todo)
+
+    if delete:
+        for _, p in found:
+            p.unlink()
+        for d in sorted({p.parent for _, p in found}, key=lambda x: len(x.parts), reverse=True):
+            for dd in (d, d.parent, d.parent.parent):
+                try:
+                    dd.rmdir()
+                except OSError:
+                    pass
+    return len(todo)
+
+
+def soop_snapshot_roots() -> List[pathlib.Path]:
+    roots = [SOOP_ROOT / "categories"]
+    roots += sorted(p for p in (SOOP_ROOT / "details").glob("*/snapshots") if p.is_dir())
+    return roots
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="스냅샷 CSV 월 아카이브")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compact", help="시간별 CSV를 월 아카이브로 접어넣기")
+    c.add_argument("roots", nargs="*", type=pathlib.Path)
+    c.add_argument("--all", action="store_true", help="SOOP 카테고리/디테일 스냅샷 루트 전부")
+    c.add_argument("--delete", action="store_true", help="접어넣은 시간별 CSV 삭제")
+    r = sub.add_parser("cat", help="한 시간 스냅샷을 CSV로 출력")
+    r.add_argument("root", type=pathlib.Path)
+    r.add_argument("hour", help="YYYY-MM-DDTHH")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "compact":
+        roots = soop_snapshot_roots() if args.all else args.roots
+        if not roots:
+            ap.error("compact: 루트를 주거나 --all 사용")
+        for root in roots:
+            n = compact(root, delete=args.delete)
+            print(f"compacted {root} -> {archive_root(root)} (+{n} hours)")
+    else:
+        df = read_hour(args.root, args.hour[:13])
+        if df is None:
+            raise SystemExit(f"{args.hour}: 아카이브에 없음")
+        print(df.to_csv(index=False), end="")
+
+
+if __name__ == "__main__":
+    main()
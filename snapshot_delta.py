@@ -0,0 +1,289 @@
+# snapshot_delta.py
+# -*- coding: utf-8 -*-
+"""
+SOOP 디테일 스냅샷 델타 인코딩
+- 연속된 시간의 디테일 스냅샷은 방송 중인 BJ의 broad_title / hash_tags / broad_start / user_nick이
+  그대로 반복되고 view_cnt만 바뀜 → 직전 스냅샷 대비 broad_no별로 '바뀐 필드'만 기록
+- 파일: <스냅샷 루트>_delta/YYYY/MM/DD/HH.key.csv   키프레임 (시간별 CSV와 같은 전체 스냅샷)
+                                      HH.delta.csv 델타 (op, _empty, <원본 열 순서>)
+    op '~'  broad_no 행: 값이 있는 셀만 바뀐 값 (새 방송은 값이 있는 셀 전부)
+       '='  broad_no 행 변경 없음 (행 유지)
+       '-'  broad_no 행 삭제 (방송 종료/카테고리 이탈)
+       '@'  모든 행에 같은 값 (captured_at_utc처럼 스냅샷 전체가 같은 값인 열)
+    _empty  빈 문자열로 '바뀐' 열 번호('.' 구분) → 빈 셀(그대로)과 구분
+    '~'/'=' 행 순서 = 원본 행 순서, 같은 broad_no가 여러 행이면 두 번째부터 'broad_no#n'
+- 키프레임: 체인의 첫 시간, 날짜(UTC)가 바뀐 첫 시간(→ 하루치는 그날 파일만으로 복원),
+  직전 키프레임 뒤 델타가 DELTA_KEYFRAME_EVERY-1개 쌓였을 때, broad_no 열이 없는 스냅샷
+- 복원: 해당 시간 이하의 가장 최근 키프레임부터 델타를 순서대로 적용
+  (모든 값은 문자열, 시간별 CSV를 dtype=str, keep_default_na=False로 읽은 것과 같음)
+
+수집기는 DETAILS_SNAPSHOT_DELTA="true"면 시간별 CSV 대신 델타 트리에 기록.
+
+사용:
+  python snapshot_delta.py convert data/soop/details/00040070_버추얼/snapshots   # 기존 시간별 CSV(+아카이브) 변환
+  python snapshot_delta.py convert --all
+  python snapshot_delta.py cat data/soop/details/00040070_버추얼/snapshots 2025-08-26T11
+"""
+
+from __future__ import annotations
+import argparse
+import io
+import os
+import pathlib
+import re
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import atomic_io
+import snapshot_archive
+
+DETAILS_SNAPSHOT_DELTA = os.getenv("DETAILS_SNAPSHOT_DELTA", "false").lower() == "true"
+DELTA_KEYFRAME_EVERY = int(os.getenv("DELTA_KEYFRAME_EVERY", "24"))
+
+KEY = "broad_no"
+_FILE_RE = re.compile(r"(\d{4})/(\d{2})/(\d{2})/(\d{2})\.(key|delta)\.csv$")
+
+Hour = Tuple[str, pathlib.Path, bool]  # ('YYYY-MM-DDTHH', 파일, 키프레임 여부)
+
+
+# ======================
+# 경로
+# ======================
+def delta_root(snap_root: pathlib.Path) -> pathlib.Path:
+    snap_root = pathlib.Path(snap_root)
+    return snap_root.parent / f"{snap_root.name}_delta"
+
+
+def hour_path(snap_root: pathlib.Path, key: str, keyframe: bool) -> pathlib.Path:
+    """'YYYY-MM-DDTHH' → 파일 경로"""
+    kind = "key" if keyframe else "delta"
+    return delta_root(snap_root) / key[0:4] / key[5:7] / key[8:10] / f"{key[11:13]}.{kind}.csv"
+
+
+def list_hours(snap_root: pathlib.Path) -> List[Hour]:
+    """시간순 (같은 시간에 두 종류가 다 있으면 키프레임)"""
+    found: Dict[str, Hour] = {}
+    root = delta_root(snap_root)
+    for p in root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]/[0-9][0-9].*.csv"):
+        m = _FILE_RE.search(p.relative_to(root).as_posix())
+        if not m:
+            continue
+        key = f"{m[1]}-{m[2]}-{m[3]}T{m[4]}"
+        keyframe = m[5] == "key"
+        if key not in found or keyframe:
+            found[key] = (key, p, keyframe)
+    return [found[k] for k in sorted(found)]
+
+
+# ======================
+# 인코딩 / 복원
+# ======================
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """시간별 CSV로 썼다가 문자열로 다시 읽은 것과 같은 모양"""
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)), dtype=str, keep_default_na=False)
+
+
+def _read(path: pathlib.Path) -> pd.DataFrame:
+    return pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+
+
+def _row_keys(df: pd.DataFrame) -> np.ndarray:
+    """broad_no 행 키. 같은 broad_no가 여러 행이면(페이지 경계 중복) 두 번째부터 'broad_no#n'"""
+    n = df.groupby(KEY, sort=False).cumcount().to_numpy()
+    keys = df[KEY].to_numpy(dtype=object).copy()
+    dup = n > 0
+    keys[dup] = [f"{k}#{i}" for k, i in zip(keys[dup], n[dup])]
+    return keys
+
+
+def encode(prev: pd.DataFrame, cur: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    prev → cur 델타 (둘 다 normalize된 프레임). 키(broad_no)가 없으면 None (키프레임으로 기록).
+    열: op, _empty, <cur 열 순서> — 값이 있는 셀 = 바뀐 값, 빈 셀 = 그대로,
+    _empty = 빈 문자열로 바뀐 열 번호('.' 구분)
+    """
+    if KEY not in cur.columns or KEY not in prev.columns:
+        return None
+
+    cols = list(cur.columns)
+    const = [c for c in cols if c != KEY and len(cur) and cur[c].nunique() == 1]
+    fields = [c for c in cols if c != KEY and c not in const]
+    out_cols = ["op", "_empty", *cols]
+
+    keys = _row_keys(cur)
+    new = cur[fields].to_numpy(dtype=object)
+    old = (prev.set_index(_row_keys(prev)).reindex(columns=fields).reindex(keys)
+           .fillna("").to_numpy(dtype=object))  # 새 방송/새 열은 빈 값 대비
+    changed = new != old
+
+    body = pd.DataFrame(np.where(changed, new, ""), columns=fields)
+    body.insert(0, KEY, keys)
+    body.insert(0, "_empty", [".".join(str(cols.index(fields[j])) for j in np.flatnonzero(r))
+                              for r in changed & (new == "")])
+    body.insert(0, "op", np.where(changed.any(axis=1), "~", "="))
+
+    prev_keys = _row_keys(prev)
+    gone = pd.DataFrame({"op": "-", KEY: prev_keys[~np.isin(prev_keys, keys)]})
+    head = pd.DataFrame([{"op": "@", "_empty": ".".join(str(cols.index(c)) for c in const if cur[c].iloc[0] == ""),
+                          **{c: cur[c].iloc[0] for c in const}}]) if const else None
+    frames = [f for f in (head, body, gone) if f is not None]
+    return pd.concat(frames, ignore_index=True).reindex(columns=out_cols).fillna("")
+
+
+def apply(prev: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """prev에 델타를 적용한 다음 시간 스냅샷"""
+    cols = list(delta.columns[2:])
+    fields = [c for c in cols if c != KEY]
+    ops = delta["op"].to_numpy(dtype=object)
+    cells = delta[fields].to_numpy(dtype=object)
+    setmask = cells != ""
+    for i in np.flatnonzero(delta["_empty"].to_numpy(dtype=object) != ""):
+        for j in delta["_empty"].iat[i].split("."):
+            setmask[i, fields.index(cols[int(j)])] = True
+
+    live = np.flatnonzero((ops == "~") | (ops == "="))
+    order = delta[KEY].to_numpy(dtype=object)[live]
+    base = prev.set_index(_row_keys(prev)).reindex(columns=fields).reindex(order).fillna("")
+    values = base.to_numpy(dtype=object)
+
+    rr, cc = np.nonzero(setmask[live])
+    values[rr, cc] = cells[live][rr, cc]
+    for i in np.flatnonzero(ops == "@"):  # 스냅샷 전체가 같은 값인 열
+        for j in np.flatnonzero(setmask[i]):
+            values[:, j] = cells[i, j]
+
+    out = pd.DataFrame(values, columns=fields, dtype=object)
+    out.insert(0, KEY, [k.split("#", 1)[0] for k in order])
+    return out[cols].astype(str)
+
+
+def _replay(chain: List[Hour]) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """키프레임으로 시작하는 체인을 순서대로 복원"""
+    cur: Optional[pd.DataFrame] = None
+    for key, path, keyframe in chain:
+        cur = _read(path) if keyframe or cur is None else apply(cur, _read(path))
+        yield key, cur
+
+
+def _chain_start(hours: List[Hour], i: int) -> int:
+    while i > 0 and not hours[i][2]:
+        i -= 1
+    return i
+
+
+def read_hour(snap_root: pathlib.Path, key: str) -> Optional[pd.DataFrame]:
+    """한 시간('YYYY-MM-DDTHH') 전체 스냅샷 (모든 열 문자열), 없으면 None"""
+    hours = list_hours(snap_root)
+    keys = [h[0] for h in hours]
+    if key[:13] not in keys:
+        return None
+    i = keys.index(key[:13])
+    df = None
+    for _, df in _replay(hours[_chain_start(hours, i):i + 1]):
+        pass
+    return df
+
+
+def iter_hours(snap_root: pathlib.Path, start: Optional[str] = None,
+               end: Optional[str] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """기간(시간 키 앞부분 비교, 양끝 포함) 내 스냅샷을 시간순으로 (체인을 한 번만 따라감)"""
+    hours = list_hours(snap_root)
+    lo = next((i for i, h in enumerate(hours) if not start or h[0] >= start[:13]), len(hours))
+    hi = len(hours)
+    if end:
+        hi = next((i for i, h in enumerate(hours) if h[0][:len(end[:13])] > end[:13]), len(hours))
+    if lo >= hi:
+        return
+    for key, df in _replay(hours[_chain_start(hours, lo):hi]):
+        if key >= hours[lo][0]:
+            yield key, df
+
+
+# ======================
+# 쓰기
+# ======================
+def _write(snap_root: pathlib.Path, key: str, cur: pd.DataFrame, prev: Optional[pd.DataFrame],
+           chain_key: str, since_keyframe: int) -> pathlib.Path:
+    """chain_key: 직전 체인의 키프레임 시간, since_keyframe: 그 뒤 델타 수"""
+    delta = None
+    if prev is not None and chain_key[:10] == key[:10] and since_keyframe < DELTA_KEYFRAME_EVERY - 1:
+        delta = encode(prev, cur)
+    path = hour_path(snap_root, key, keyframe=delta is None)
+    atomic_io.write_csv(cur if delta is None else delta, path, index=False)
+    other = hour_path(snap_root, key, keyframe=delta is not None)
+    if other.exists():  # 같은 시간 재수집: 다른 종류의 이전 파일 제거
+        other.unlink()
+    return path
+
+
+def write_snapshot(df: pd.DataFrame, snap_root: pathlib.Path, ts: datetime) -> pathlib.Path:
+    """스냅샷을 직전 시간 대비 델타(또는 키프레임)로 기록"""
+    key = snapshot_archive.hour_key(ts)
+    hours = [h for h in list_hours(snap_root) if h[0] < key]
+    prev, chain_key, since = None, "", 0
+    if hours:
+        start = _chain_start(hours, len(hours) - 1)
+        for _, prev in _replay(hours[start:]):
+            pass
+        chain_key, since = hours[start][0], len(hours) - 1 - start
+    return _write(snap_root, key, normalize(df), prev, chain_key, since)
+
+
+def convert(snap_root: pathlib.Path) -> int:
+    """
+    기존 시간별 CSV(+월 아카이브) → 델타 트리 (아카이브보다 시간별 CSV 우선).
+    델타 트리를 처음부터 다시 만듦. 반환: 기록한 시간 수
+    """
+    snap_root = pathlib.Path(snap_root)
+    sources: Dict[str, pd.DataFrame] = {}
+    for key, df in snapshot_archive.iter_hours(snap_root):
+        sources[key] = df
+    for p in snap_root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]/[0-9][0-9].csv"):
+        y, m, d = p.parent.parent.parent.name, p.parent.parent.name, p.parent.name
+        sources[f"{y}-{m}-{d}T{p.stem}"] = p
+
+    for _, path, _ in list_hours(snap_root):
+        path.unlink()
+    prev, chain_key, since = None, "", 0
+    for key in sorted(sources):
+        src = sources[key]
+        cur = _read(src) if isinstance(src, pathlib.Path) else normalize(src)
+        path = _write(snap_root, key, cur, prev, chain_key, since)
+        if path.name.endswith(".key.csv"):
+            chain_key, since = key, 0
+        else:
+            since += 1
+        prev = cur
+    return len(sources)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="SOOP 디테일 스냅샷 델타 인코딩")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="시간별 CSV(+아카이브)를 델타 트리로 변환")
+    c.add_argument("roots", nargs="*", type=pathlib.Path)
+    c.add_argument("--all", action="store_true", help="SOOP 디테일 스냅샷 루트 전부")
+    r = sub.add_parser("cat", help="한 시간 스냅샷을 복원해 CSV로 출력")
+    r.add_argument("root", type=pathlib.Path)
+    r.add_argument("hour", help="YYYY-MM-DDTHH")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "convert":
+        roots = [p for p in snapshot_archive.soop_snapshot_roots() if p.name == "snapshots"] if args.all else args.roots
+        if not roots:
+            ap.error("convert: 루트를 주거나 --all 사용")
+        for root in roots:
+            n = convert(root)
+            print(f"converted {root} -> {delta_root(root)} ({n} hours)")
+    else:
+        df = read_hour(args.root, args.hour[:13])
+        if df is None:
+            raise SystemExit(f"{args.hour}: 델타 트리에 없음")
+        print(df.to_csv(index=False), end="")
+
+
+if __name__ == "__main__":
+    main()
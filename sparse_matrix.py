@@ -0,0 +1,192 @@
+# sparse_matrix.py
+# -*- coding: utf-8 -*-
+"""
+희소(sparse) 매트릭스 저장 백엔드
+- 스트리머×시간 매트릭스는 대부분이 결측(방송한 시간만 값이 있음)
+  → 값이 있는 셀만 COO 트리플릿(row_idx, col_idx, value) numpy 배열로 보관
+- 디스크: .npz (numpy 압축, 행/열 라벨 + 트리플릿), 밀집(dense) 변환은 to_frame()으로 필요할 때만
+- 행/열 슬라이스: 정렬 순서(argsort)를 캐시해 searchsorted로 O(log n + k)
+- matrix_cache의 항목으로 그대로 쓸 수 있음 (assign / to_frame / save)
+
+사용:
+  python sparse_matrix.py details_matrix.npz out.csv   # 밀집 CSV로 내보내기
+"""
+
+from __future__ import annotations
+import pathlib
+import sys
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import atomic_io
+import matrix_cache
+
+
+def _norm(v):
+    return "" if isinstance(v, float) and v != v else v
+
+
+class SparseMatrix:
+    """행 라벨 × 열 라벨 int64 값, 값이 있는 셀만 저장 (같은 셀은 나중 값 우선)"""
+
+    def __init__(self, index_name: str = "captured_hour"):
+        self.index_name = index_name
+        self.row_labels: List[Hashable] = []
+        self.col_labels: List[Hashable] = []
+        self.row_pos: Dict[Hashable, int] = {}
+        self.col_pos: Dict[Hashable, int] = {}
+        self.r = np.zeros(0, dtype=np.int64)
+        self.c = np.zeros(0, dtype=np.int64)
+        self.v = np.zeros(0, dtype=np.int64)
+        self._by_row: Optional[np.ndarray] = None
+        self._by_col: Optional[np.ndarray] = None
+
+    @property
+    def shape(self):
+        return len(self.row_labels), len(self.col_labels)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.v)
+
+    # ---- 라벨 ----
+    def _positions(self, labels, pos: Dict[Hashable, int], store: List[Hashable]) -> np.ndarray:
+        out = np.empty(len(labels), dtype=np.int64)
+        for i, k in enumerate(labels):
+            k = _norm(k)
+            p = pos.get(k)
+            if p is None:
+                p = pos[k] = len(store)
+                store.append(k)
+            out[i] = p
+        return out
+
+    # ---- 갱신 ----
+    def assign(self, frame: pd.DataFrame, replace_cols: bool = False) -> None:
+        """
+        frame(행/열 라벨이 붙은 값)의 결측이 아닌 셀을 반영.
+        replace_cols=True면 frame 열들의 기존 셀을 먼저 지움.
+        """
+        ri = self._positions(list(frame.index), self.row_pos, self.row_labels)
+        ci = self._positions(list(frame.columns), self.col_pos, self.col_labels)
+        if replace_cols and len(ci) and self.nnz:
+            keep = ~np.isin(self.c, ci)
+            self.r, self.c, self.v = self.r[keep], self.c[keep], self.v[keep]
+        if len(ri) and len(ci):
+            block = matrix_cache.numeric_block(frame)
+            rr, cc = np.nonzero(~np.isnan(block))
+            self.r = np.concatenate([self.r, ri[rr]])
+            self.c = np.concatenate([self.c, ci[cc]])
+            self.v = np.concatenate([self.v, block[rr, cc].astype(np.int64)])
+        self.compact()
+
+    def compact(self) -> None:
+        """같은 (행, 열) 중복은 마지막 값만 남기고 (행, 열) 순으로 정렬"""
+        if not self.nnz:
+            return
+        n_cols = max(len(self.col_labels), 1)
+        key = self.r * n_cols + self.c
+        # 뒤집은 배열에서의 첫 등장 = 마지막 값 (np.unique 결과는 key 오름차순)
+        _, first = np.unique(key[::-1], return_index=True)
+        idx = len(key) - 1 - first
+        self.r, self.c, self.v = self.r[idx], self.c[idx], self.v[idx]
+        self._by_row = None
+        self._by_col = None
+
+    # ---- 슬라이스 ----
+    def row(self, label: Hashable) -> pd.Series:
+        """한 행(예: 한 시각)의 값 (열 라벨 → 값)"""
+        p = self.row_pos.get(_norm(label))
+        if p is None:
+            return pd.Series(dtype="Int64")
+        if self._by_row is None:
+            self._by_row = np.argsort(self.r, kind="stable")
+        rs = self.r[self._by_row]
+        lo, hi = np.searchsorted(rs, p, "left"), np.searchsorted(rs, p, "right")
+        sel = self._by_row[lo:hi]
+        return pd.Series(self.v[sel], index=[self.col_labels[j] for j in self.c[sel]], dtype="Int64")
+
+    def col(self, label: Hashable) -> pd.Series:
+        """한 열(예: 한 스트리머)의 값 (행 라벨 → 값)"""
+        p = self.col_pos.get(_norm(label))
+        if p is None:
+            return pd.Series(dtype="Int64")
+        if self._by_col is None:
+            self._by_col = np.argsort(self.c, kind="stable")
+        cs = self.c[self._by_col]
+        lo, hi = np.searchsorted(cs, p, "left"), np.searchsorted(cs, p, "right")
+        sel = self._by_col[lo:hi]
+        s = pd.Series(self.v[sel], index=[self.row_labels[i] for i in self.r[sel]], dtype="Int64")
+        return s.sort_index()
+
+    # ---- 변환 ----
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "SparseMatrix":
+        m = cls(frame.index.name or "captured_hour")
+        m.assign(frame)
+        return m
+
+    def to_frame(self) -> pd.DataFrame:
+        """밀집 Int64 DataFrame (행/열 라벨 오름차순) — 작업량 O(행×열)"""
+        n_r, n_c = self.shape
+        vals = np.zeros((n_r, n_c), dtype=np.int64)
+        mask = np.ones((n_r, n_c), dtype=bool)
+        vals[self.r, self.c] = self.v
+        mask[self.r, self.c] = False
+        data = {j: pd.arrays.IntegerArray(vals[:, j].copy(), mask[:, j].copy()) for j in range(n_c)}
+        frame = pd.DataFrame(data, index=pd.Index(self.row_labels, name=self.index_name, dtype=object))
+        frame.columns = pd.Index(self.col_labels, dtype=object)
+        return frame.sort_index(axis=0).sort_index(axis=1)
+
+    # ---- 저장/로드 ----
+    def save(self, path: pathlib.Path) -> pathlib.Path:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_io.atomic_open(path, "wb") as f:  # 파일 핸들로 넘겨 확장자 자동 추가 방지
+            np.savez_compressed(
+                f,
+                index_name=np.array(self.index_name),
+                row_labels=_label_array(self.row_labels),
+                col_labels=_label_array(self.col_labels),
+                r=self.r.astype(np.int32), c=self.c.astype(np.int32), v=self.v,
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "SparseMatrix":
+        with np.load(path, allow_pickle=False) as z:
+            m = cls(str(z["index_name"]))
+            m.row_labels = _label_list(z["row_labels"])
+            m.col_labels = _label_list(z["col_labels"])
+            m.r, m.c, m.v = z["r"].astype(np.int64), z["c"].astype(np.int64), z["v"].astype(np.int64)
+        m.row_pos = {k: i for i, k in enumerate(m.row_labels)}
+        m.col_pos = {k: j for j, k in enumerate(m.col_labels)}
+        return m
+
+
+def _label_array(labels: Sequence[Hashable]) -> np.ndarray:
+    # 정수 라벨(sid)은 int64, 나머지는 유니코드 문자열
+    if labels and all(isinstance(x, (int, np.integer)) for x in labels):
+        return np.asarray(labels, dtype=np.int64)
+    return np.asarray([str(x) for x in labels], dtype=str)
+
+
+def _label_list(arr: np.ndarray) -> List[Hashable]:
+    return [int(x) for x in arr] if arr.dtype.kind in "iu" else [str(x) for x in arr]
+
+
+def load_or_migrate(path: pathlib.Path, csv_path: pathlib.Path, csv_loader) -> SparseMatrix:
+    """path(.npz)가 있으면 로드, 없으면 기존 밀집 CSV를 csv_loader로 읽어 변환(없으면 빈 매트릭스)"""
+    if pathlib.Path(path).exists():
+        return SparseMatrix.load(path)
+    return SparseMatrix.from_frame(csv_loader(csv_path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        raise SystemExit("usage: python sparse_matrix.py <matrix.npz> <out.csv>")
+    SparseMatrix.load(pathlib.Path(sys.argv[1])).to_frame().reset_index().to_csv(
+        sys.argv[2], index=False, encoding="utf-8-sig")
+    print("written ->", sys.argv[2])
@@ -0,0 +1,137 @@
+# streamer_registry.py
+# -*- coding: utf-8 -*-
+"""
+스트리머 사전(dictionary encoding) 레지스트리
+- 플랫폼 고유 키(SOOP user_id / CHZZK channelId) → 조밀한 정수 id(sid, 0부터)
+- 닉네임이 바뀌어도 sid는 그대로 → 매트릭스 열이 닉네임 변경에 흔들리지 않음
+- 닉네임 이력은 따로 보관
+
+파일 (플랫폼별 루트, 예: data/soop, data/chzzk):
+  streamers.csv     sid, key, nick(최신), first_seen, last_seen
+  nick_history.csv  sid, nick, first_seen, last_seen
+"""
+
+from __future__ import annotations
+import pathlib
+import threading
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import atomic_io
+
+STREAMER_COLS = ["sid", "key", "nick", "first_seen", "last_seen"]
+HISTORY_COLS = ["sid", "nick", "first_seen", "last_seen"]
+
+
+class StreamerRegistry:
+    def __init__(self, root: pathlib.Path):
+        self.root = pathlib.Path(root)
+        self.streamers_csv = self.root / "streamers.csv"
+        self.history_csv = self.root / "nick_history.csv"
+        self.ids: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self.nicks: List[str] = []
+        self.first_seen: List[str] = []
+        self.last_seen: List[str] = []
+        self.history: Dict[Tuple[int, str], List[str]] = {}  # (sid, nick) → [first_seen, last_seen]
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _load(self) -> None:
+        if self.streamers_csv.exists():
+            s = pd.read_csv(self.streamers_csv, dtype=str, keep_default_na=False).sort_values(
+                "sid", key=lambda c: c.astype(int))
+            self.keys = s["key"].tolist()
+            self.nicks = s["nick"].tolist()
+            self.first_seen = s["first_seen"].tolist()
+            self.last_seen = s["last_seen"].tolist()
+            self.ids = {k: i for i, k in enumerate(self.keys)}
+        if self.history_csv.exists():
+            h = pd.read_csv(self.history_csv, dtype=str, keep_default_na=False)
+            for sid, nick, first, last in h[HISTORY_COLS].itertuples(index=False):
+                self.history[(int(sid), nick)] = [first, last]
+
+    # ---- 인코딩 ----
+    def encode(self, keys: Sequence[str], nicks: Sequence[str], hours: Union[str, Sequence[str]]) -> np.ndarray:
+        """
+        (키, 닉네임) 목록 → sid 배열. 처음 보는 키는 새 sid 발급.
+        hours('YYYY-MM-DDTHH:00:00Z', 하나 또는 행별)로 first_seen/last_seen과 닉네임 이력을 갱신.
+        """
+        keys, nicks = list(keys), list(nicks)
+        hours = [hours] * len(keys) if isinstance(hours, str) else list(hours)
+        out = np.empty(len(keys), dtype=np.int64)
+        with self._lock:
+            for i, (key, nick, hour) in enumerate(zip(keys, nicks, hours)):
+                key, nick = str(key), str(nick)
+                sid = self.ids.get(key)
+                if sid is None:
+                    sid = self.ids[key] = len(self.keys)
+                    self.keys.append(key)
+                    self.nicks.append(nick)
+                    self.first_seen.append(hour)
+                    self.last_seen.append(hour)
+                    self.dirty = True
+                else:
+                    if hour >= self.last_seen[sid]:
+                        if self.nicks[sid] != nick or self.last_seen[sid] != hour:
+                            self.dirty = True
+                        self.nicks[sid] = nick
+                        self.last_seen[sid] = hour
+                    if hour < self.first_seen[sid]:
+                        self.first_seen[sid] = hour
+                        self.dirty = True
+                span = self.history.get((sid, nick))
+                if span is None:
+                    self.history[(sid, nick)] = [hour, hour]
+                    self.dirty = True
+                elif hour < span[0] or hour > span[1]:
+                    span[0], span[1] = min(span[0], hour), max(span[1], hour)
+                    self.dirty = True
+                out[i] = sid
+        return out
+
+    # ---- 디코딩 ----
+    def label(self, sid: int) -> str:
+        """사람이 읽는 열 라벨: 'key|최신 닉네임'"""
+        return f"{self.keys[sid]}|{self.nicks[sid]}"
+
+    def labeled(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """열이 sid인 매트릭스 → 열을 'key|최신 닉네임'으로 바꾼 사본"""
+        return frame.rename(columns=lambda c: self.label(int(c)))
+
+    # ---- 저장 ----
+    def save(self) -> None:
+        with self._lock:
+            if not self.dirty:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            atomic_io.write_csv(pd.DataFrame({
+                "sid": range(len(self.keys)),
+                "key": self.keys,
+                "nick": self.nicks,
+                "first_seen": self.first_seen,
+                "last_seen": self.last_seen,
+            }), self.streamers_csv, index=False)
+            hist = sorted((sid, nick, span[0], span[1]) for (sid, nick), span in self.history.items())
+            atomic_io.write_csv(pd.DataFrame(hist, columns=HISTORY_COLS), self.history_csv, index=False)
+            self.dirty = False
+
+
+_registries: Dict[pathlib.Path, StreamerRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(root: pathlib.Path) -> StreamerRegistry:
+    """루트별 레지스트리 (프로세스 안에서 재사용)"""
+    root = pathlib.Path(root)
+    with _registries_lock:
+        reg = _registries.get(root)
+        if reg is None:
+            reg = _registries[root] = StreamerRegistry(root)
+        return reg